@@ -103,7 +103,7 @@ def pytype(session: Session) -> None:
 def tests(session: Session) -> None:
     """Run the test suite."""
     args = session.posargs or ["--cov", "-m", "not e2e"]
-    session.run("poetry", "install", "--no-dev", external=True)
+    session.run("poetry", "install", "--no-dev", "--extras", "analysis", external=True)
     install_with_constraints(
         session, "coverage[toml]", "pytest", "pytest-cov", "pytest-mock"
     )
@@ -114,7 +114,7 @@ def tests(session: Session) -> None:
 def typeguard(session: Session) -> None:
     """Runtime type checking using Typeguard."""
     args = session.posargs or ["-m", "not e2e"]
-    session.run("poetry", "install", "--no-dev", external=True)
+    session.run("poetry", "install", "--no-dev", "--extras", "analysis", external=True)
     install_with_constraints(session, "pytest", "pytest-mock", "typeguard")
     session.run("pytest", f"--typeguard-packages={package}", *args)
 
@@ -150,3 +150,11 @@ def pylint(session: Session) -> None:
     args = session.posargs or locations
     install_with_constraints(session, "pylint")
     session.run("pylint", *args)
+
+
+@nox.session(python=["3.9.0", "3.8.2", "3.7.7"])
+def benchmark(session: Session) -> None:
+    """Benchmark the driver against the device simulator."""
+    args = session.posargs or ["--output=benchmark.json"]
+    session.run("poetry", "install", "--no-dev", external=True)
+    session.run("python", "-m", f"{package}.hm310p_benchmark", *args)
@@ -1,22 +1,169 @@
 # src/hm310p_cli/console.py
 # -*- coding: utf-8 -*-
+"""Command line interface.
+
+Only click and the constants are imported at module load. The driver,
+minimalmodbus and pyserial are imported by the commands that open a
+device, so --help, --version, argument errors and daemon clients start
+fast. tests/test_startup.py guards the import time.
+
+"""
+import functools
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 # third party imports
 import click
 
 # project imports
 from . import __version__
-from .hm310p import HM310P
-from .hm310p_constants import PowerState
+from .hm310p_constants import BAUDRATES, DEFAULT_BAUDRATE, ProtectionFlag
 
 iMinA = 0.0
 iMaxA = 10.0
 uMinV = 0.0
 uMaxV = 32.0
 
+BAUDRATE_CHOICES = ["auto"] + [str(rate) for rate in BAUDRATES]
+
+
+def _resolve_baudrate(
+    port: str, address: int, baudrate: Optional[str], identity_cache: Any
+) -> int:
+    """Returns line rate from option value, detection or cache."""
+    if baudrate == "auto":
+        from .hm310p_baudrate import detect_baudrate
+
+        return detect_baudrate(port, address, identity_cache=identity_cache)
+    if baudrate is not None:
+        return int(baudrate)
+    if identity_cache is not None:
+        cached = identity_cache.load_baudrate(port, address)
+        if cached is not None:
+            return cached
+    return DEFAULT_BAUDRATE
+
+
+#: option probing the identity again and replacing the cached one
+REFRESH_IDENTITY_OPTION = click.option(
+    "--refresh-identity",
+    is_flag=True,
+    help="Probe model and decimals and replace the cached entry",
+)
+
+
+def _identity_cache(cache: bool, refresh_identity: bool, specs: List[Any]) -> Any:
+    """Returns the identity cache of the options, None with --no-cache.
+
+    With --refresh-identity the cached model and decimals of the devices
+    are dropped, so opening them probes again and stores the new values.
+    The cached line rate is kept.
+    """
+    from .hm310p_cache import IdentityCache
+
+    if not cache:
+        return None
+    identity_cache = IdentityCache()
+    if refresh_identity:
+        for spec in specs:
+            identity_cache.invalidate(spec.port, spec.address, keep_baudrate=True)
+    return identity_cache
+
+
+def device_options(
+    retries: int = 2,
+    retries_help: str = "Repetitions of a transaction after a timeout or CRC error",
+) -> Callable[[Callable], Callable]:
+    """Returns decorator adding the options of commands on one device.
+
+    The options are -p/--port, -a/--address, -b/--baudrate, --cache,
+    --refresh-identity and --retries, see _open_supply().
+
+    Args:
+        retries (int): default number of repetitions
+        retries_help (str): help text of --retries
+
+    """
+    options = [
+        click.option("-p", "--port", type=str, help="Serial device", required=True),
+        click.option(
+            "-a",
+            "--address",
+            type=click.IntRange(1, 247),
+            default=1,
+            help="Slave address",
+        ),
+        click.option(
+            "-b",
+            "--baudrate",
+            type=click.Choice(BAUDRATE_CHOICES),
+            help="Line rate, auto detects it, defaults to the cached rate or 9600",
+        ),
+        click.option(
+            "--cache/--no-cache",
+            default=True,
+            help="Use cached model and decimals instead of probing the device",
+        ),
+        REFRESH_IDENTITY_OPTION,
+        click.option(
+            "--retries", type=click.IntRange(0), default=retries, help=retries_help
+        ),
+    ]
+
+    def decorator(command: Callable) -> Callable:
+        for option in reversed(options):
+            command = option(command)
+        return command
+
+    return decorator
+
+
+def _open_supply(
+    port: str,
+    address: int,
+    baudrate: Optional[str],
+    cache: bool,
+    refresh_identity: bool,
+    retries: int,
+    monitor: Any = None,
+) -> Any:
+    """Opens the driver with the values of device_options()."""
+    from .hm310p_fleet import open_device
+    from .hm310p_inventory import DeviceSpec
+
+    spec = DeviceSpec(port, address)
+    identity_cache = _identity_cache(cache, refresh_identity, [spec])
+    spec.baudrate = _resolve_baudrate(port, address, baudrate, identity_cache)
+    return open_device(spec, identity_cache, retries, monitor)
+
 
 @click.command()
-@click.option("-p", "--port", type=str, help="Serial device", required=True)
+@click.option(
+    "-p",
+    "--port",
+    "ports",
+    type=str,
+    multiple=True,
+    help="Serial device, PORT:ADDRESS for other slaves than 1, repeatable",
+)
+@click.option(
+    "-i",
+    "--inventory",
+    type=click.Path(exists=True, dir_okay=False),
+    help="JSON file listing the devices to configure",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(1),
+    default=8,
+    help="Number of ports configured in parallel",
+)
+@click.option(
+    "-b",
+    "--baudrate",
+    type=click.Choice(BAUDRATE_CHOICES),
+    help="Line rate, auto detects it, defaults to the cached rate or 9600",
+)
 @click.option(
     "-s",
     "--powerstate",
@@ -50,37 +197,54 @@ uMaxV = 32.0
     help="Over current protection value in Ampere",
     required=False,
 )
+@click.option(
+    "--cache/--no-cache",
+    default=True,
+    help="Use cached model and decimals instead of probing the device",
+)
+@REFRESH_IDENTITY_OPTION
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    help="Print the planned frames and bus time without opening the port",
+)
+@click.option(
+    "--retries",
+    type=click.IntRange(0),
+    default=2,
+    help="Repetitions of a transaction after a timeout or CRC error",
+)
+@click.option(
+    "-S",
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False),
+    help="Forward the command to the daemon listening on this socket",
+)
 @click.option("-D", "--debug", is_flag=True)
 @click.version_option(version=__version__)
 def main(
-    port: str,
+    ports: Tuple[str, ...],
+    inventory: Optional[str],
+    jobs: int,
+    baudrate: Optional[str],
     powerstate: str,
     vout: float,
     ovp: float,
     iout: float,
     ocp: float,
+    cache: bool,
+    refresh_identity: bool,
+    dry_run: bool,
+    retries: int,
+    socket_path: Optional[str],
     debug: bool,
 ) -> None:
     """The hm310p command line interface"""
 
-    adaptedOVP = ""
-    adaptedOCP = ""
-
-    if ovp is None:
-        """ovp value five percent higher than vout value"""
-        ovp = 1.05 * vout
-        adaptedOVP = " => OVP not given, set 5% larger than Vout"
-        if ovp > uMaxV:
-            ovp = uMaxV
-            adaptedOVP = f" => OVP not given, clipped to {uMaxV:02.3f} V"
-
-    if ocp is None:
-        """ocp value five percent higher than iout value"""
-        ocp = 1.05 * iout
-        adaptedOCP = " => OCP not given, set 5% larger than Iout"
-        if ocp > iMaxA:
-            ocp = iMaxA
-            adaptedOCP = f" => OCP not given, clipped to {iMaxA:02.3f} A"
+    specs = _parse_specs(ports, inventory)
+    ovp, adaptedOVP = _default_limit(ovp, vout, uMaxV, "OVP", "Vout", "V")
+    ocp, adaptedOCP = _default_limit(ocp, iout, iMaxA, "OCP", "Iout", "A")
 
     if ovp < vout:
         raise click.BadOptionUsage("ovp", f"OVP={ovp:02.3f} V < Vout={vout:02.3f} V")
@@ -90,34 +254,1092 @@ def main(
 
     if debug:
         click.secho("Welcome to the hm310p command line interface.", fg="green")
-        click.echo(f"Port\t\t: {port}")
+        click.echo(f"Port\t\t: {', '.join(str(spec) for spec in specs)}")
         click.echo(f"Powerstate\t: {powerstate}")
         click.echo(f"Vout\t\t: {vout:02.3f} V")
         click.echo(f"OVP\t\t: {ovp:02.3f} V" + adaptedOVP)
         click.echo(f"Iout\t\t: {iout:02.3f} A")
         click.echo(f"OCP\t\t: {ocp:02.3f} A" + adaptedOCP)
 
-    psupply = HM310P(port, 1)
-
     if powerstate == "on":
-        psupply.set_opp()
-        print(f"OPP: {psupply.get_opp():2.3f}")
-        # Iocp = 0.750 A, Iout = 0.5 A, Uout = 24 V, Uovp = 24.05 V
-        psupply.set_ocp(ocp)
-        psupply.set_current(iout)
-        psupply.set_ovp(ovp)
-        psupply.set_voltage(vout, "Preset")
-        psupply.get_voltage("Output")
-        psupply.get_voltage("Protection")
-        psupply.set_opp(iout * vout)
-        print(f"OPP CONSOLE: {psupply.get_opp():2.3f}")
+        args: Tuple[Any, ...] = (1, vout, iout, ovp, ocp, iout * vout)
+    else:
+        args = (0, 0, 0)
+
+    if socket_path and not dry_run:
+        _forward_set(socket_path, specs, args)
+        return
+
+    if dry_run:
+        _dry_run_set(specs, args, baudrate, cache)
+        return
+
+    if len(specs) > 1:
+        _fleet_set(specs, args, baudrate, jobs, cache, refresh_identity, retries)
+        return
+
+    from .hm310p_plan import set_output_state
+
+    spec = specs[0]
+    if spec.baudrate is not None:
+        baudrate = str(spec.baudrate)  # rate of the inventory entry
+    psupply = _open_supply(
+        spec.port, spec.address, baudrate, cache, refresh_identity, retries
+    )
+    set_output_state(psupply, *args)
+
+
+def _parse_specs(ports: Tuple[str, ...], inventory: Optional[str]) -> List[Any]:
+    """Returns the devices given with -p and -i."""
+    from .hm310p_inventory import DeviceSpec, load_inventory
+
+    try:
+        specs = [DeviceSpec.parse(text) for text in ports]
+        if inventory is not None:
+            specs += load_inventory(inventory)
+    except ValueError as exc:
+        raise click.BadParameter(str(exc))
+    if not specs:
+        raise click.UsageError("Missing option '-p' / '--port' or '-i' / '--inventory'")
+    return specs
+
+
+def _default_limit(
+    limit: Optional[float],
+    value: float,
+    maximum: float,
+    name: str,
+    quantity: str,
+    unit: str,
+) -> Tuple[float, str]:
+    """Returns protection limit and a note, five percent above value if not given."""
+    if limit is not None:
+        return limit, ""
+    limit = 1.05 * value
+    if limit > maximum:
+        return maximum, f" => {name} not given, clipped to {maximum:02.3f} {unit}"
+    return limit, f" => {name} not given, set 5% larger than {quantity}"
+
+
+def _forward_set(socket_path: str, specs: List[Any], args: Tuple[Any, ...]) -> None:
+    """Sends set_output_state of every device to the daemon."""
+    from .hm310p_client import DaemonClient, DaemonError
+
+    try:
+        with DaemonClient(socket_path) as client:
+            for spec in specs:
+                client.device_call(spec.port, spec.address, "set_output_state", *args)
+    except (OSError, DaemonError) as exc:
+        raise click.ClickException(str(exc))
+
+
+def _dry_run_set(
+    specs: List[Any], args: Tuple[Any, ...], baudrate: Optional[str], cache: bool
+) -> None:
+    """Prints the planned frames and bus time of every device."""
+    from .hm310p_constants import PowerState
+    from .hm310p_plan import offline_layout, plan_output_state
+
+    if baudrate == "auto":
+        baudrate = None  # the port is not opened for detection
+    identity_cache = _identity_cache(cache, False, specs)  # read only
+    for spec in specs:
+        identity = None
+        if identity_cache is not None:
+            identity = identity_cache.load(spec.port, spec.address)
+        line_rate = spec.baudrate or _resolve_baudrate(
+            spec.port, spec.address, baudrate, identity_cache
+        )
+        plan = plan_output_state(
+            offline_layout(identity),
+            PowerState(args[0]),
+            *args[1:],
+            slaveaddress=spec.address,
+        )
+        if len(specs) > 1:
+            click.echo(f"{spec}:")
+        for line in plan.describe(line_rate):
+            click.echo(line)
+        click.echo(
+            f"{len(plan.writes())} transactions, estimated bus time "
+            f"{plan.estimate_bus_time(line_rate) * 1e3:.2f} ms at {line_rate} Bd"
+        )
+
+
+def _fleet_set(
+    specs: List[Any],
+    args: Tuple[Any, ...],
+    baudrate: Optional[str],
+    jobs: int,
+    cache: bool,
+    refresh_identity: bool,
+    retries: int,
+) -> None:
+    """Configures several devices in parallel and prints one line each."""
+    from .hm310p_fleet import run_on_devices
+    from .hm310p_plan import set_output_state
+
+    if baudrate == "auto":
+        raise click.BadOptionUsage(
+            "baudrate", "Detect line rates with hm310p baud or hm310p scan"
+        )
+    for spec in specs:
+        if spec.baudrate is None and baudrate is not None:
+            spec.baudrate = int(baudrate)
+    identity_cache = _identity_cache(cache, refresh_identity, specs)
+    report = run_on_devices(
+        specs,
+        lambda psupply: set_output_state(psupply, *args),
+        jobs,
+        identity_cache,
+        retries,
+    )
+    for result in report.results:
+        outcome = (
+            f"{result.result} writes"
+            if result.ok
+            else f"failed: {type(result.error).__name__}: {result.error}"
+        )
+        click.echo(f"{result.spec}\t{result.elapsed * 1e3:.1f} ms\t{outcome}")
+    click.echo(
+        f"{len(report.succeeded)} of {len(report.results)} devices configured "
+        f"in {report.elapsed * 1e3:.1f} ms, slowest {report.slowest * 1e3:.1f} ms",
+        err=True,
+    )
+    if report.failed:
+        raise click.ClickException(f"{len(report.failed)} devices failed")
+
+
+@click.group()
+@click.version_option(version=__version__)
+def cli() -> None:
+    """The hm310p command line interface"""
+
+
+cli.add_command(main, name="set")
+
+
+@cli.command()
+@device_options()
+@click.option(
+    "-o",
+    "--output",
+    type=click.Path(dir_okay=False, writable=True, allow_dash=True),
+    default="-",
+    help="Output file, - for stdout",
+)
+@click.option(
+    "-f",
+    "--format",
+    "fmt",
+    type=click.Choice(["csv", "bin"], case_sensitive=False),
+    default="csv",
+    help="Output format",
+)
+@click.option("-n", "--samples", type=click.IntRange(1), help="Number of samples")
+@click.option(
+    "-d", "--duration", type=click.FloatRange(0.0), help="Logging time in seconds"
+)
+@click.option(
+    "-i",
+    "--interval",
+    type=click.FloatRange(0.0),
+    default=0.0,
+    help="Minimum time between samples in seconds, 0 polls at maximum rate",
+)
+@click.option(
+    "--buffer",
+    "capacity",
+    type=click.IntRange(1),
+    default=4096,
+    help="Ring buffer capacity in samples",
+)
+@click.option(
+    "--metrics",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Write transaction metrics in Prometheus text format to this file",
+)
+def log(
+    port: str,
+    address: int,
+    baudrate: Optional[str],
+    output: str,
+    fmt: str,
+    samples: int,
+    duration: float,
+    interval: float,
+    capacity: int,
+    cache: bool,
+    refresh_identity: bool,
+    retries: int,
+    metrics: str,
+) -> None:
+    """Streams output voltage, current and power to a file."""
+    import signal
+
+    from .hm310p_logger import BinarySampleWriter, CsvSampleWriter, StreamingLogger
+    from .hm310p_metrics import (
+        HistogramCollector,
+        PrometheusTextfileExporter,
+        TransactionMonitor,
+    )
+
+    monitor = TransactionMonitor()
+    collector = monitor.subscribe(HistogramCollector())
+    psupply = _open_supply(
+        port, address, baudrate, cache, refresh_identity, retries, monitor
+    )
+
+    if fmt == "csv":
+        stream = click.open_file(output, "w")
+        writer = CsvSampleWriter(stream)
+    else:
+        stream = click.open_file(output, "wb")
+        writer = BinarySampleWriter(stream)
+
+    logger = StreamingLogger(psupply, writer, capacity, interval)
+    previous_handler = signal.signal(signal.SIGINT, lambda *args: logger.stop())
+    try:
+        report = logger.run(samples, duration)
+    except OSError as exc:
+        raise click.ClickException(f"Writing the log failed: {exc}")
+    finally:
+        signal.signal(signal.SIGINT, previous_handler)
+        stream.close()
+
+    click.echo(
+        f"{report.samples} samples in {report.elapsed:.3f} s "
+        f"({report.rate:.1f} samples/s), {report.dropped} dropped",
+        err=True,
+    )
+    if metrics:
+        PrometheusTextfileExporter(collector, metrics).write()
+
+
+@cli.command()
+@click.option("-p", "--port", type=str, help="Serial device", required=True)
+@click.option(
+    "-a", "--address", type=click.IntRange(1, 247), default=1, help="Slave address"
+)
+@click.option(
+    "-n",
+    "--attempts",
+    type=click.IntRange(1),
+    default=5,
+    help="Probe transactions per line rate",
+)
+@click.option(
+    "-t",
+    "--timeout",
+    type=click.FloatRange(0.0),
+    default=0.05,
+    help="Response timeout on top of the frame times in seconds",
+)
+@click.option(
+    "--cache/--no-cache",
+    default=True,
+    help="Store the detected line rate in the identity cache",
+)
+def baud(port: str, address: int, attempts: int, timeout: float, cache: bool) -> None:
+    """Detects the line rate and measures the throughput at every rate."""
+    from .hm310p_baudrate import best_baudrate, probe_baudrates
+    from .hm310p_cache import IdentityCache
+
+    results = probe_baudrates(port, address, BAUDRATES, attempts, timeout)
+    for result in results:
+        click.echo(
+            f"{result.baudrate:6d} Bd  {result.responses}/{result.attempts} "
+            f"responses  {result.tps:7.1f} tps  "
+            f"mean rtt {result.mean_rtt * 1e3:7.3f} ms"
+        )
+    baudrate = best_baudrate(results)
+    if baudrate is None:
+        raise click.ClickException(f"No response from slave {address} on {port}")
+    click.echo(f"Detected line rate {baudrate} Bd")
+    if cache:
+        IdentityCache().store_baudrate(port, address, baudrate)
+
+
+@cli.command()
+@click.option(
+    "-S",
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False),
+    help="Socket path, defaults to $XDG_RUNTIME_DIR/hm310p.sock",
+)
+@click.option(
+    "-b",
+    "--baudrate",
+    type=click.Choice([str(rate) for rate in BAUDRATES]),
+    help="Line rate, defaults to the cached rate or 9600",
+)
+@click.option(
+    "--retries",
+    type=click.IntRange(0),
+    default=2,
+    help="Repetitions of a transaction after a timeout or CRC error",
+)
+@click.option(
+    "--cache/--no-cache",
+    default=True,
+    help="Use cached model and decimals instead of probing the device",
+)
+def daemon(
+    socket_path: Optional[str], baudrate: Optional[str], retries: int, cache: bool
+) -> None:
+    """Keeps devices open and serves JSON-RPC on a Unix socket."""
+    from .hm310p_cache import IdentityCache
+    from .hm310p_daemon import DeviceRegistry, HM310PDaemon
+
+    registry = DeviceRegistry(
+        IdentityCache() if cache else None,
+        int(baudrate) if baudrate else None,
+        retries,
+    )
+    try:
+        server = HM310PDaemon(socket_path, registry)
+    except OSError as exc:
+        raise click.ClickException(str(exc))
+    click.echo(f"Listening on {server.path}", err=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def _parse_argument(text: str) -> Any:
+    import json
+
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text  # plain strings like channel names need no quotes
+
+
+@cli.command()
+@click.option(
+    "-S",
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False),
+    help="Socket path, defaults to $XDG_RUNTIME_DIR/hm310p.sock",
+)
+@click.option("-p", "--port", type=str, help="Serial device")
+@click.option(
+    "-a", "--address", type=click.IntRange(1, 247), default=1, help="Slave address"
+)
+@click.argument("method")
+@click.argument("arguments", nargs=-1)
+def call(
+    socket_path: Optional[str],
+    port: Optional[str],
+    address: int,
+    method: str,
+    arguments: Tuple[str, ...],
+) -> None:
+    """Calls METHOD of a device through the daemon and prints the result.
+
+    ARGUMENTS are parsed as JSON where possible, e.g.
+    "hm310p call -p /dev/ttyUSB0 set_voltage 12.5".
+    """
+    import json
+
+    from .hm310p_client import DaemonClient, DaemonError, default_socket_path
+
+    params: Dict[str, Any] = {}
+    if port is not None:
+        params = {"port": port, "address": address}
+        params["args"] = [_parse_argument(arg) for arg in arguments]
+    try:
+        with DaemonClient(socket_path or default_socket_path()) as client:
+            result = client.call(method, **params)
+    except (OSError, DaemonError) as exc:
+        raise click.ClickException(str(exc))
+    click.echo(json.dumps(result))
+
+
+@cli.command()
+@click.option("-p", "--port", type=str, help="Serial device", required=True)
+@click.option(
+    "-b",
+    "--baudrate",
+    type=click.Choice([str(rate) for rate in BAUDRATES]),
+    default=str(DEFAULT_BAUDRATE),
+    help="Line rate",
+)
+@click.option(
+    "-a",
+    "--address",
+    type=click.IntRange(1, 247),
+    default=1,
+    help="Slave address used for unit id 0 and 255",
+)
+@click.option("--host", default="127.0.0.1", help="Address to listen on")
+@click.option("--tcp-port", type=click.IntRange(0, 65535), default=5020)
+@click.option(
+    "--freshness",
+    type=click.FloatRange(0.0),
+    help="Reuse window of the output block in seconds, defaults to 0.02",
+)
+def gateway(
+    port: str,
+    baudrate: str,
+    address: int,
+    host: str,
+    tcp_port: int,
+    freshness: Optional[float],
+) -> None:
+    """Serves the supply to Modbus TCP clients."""
+    import asyncio
+
+    from .hm310p_async import AsyncSerialTransport
+    from .hm310p_gateway import DEFAULT_FRESHNESS, ModbusTcpGateway
+
+    if freshness is None:
+        freshness = DEFAULT_FRESHNESS
+
+    async def serve() -> None:
+        transport = await AsyncSerialTransport.open(port, int(baudrate))
+        server = ModbusTcpGateway(transport, address, freshness)
+        try:
+            await server.start(host, tcp_port)
+            for name, number in server.sockets:
+                click.echo(f"Listening on {name}:{number}", err=True)
+            await server.serve_forever()
+        finally:
+            await server.close()
+            transport.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+@cli.command()
+@device_options()
+@click.option(
+    "-q",
+    "--quantity",
+    type=click.Choice(["voltage", "current"]),
+    default="voltage",
+    help="Setpoint to ramp",
+)
+@click.option(
+    "--profile",
+    type=click.Choice(["linear", "log", "table"]),
+    default="linear",
+    help="Spacing of the setpoints",
+)
+@click.option("--start", type=float, default=0.0, help="First setpoint")
+@click.option("--stop", type=float, help="Last setpoint")
+@click.option("-n", "--steps", type=click.IntRange(1), default=10)
+@click.option(
+    "--table", help="Comma separated setpoints of the table profile, e.g. 1,5,3.3"
+)
+@click.option(
+    "-T",
+    "--period",
+    type=click.FloatRange(0.0),
+    default=0.1,
+    help="Time between steps in seconds",
+)
+@click.option(
+    "--readback/--no-readback",
+    default=True,
+    help="Read voltage, current and power after every step",
+)
+def ramp(
+    port: str,
+    address: int,
+    baudrate: Optional[str],
+    quantity: str,
+    profile: str,
+    start: float,
+    stop: Optional[float],
+    steps: int,
+    table: Optional[str],
+    period: float,
+    readback: bool,
+    cache: bool,
+    refresh_identity: bool,
+    retries: int,
+) -> None:
+    """Steps a setpoint through a profile and prints the output as CSV."""
+    import signal
+    import threading
+
+    from .hm310p_ramp import (
+        linear_profile,
+        log_profile,
+        run_profile,
+        table_profile,
+    )
+
+    if profile == "table":
+        if not table:
+            raise click.BadOptionUsage("table", "--table is required")
+        try:
+            setpoints = table_profile(v for v in table.split(",") if v.strip())
+        except ValueError as exc:
+            raise click.BadOptionUsage("table", str(exc))
+    else:
+        if stop is None:
+            raise click.BadOptionUsage("stop", "--stop is required")
+        make = linear_profile if profile == "linear" else log_profile
+        try:
+            setpoints = make(start, stop, steps)
+        except ValueError as exc:
+            raise click.BadOptionUsage("start", str(exc))
+
+    psupply = _open_supply(port, address, baudrate, cache, refresh_identity, retries)
+
+    def echo(step: Any) -> None:
+        line = f"{step.index},{step.setpoint:.4f},{step.error * 1e3:.3f}"
+        if step.snapshot is not None:
+            snap = step.snapshot
+            line += f",{snap.voltage:.3f},{snap.current:.4f},{snap.power:.3f}"
+        click.echo(line)
+
+    halt = threading.Event()
+    previous_handler = signal.signal(signal.SIGINT, lambda *args: halt.set())
+    click.echo("step,setpoint,error_ms" + (",voltage,current,power" * readback))
+    try:
+        report = run_profile(
+            psupply, setpoints, period, quantity, readback, halt, echo
+        )
+    except ValueError as exc:
+        raise click.ClickException(str(exc))
+    finally:
+        signal.signal(signal.SIGINT, previous_handler)
+    click.echo(
+        f"{len(report.steps)} steps, timing error mean "
+        f"{report.mean_error * 1e3:.3f} ms, max {report.max_error * 1e3:.3f} ms, "
+        f"{report.overruns} overruns",
+        err=True,
+    )
+
+
+@cli.command()
+@device_options()
+@click.option(
+    "--profile",
+    type=click.Choice(["linear", "log"]),
+    default="linear",
+    help="Spacing of the voltage setpoints",
+)
+@click.option("--start", type=float, default=0.0, help="First voltage in V")
+@click.option("--stop", type=float, required=True, help="Last voltage in V")
+@click.option("-n", "--steps", type=click.IntRange(2), default=50)
+@click.option("-c", "--current", type=float, help="Current limit in A")
+@click.option(
+    "-T",
+    "--period",
+    type=click.FloatRange(0.0),
+    default=0.05,
+    help="Settling time per point in seconds",
+)
+@click.option(
+    "-o",
+    "--output",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Write the curve to a .npz file, or to CSV if it ends with .csv",
+)
+def ivcurve(
+    port: str,
+    address: int,
+    baudrate: Optional[str],
+    profile: str,
+    start: float,
+    stop: float,
+    steps: int,
+    current: Optional[float],
+    period: float,
+    output: Optional[str],
+    cache: bool,
+    refresh_identity: bool,
+    retries: int,
+) -> None:
+    """Sweeps the voltage, measures the current and prints a summary.
+
+    The output is switched on for the sweep and off afterwards. Needs NumPy,
+    install it with pip install hm310p-cli[analysis].
+    """
+    import json
+    import signal
+    import threading
+
+    try:
+        from .hm310p_ivcurve import sweep_iv
+    except ImportError:
+        raise click.ClickException(
+            "ivcurve needs NumPy, install it with pip install hm310p-cli[analysis]"
+        )
+    from .hm310p_ramp import linear_profile, log_profile
+
+    make = linear_profile if profile == "linear" else log_profile
+    try:
+        setpoints = make(start, stop, steps)
+    except ValueError as exc:
+        raise click.BadOptionUsage("start", str(exc))
+
+    from .hm310p_constants import PowerState
+
+    psupply = _open_supply(port, address, baudrate, cache, refresh_identity, retries)
+
+    halt = threading.Event()
+    previous_handler = signal.signal(signal.SIGINT, lambda *args: halt.set())
+    try:
+        if current is not None:
+            psupply.set_current(current)
+        psupply.set_voltage(setpoints[0])
         psupply.set_powerstate(PowerState.On)
-        psupply.set_voltage_and_current_of_channel_list(
-            ["Output", "Preset", "Protection", "M1", "M2", "M3", "M4", "M5", "M6"],
-            10.10,
-            5.555,
+        try:
+            curve = sweep_iv(psupply, setpoints, period, stop=halt)
+        finally:
+            psupply.set_powerstate(PowerState.Off)
+    except ValueError as exc:
+        raise click.ClickException(str(exc))
+    finally:
+        signal.signal(signal.SIGINT, previous_handler)
+
+    if output is not None:
+        if output.lower().endswith(".csv"):
+            curve.to_csv(output)
+        else:
+            curve.save(output)
+    click.echo(json.dumps(curve.summary()))
+
+
+@cli.command()
+@device_options(0, "Repetitions of a poll after a timeout or CRC error")
+@click.option(
+    "-T",
+    "--interval",
+    type=click.FloatRange(0.001),
+    default=0.02,
+    help="Time between two polls in seconds",
+)
+def watch(
+    port: str,
+    address: int,
+    baudrate: Optional[str],
+    interval: float,
+    cache: bool,
+    refresh_identity: bool,
+    retries: int,
+) -> None:
+    """Prints protection trips and resets as JSON lines until interrupted."""
+    import json
+    import time
+
+    from .hm310p_protection import ProtectionWatcher
+
+    psupply = _open_supply(port, address, baudrate, cache, refresh_identity, retries)
+
+    def names(flags: Any) -> List[str]:
+        return [flag.name for flag in ProtectionFlag if flag in flags]
+
+    def echo(event: Any) -> None:
+        line = {
+            "timestamp": event.timestamp,
+            "flags": int(event.flags),
+            "raised": names(event.raised),
+            "cleared": names(event.cleared),
+        }
+        click.echo(json.dumps(line))
+
+    watcher = ProtectionWatcher(psupply, interval)
+    watcher.subscribe(echo)
+    try:
+        with watcher:
+            while True:
+                time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    stats = watcher.statistics
+    click.echo(
+        f"{stats.polls} polls, {stats.errors} errors, {stats.events} events, "
+        f"max gap {stats.max_gap * 1e3:.3f} ms, "
+        f"max latency {stats.max_latency * 1e3:.3f} ms",
+        err=True,
+    )
+
+
+@cli.command()
+@click.argument("powerstate", type=click.Choice(["on", "off"], case_sensitive=False))
+@click.option(
+    "-p",
+    "--port",
+    "ports",
+    multiple=True,
+    help="PORT[:ADDRESS] of the first group, repeatable",
+)
+@click.option(
+    "-i",
+    "--inventory",
+    type=click.Path(exists=True, dir_okay=False),
+    help="JSON file listing devices of the first group",
+)
+@click.option(
+    "-g",
+    "--group",
+    "groups",
+    multiple=True,
+    help="Comma separated PORT[:ADDRESS] list of a later group, repeatable",
+)
+@click.option(
+    "--delay",
+    type=click.FloatRange(0.0),
+    default=0.0,
+    help="Time between the releases of consecutive groups in seconds",
+)
+@click.option("-V", "--vout", type=float, help="Output voltage staged before on")
+@click.option("-I", "--iout", type=float, help="Output current staged before on")
+@click.option("--ovp", type=float, help="Over voltage protection staged before on")
+@click.option("--ocp", type=float, help="Over current protection staged before on")
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(1),
+    default=8,
+    help="Number of ports opened in parallel",
+)
+@click.option(
+    "--cache/--no-cache",
+    default=True,
+    help="Use cached model and decimals instead of probing the device",
+)
+@REFRESH_IDENTITY_OPTION
+@click.option(
+    "--retries",
+    type=click.IntRange(0),
+    default=2,
+    help="Repetitions of a transaction after a timeout or CRC error",
+)
+def power(
+    powerstate: str,
+    ports: Tuple[str, ...],
+    inventory: Optional[str],
+    groups: Tuple[str, ...],
+    delay: float,
+    vout: Optional[float],
+    iout: Optional[float],
+    ovp: Optional[float],
+    ocp: Optional[float],
+    jobs: int,
+    cache: bool,
+    refresh_identity: bool,
+    retries: int,
+) -> None:
+    """Switches groups of supplies on or off at the same time.
+
+    The devices of a group are switched together, groups follow each other
+    with --delay in between. Switching off runs the groups in reverse order.
+    Prints one JSON line per group with the measured skew.
+    """
+    from .hm310p_constants import PowerState
+    from .hm310p_fleet import run_on_devices
+    from .hm310p_group import run_sequence, stage_output_state
+
+    spec_groups = _parse_groups(ports, inventory, groups)
+    specs = [spec for group in spec_groups for spec in group]
+    identity_cache = _identity_cache(cache, refresh_identity, specs)
+    opened = run_on_devices(
+        specs, lambda psupply: psupply, jobs, identity_cache, retries, keep_open=True
+    )
+    try:
+        if opened.failed:
+            failed = opened.failed[0]
+            raise click.ClickException(f"{failed.spec}: {failed.error}")
+        devices = iter(result.result for result in opened.results)
+        device_groups = [[next(devices) for _ in group] for group in spec_groups]
+        state = PowerState.On if powerstate.lower() == "on" else PowerState.Off
+        staged = state == PowerState.On and (vout, iout, ovp, ocp) != (None,) * 4
+        stage = (
+            functools.partial(
+                stage_output_state, voltage=vout, current=iout, ovp=ovp, ocp=ocp
+            )
+            if staged
+            else None
         )
+        if state == PowerState.Off:
+            device_groups.reverse()
+        try:
+            reports = run_sequence(device_groups, state, delay, stage)
+        except ValueError as exc:
+            raise click.ClickException(str(exc))
+    finally:
+        for result in opened.succeeded:
+            result.result.serial.close()
+
+    _print_group_reports(reports)
+    if not all(report.ok for report in reports) or len(reports) < len(device_groups):
+        raise click.ClickException("Not all supplies were switched")
+
+
+def _parse_groups(
+    ports: Tuple[str, ...], inventory: Optional[str], groups: Tuple[str, ...]
+) -> List[List[Any]]:
+    """Returns the device groups given with -p, -i and -g."""
+    from .hm310p_inventory import DeviceSpec, load_inventory
+
+    try:
+        first = [DeviceSpec.parse(text) for text in ports]
+        if inventory is not None:
+            first += load_inventory(inventory)
+        spec_groups = [first] if first else []
+        for text in groups:
+            spec_groups.append([DeviceSpec.parse(t) for t in text.split(",") if t])
+    except ValueError as exc:
+        raise click.BadParameter(str(exc))
+    if not spec_groups or not all(spec_groups):
+        raise click.UsageError("Give devices with -p, -i or -g")
+    return spec_groups
+
+
+def _print_group_reports(reports: List[Any]) -> None:
+    """Prints one JSON line per group and the errors of its devices."""
+    import json
+
+    start = reports[0].released
+    for index, report in enumerate(reports):
+        line: Dict[str, Any] = {
+            "group": index,
+            "ok": report.ok,
+            "devices": len(report.timings),
+            "released_ms": None,
+            "skew_ms": round(report.skew * 1e3, 3),
+            "completion_skew_ms": round(report.completion_skew * 1e3, 3),
+        }
+        if report.released is not None and start is not None:
+            line["released_ms"] = round((report.released - start) * 1e3, 3)
+        click.echo(json.dumps(line))
+        for timing in report.timings:
+            if timing.error is not None:
+                device = timing.device
+                click.echo(
+                    f"{device.serial.port}:{device.address}: {timing.error}", err=True
+                )
+
+
+def _parse_addresses(text: str) -> List[int]:
+    """Returns slave addresses of a list like 1-5,9."""
+    addresses = set()
+    for part in text.split(","):
+        first, sep, last = part.strip().partition("-")
+        try:
+            low = int(first)
+            high = int(last) if sep else low
+        except ValueError:
+            raise click.BadParameter(f"Invalid address range {part!r}")
+        if not 1 <= low <= high <= 247:
+            raise click.BadParameter(f"Invalid address range {part!r}")
+        addresses.update(range(low, high + 1))
+    return sorted(addresses)
+
+
+@cli.command()
+@click.option(
+    "-p",
+    "--port",
+    "ports",
+    multiple=True,
+    help="Serial device to scan, repeatable, defaults to all ports",
+)
+@click.option(
+    "-a",
+    "--addresses",
+    default="1-247",
+    show_default=True,
+    help="Slave addresses to probe, e.g. 1-5,9",
+)
+@click.option(
+    "-b",
+    "--baudrate",
+    "baudrates",
+    type=click.Choice(["all"] + [str(rate) for rate in BAUDRATES]),
+    multiple=True,
+    help="Line rate to probe, repeatable, defaults to 9600",
+)
+@click.option(
+    "-T",
+    "--timeout",
+    type=click.FloatRange(0.001),
+    default=0.02,
+    show_default=True,
+    help="Time to wait for a response after the request in seconds",
+)
+@click.option(
+    "-o",
+    "--output",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Write the supplies found to this inventory file",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(1),
+    default=8,
+    help="Number of ports scanned in parallel",
+)
+@click.option(
+    "--cache/--no-cache",
+    default=True,
+    help="Store identity and line rate of the supplies found in the cache",
+)
+def scan(
+    ports: Tuple[str, ...],
+    addresses: str,
+    baudrates: Tuple[str, ...],
+    timeout: float,
+    output: Optional[str],
+    jobs: int,
+    cache: bool,
+) -> None:
+    """Finds supplies on serial ports and prints them."""
+    slaves = _parse_addresses(addresses)
+    if "all" in baudrates:
+        rates = list(BAUDRATES)
     else:
-        psupply.set_voltage(0)
-        psupply.set_current(0)
-        psupply.set_powerstate(PowerState.Off)
+        rates = [int(rate) for rate in baudrates] or [DEFAULT_BAUDRATE]
+
+    from .hm310p_cache import IdentityCache
+    from .hm310p_scan import scan as scan_ports
+
+    report = scan_ports(
+        ports or None,
+        slaves,
+        rates,
+        timeout,
+        jobs,
+        IdentityCache() if cache else None,
+    )
+    for port, error in sorted(report.errors.items()):
+        click.echo(f"{port}: {error}", err=True)
+    for result in report.results:
+        click.echo(_format_scan_result(result))
+    supplies = [result for result in report.results if result.model_name]
+    click.echo(
+        f"{len(supplies)} supplies found in {report.elapsed:.2f} s", err=True
+    )
+    if output is not None:
+        _write_scan_inventory(output, supplies)
+
+
+def _format_scan_result(result: Any) -> str:
+    """Returns port, address, line rate, model and round-trip time of a hit."""
+    return (
+        f"{result.port}\t{result.address}\t{result.baudrate}\t"
+        f"{result.model_name or 'unknown'}\t{result.rtt * 1e3:.1f} ms"
+    )
+
+
+def _write_scan_inventory(path: str, supplies: List[Any]) -> None:
+    """Writes the supplies found by a scan as inventory to path."""
+    from .hm310p_inventory import write_inventory
+
+    write_inventory(path, [result.spec() for result in supplies])
+
+
+@cli.command()
+@device_options()
+@click.argument("script_file", metavar="SCRIPT", type=click.File("r"), default="-")
+@click.option("-k", "--keep-going", is_flag=True, help="Continue after a failed step")
+def script(
+    script_file: Any,
+    port: str,
+    address: int,
+    baudrate: Optional[str],
+    keep_going: bool,
+    cache: bool,
+    refresh_identity: bool,
+    retries: int,
+) -> None:
+    """Runs the steps of SCRIPT, or of stdin, on one open device.
+
+    One command per line: set, get and assert of v, i, p, vset, iset, ovp,
+    ocp, opp and state, wait, on and off, e.g. "assert v 12 1%". Prints
+    line, step, value and time of every step.
+    """
+    from .hm310p_script import format_value, parse_script, run_script, ScriptError
+
+    try:
+        steps = parse_script(script_file)
+    except ScriptError as exc:
+        raise click.ClickException(str(exc))
+
+    psupply = _open_supply(port, address, baudrate, cache, refresh_identity, retries)
+
+    def echo(result: Any) -> None:
+        status = "ok" if result.ok else f"FAILED: {result.error}"
+        click.echo(
+            f"{result.step.lineno}\t{result.step.text}\t"
+            f"{format_value(result.value)}\t{result.elapsed * 1e3:.1f} ms\t{status}"
+        )
+
+    try:
+        report = run_script(psupply, steps, keep_going, echo)
+    finally:
+        psupply.serial.close()
+    click.echo(
+        f"{len(report.results)} of {len(steps)} steps run in "
+        f"{report.elapsed:.3f} s, bus time {report.bus_time:.3f} s, "
+        f"{len(report.failed)} failed",
+        err=True,
+    )
+    if not report.ok:
+        raise click.ClickException(f"{len(report.failed)} steps failed")
+
+
+def _history_path() -> str:
+    """Returns the location of the shell history file."""
+    import os
+
+    base = os.environ.get("XDG_STATE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".local", "state"
+    )
+    return os.path.join(base, "hm310p", "history")
+
+
+@cli.command()
+@device_options()
+@click.option(
+    "--history/--no-history",
+    default=True,
+    help="Keep the command history across sessions",
+)
+def shell(
+    port: str,
+    address: int,
+    baudrate: Optional[str],
+    history: bool,
+    cache: bool,
+    refresh_identity: bool,
+    retries: int,
+) -> None:
+    """Starts an interactive shell on one open device."""
+    import os
+
+    from .hm310p_shell import HM310PShell
+
+    try:
+        import readline
+    except ImportError:
+        readline = None  # no history and completion, e.g. on Windows
+
+    psupply = _open_supply(port, address, baudrate, cache, refresh_identity, retries)
+    path = _history_path()
+    if readline is not None and history and os.path.exists(path):
+        readline.read_history_file(path)
+    try:
+        HM310PShell(psupply).cmdloop()
+    finally:
+        psupply.serial.close()
+        if readline is not None and history:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            readline.set_history_length(1000)
+            readline.write_history_file(path)
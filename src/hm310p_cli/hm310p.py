@@ -33,65 +33,75 @@ Todo:
    http://google.github.io/styleguide/pyguide.html
 
 """
-from typing import List
+import math
+import struct
+import time
+from typing import Any, Dict, List, Optional, Tuple
 
 # third party imports
 import minimalmodbus
 import serial
 
 # project imports
-from hm310p_cli.hm310p_constants import PowerState, PowerSupplyError
+from hm310p_cli.hm310p_cache import DeviceIdentity, IdentityCache
+from hm310p_cli.hm310p_constants import (
+    DEFAULT_BAUDRATE,
+    PowerState,
+    PowerSupplyError,
+    PROTECTION_MASK,
+    ProtectionFlag,
+)
+from hm310p_cli.hm310p_metrics import (
+    classify_exception,
+    OUTCOME_OK,
+    OUTCOME_TIMEOUT,
+    TransactionEvent,
+    TransactionMonitor,
+)
 from hm310p_cli.hm310p_regdefs import HM3xxpRegisters as Reg
+from hm310p_cli.hm310p_retry import classify_request, RetryPolicy, RetryStatistics
+from hm310p_cli.hm310p_rto import RECONFIGURE_TOLERANCE, RtoEstimator
+from hm310p_cli.hm310p_rtu import check_crc, frame_time, response_length
 
 
-class HM310P(minimalmodbus.Instrument):
-    """The summary line for a class docstring should fit on one line.
-
-    If the class has public attributes, they may be documented here
-    in an ``Attributes`` section and follow the same formatting as a
-    function's ``Args`` section. Alternatively, attributes may be documented
-    inline with the attribute's declaration (see __init__ method below).
-
-    Properties created with the ``@property`` decorator should be documented
-    in the property's getter method.
+class OutputSnapshot:
+    """Output voltage, current and power sampled in a single transaction.
 
     Attributes:
-        attr1 (str): Description of `attr1`.
-        attr2 (:obj:`int`, optional): Description of `attr2`.
+        voltage (float): output voltage in Volt
+        current (float): output current in Ampere
+        power (float): output power in Watt
+        timestamp (float): time of the readback in seconds since the epoch
 
     """
 
-    def __init__(self, portname: str, slaveaddress: int) -> None:
-        """Instrument class for HM310P.
+    __slots__ = ("voltage", "current", "power", "timestamp")
 
-        Args:
-            portname (str): port name
-            slaveaddress (int): slave address in the range 1 to 247
+    def __init__(
+        self, voltage: float, current: float, power: float, timestamp: float
+    ) -> None:
+        self.voltage = voltage
+        self.current = current
+        self.power = power
+        self.timestamp = timestamp
+
+    def __repr__(self) -> str:
+        return (
+            f"OutputSnapshot(voltage={self.voltage}, current={self.current}, "
+            f"power={self.power}, timestamp={self.timestamp})"
+        )
 
-        """
-        minimalmodbus.Instrument.__init__(self, portname, slaveaddress)
 
-        #: address of device, default is 1
-        self.unit_id: int = slaveaddress
-        #: used modbus transistion mode
-        self.method: str = minimalmodbus.MODE_RTU
-        #: baudrate
-        self.baudrate: int = 9600
-        #: bytesize
-        self.bytesize: int = 8
-        #: startbits
-        self.startbits: int = 1
-        #: stopbits
-        self.stopbits: int = 1
-        #: parity
-        self.parity: str = serial.PARITY_NONE
-        #: parity
-        self.number_of_channels: int = 6
-        #: timeout
-        self.timeout: float = 0.25
-        #: used serial port or device file respectivily
-        self.port: str = portname
+class HM3xxpLayout:
+    """Register layout, limits and scaling shared by the HM3xxP drivers.
+
+    The class performs no I/O. Drivers call _init_layout() from their
+    constructor and _apply_identity() once model and decimals are known.
 
+    """
+
+    def _init_layout(self) -> None:
+        """Initializes channel map, limits and decimal places."""
         self._channel_map = {
             "Info": {
                 "pswitch": Reg.PS_PowerSwitch,
@@ -181,23 +191,16 @@ class HM310P(minimalmodbus.Instrument):
         self.max_decimal_nums: int = 0
         self.min_decimal_nums: int = 0
 
-        self.serial.baudrate = self.baudrate
-        self.serial.startbits = self.startbits
-        self.serial.stopbits = self.stopbits
-        self.serial.parity = serial.PARITY_NONE
-        self.serial.bytesize = self.bytesize
-        self.serial.timeout = self.timeout
-        self.close_port_after_each_call = False
-
-        # get model
-        self.model: int = self.get_model()
+    def _apply_identity(self, identity: DeviceIdentity) -> None:
+        """Derives limits and decimal places from device identity."""
+        self.model: int = identity.model
+        self.class_detail: int = identity.class_detail
         if self.model == 3010:  # model HM310p
             self.max_current = 10.000
         else:
             self.max_current = 5.000
 
-        # init member variables
-        tmp_decimals = self.get_decimals()
+        tmp_decimals = identity.decimals
 
         minimalmodbus._check_int(tmp_decimals)
 
@@ -220,9 +223,299 @@ class HM310P(minimalmodbus.Instrument):
             ]
         )
 
+    def _output_block(self) -> Tuple[int, int]:
+        """Returns first register and register count of the output block."""
+        first = self._lookup_register_value("Output", "v")
+        last = self._lookup_register_value("Output", "pc")
+        return first, last - first + 1
+
+    def _decode_output_block(self, regs: List[int]) -> OutputSnapshot:
+        """Decodes registers read from _output_block()."""
+        timestamp = time.time()
+        first = Reg.PS_Voltage
+        power = (regs[Reg.PS_PowerH - first] << 16) | regs[Reg.PS_PowerL - first]
+        return OutputSnapshot(
+            regs[Reg.PS_Voltage - first] / 10 ** self.number_of_decimals_voltage,
+            regs[Reg.PS_Current - first] / 10 ** self.number_of_decimals_current,
+            power / 10 ** self.number_of_decimals_power,
+            timestamp,
+        )
+
+    @property
+    def channels(self) -> List[str]:
+        """Returns names of the channels in _channel_map."""
+        return list(self._channel_map)
+
+    def _channel_block(self, chan: str) -> Tuple[int, int]:
+        """Returns first register and register count of a channel."""
+        if chan not in self._channel_map:
+            raise KeyError(f"Invalid channel name {chan}")
+        addresses = [reg.value for reg in self._channel_map[chan].values()]
+        return min(addresses), max(addresses) - min(addresses) + 1
+
+    def _decode_channel_block(self, chan: str, regs: List[int]) -> Dict[str, float]:
+        """Decodes registers read from _channel_block().
+
+        Voltage and current are scaled by their decimal places, the power
+        words are joined into p. Other registers are returned unscaled.
+
+        """
+        first = self._channel_block(chan)[0]
+        channel = self._channel_map[chan]
+        raw = {key: regs[reg.value - first] for key, reg in channel.items()}
+        values: Dict[str, float] = {}
+        for key, value in raw.items():
+            if chan == "Info":
+                values[key] = value
+            elif key == "v":
+                values[key] = value / 10 ** self.number_of_decimals_voltage
+            elif key == "c":
+                values[key] = value / 10 ** self.number_of_decimals_current
+            elif key == "ph":
+                power = (value << 16) | raw["pl"]
+                values["p"] = power / 10 ** self.number_of_decimals_power
+            elif key != "pl":
+                values[key] = value
+        return values
+
+    def _check_channel(self, chan: str, chan_key: str) -> None:
+        """Checks if channel string is valid key in _channel_map."""
+        if chan not in self._channel_map:
+            raise KeyError(f"Invalid channel name {chan}")
+        if chan_key not in self._channel_map[chan]:
+            raise KeyError(f"Invalid channel property {chan_key}")
+
+    def _check_channel_list(self, channels: List[str]) -> None:
+        """Checks channels of set_voltage_and_current_of_channel_list()."""
+        valid_channels = [
+            "Output",
+            "Preset",
+            "Protection",
+            "M1",
+            "M2",
+            "M3",
+            "M4",
+            "M5",
+            "M6",
+        ]
+
+        if not all(item in valid_channels for item in channels):
+            raise ValueError("Invalid channel in paramter list.")
+
+    def _lookup_register_value(self, chan: str, chan_key: str) -> int:
+        self._check_channel(chan, chan_key)
+        return self._channel_map[chan][chan_key].value  # lookup of register value
+
+
+class HM310P(HM3xxpLayout, minimalmodbus.Instrument):
+    """The summary line for a class docstring should fit on one line.
+
+    If the class has public attributes, they may be documented here
+    in an ``Attributes`` section and follow the same formatting as a
+    function's ``Args`` section. Alternatively, attributes may be documented
+    inline with the attribute's declaration (see __init__ method below).
+
+    Properties created with the ``@property`` decorator should be documented
+    in the property's getter method.
+
+    Attributes:
+        attr1 (str): Description of `attr1`.
+        attr2 (:obj:`int`, optional): Description of `attr2`.
+
+    """
+
+    def __init__(
+        self,
+        portname: str,
+        slaveaddress: int,
+        identity_cache: Optional[IdentityCache] = None,
+        monitor: Optional[TransactionMonitor] = None,
+        baudrate: int = DEFAULT_BAUDRATE,
+        rto: Optional[RtoEstimator] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+    ) -> None:
+        """Instrument class for HM310P.
+
+        Args:
+            portname (str): port name
+            slaveaddress (int): slave address in the range 1 to 247
+            identity_cache (IdentityCache): optional cache of model and
+                decimals, skips probing the device on a hit
+            monitor (TransactionMonitor): optional receiver of one event
+                per Modbus transaction
+            baudrate (int): line rate configured on the device, one of
+                BAUDRATES, see hm310p_baudrate.detect_baudrate()
+            rto (RtoEstimator): response timeout policy, defaults to an
+                adaptive timeout between 10 ms and 250 ms on top of the line
+                time, RtoEstimator(0.25, 0.25) gives a fixed timeout
+            retry_policy (RetryPolicy): repetition of transient failures,
+                defaults to no repetitions
+
+        """
+        minimalmodbus.Instrument.__init__(self, portname, slaveaddress)
+
+        #: receiver of transaction events, None disables instrumentation
+        self.monitor: Optional[TransactionMonitor] = monitor
+
+        #: address of device, default is 1
+        self.unit_id: int = slaveaddress
+        #: used modbus transistion mode
+        self.method: str = minimalmodbus.MODE_RTU
+        #: baudrate
+        self.baudrate: int = baudrate
+        #: bytesize
+        self.bytesize: int = 8
+        #: startbits
+        self.startbits: int = 1
+        #: stopbits
+        self.stopbits: int = 1
+        #: parity
+        self.parity: str = serial.PARITY_NONE
+        #: parity
+        self.number_of_channels: int = 6
+        #: adaptive response timeout
+        self.rto: RtoEstimator = rto or RtoEstimator()
+        #: timeout
+        self.timeout: float = self.rto.timeout()
+        #: repetition of transient failures
+        self.retry_policy: RetryPolicy = retry_policy or RetryPolicy(retries=0)
+        #: failure and recovery counters
+        self.retry_statistics: RetryStatistics = RetryStatistics()
+        #: used serial port or device file respectivily
+        self.port: str = portname
+
+        self._init_layout()
+
+        self.serial.baudrate = self.baudrate
+        self.serial.startbits = self.startbits
+        self.serial.stopbits = self.stopbits
+        self.serial.parity = serial.PARITY_NONE
+        self.serial.bytesize = self.bytesize
+        self.serial.timeout = self.timeout
+        self.close_port_after_each_call = False
+
+        #: cache of model and decimals, None disables caching
+        self.identity_cache: Optional[IdentityCache] = identity_cache
+
+        identity = None
+        if identity_cache is not None and isinstance(portname, str):
+            identity = identity_cache.load(portname, slaveaddress)
+        if identity is None:
+            identity = self.probe_identity()
+            if identity_cache is not None and isinstance(portname, str):
+                identity_cache.store(portname, slaveaddress, identity)
+        self._apply_identity(identity)
+
         # info = self.read_registers(Reg.PS_PowerSwitch, 5)
         print(self)
 
+    def _perform_command(self, functioncode: int, payload_to_slave: Any) -> Any:
+        """Performs one transaction, repeating transient failures."""
+        request_class = classify_request(functioncode, payload_to_slave)
+        self.retry_statistics.transactions += 1
+        attempt = 0
+        while True:
+            try:
+                response = self._transact(functioncode, payload_to_slave, attempt)
+            except Exception as exc:
+                self.retry_statistics.count_failure(exc)
+                if not self.retry_policy.should_retry(attempt, request_class, exc):
+                    if attempt and self.retry_policy.retryable(request_class, exc):
+                        self.retry_statistics.exhausted += 1
+                    raise
+                time.sleep(self.retry_policy.delay(attempt))
+                self.retry_statistics.retries += 1
+                attempt += 1
+                continue
+            if attempt:
+                self.retry_statistics.recovered += 1
+            return response
+
+    def _communicate(self, request: Any, number_of_bytes_to_read: int) -> Any:
+        """Sends request and checks the CRC of the raw answer.
+
+        minimalmodbus reports a CRC mismatch as InvalidResponseError with a
+        message that differs between its versions. The raw frame is only
+        available here, so the driver raises ChecksumError itself.
+        """
+        answer = super()._communicate(request, number_of_bytes_to_read)
+        frame = answer.encode("latin-1") if isinstance(answer, str) else answer
+        if len(frame) >= 4:  # shorter answers are rejected by minimalmodbus
+            check_crc(bytes(frame))
+        return answer
+
+    def _transact(
+        self, functioncode: int, payload_to_slave: Any, attempt: int = 0
+    ) -> Any:
+        """Performs one attempt with adaptive timeout and reports it.
+
+        A repetition first drops a late response to the failed attempt, it
+        would be taken for the next one. Subclasses sharing the port call
+        this with the port held, so the flush cannot hit another slave.
+        """
+        if attempt:
+            self.serial.reset_input_buffer()
+        line_time = self._line_time(functioncode, payload_to_slave)
+        timeout = self.rto.timeout(line_time)
+        current = self.serial.timeout
+        # the setter reconfigures the port: increases are rounded up to half
+        # the tolerance, decreases smaller than the tolerance are ignored
+        if timeout > current or timeout < current - RECONFIGURE_TOLERANCE:
+            step = RECONFIGURE_TOLERANCE / 2
+            self.serial.timeout = math.ceil(timeout / step - 1e-9) * step
+        self.timeout = self.serial.timeout
+        response = None
+        outcome = OUTCOME_OK
+        start = time.perf_counter()
+        try:
+            response = super()._perform_command(functioncode, payload_to_slave)
+            return response
+        except Exception as exc:
+            outcome = classify_exception(exc)
+            raise
+        finally:
+            rtt = time.perf_counter() - start
+            if outcome == OUTCOME_OK:
+                self.rto.observe(rtt - line_time)
+            elif outcome == OUTCOME_TIMEOUT:
+                self.rto.backoff()
+            if self.monitor is not None:
+                self.monitor.publish(
+                    TransactionEvent.from_payloads(
+                        self.address,
+                        functioncode,
+                        payload_to_slave,
+                        response,
+                        rtt,
+                        outcome,
+                    )
+                )
+
+    def _line_time(self, functioncode: int, payload_to_slave: Any) -> float:
+        """Returns transmission time of request and expected response."""
+        payload = payload_to_slave
+        if isinstance(payload, str):
+            payload = payload.encode("latin-1")  # minimalmodbus 1.x
+        request = bytes([functioncode]) + bytes(payload)
+        try:
+            expected = response_length(request)
+        except (ValueError, struct.error):
+            expected = 0
+        return frame_time(len(request) + 3 + expected, self.serial.baudrate)
+
+    def probe_identity(self) -> DeviceIdentity:
+        """Reads model, class detail and decimals in one transaction."""
+        model, class_detail, decimals = self.read_registers(Reg.PS_Model.value, 3)
+        return DeviceIdentity(model, class_detail, decimals)
+
+    def refresh_identity(self) -> DeviceIdentity:
+        """Probes the device again and updates the identity cache."""
+        identity = self.probe_identity()
+        if self.identity_cache is not None and isinstance(self.port, str):
+            self.identity_cache.store(self.port, self.address, identity)
+        self._apply_identity(identity)
+        return identity
+
     def set_voltage(self, value: float, channel: str = "Preset") -> None:
         """Sets voltage value."""
         register = self._lookup_register_value(channel, "v")
@@ -262,24 +555,21 @@ class HM310P(minimalmodbus.Instrument):
         register = self._lookup_register_value(channel, "ph")
         return self.read_long(register) / 10 ** self.number_of_decimals_power
 
+    def read_output_snapshot(self) -> OutputSnapshot:
+        """Returns output voltage, current and power from one block read."""
+        first, count = self._output_block()
+        return self._decode_output_block(self.read_registers(first, count))
+
+    def read_channel(self, chan: str) -> Dict[str, float]:
+        """Returns all registers of a channel from one block read."""
+        first, count = self._channel_block(chan)
+        return self._decode_channel_block(chan, self.read_registers(first, count))
+
     def set_voltage_and_current_of_channel_list(
         self, channels: List, voltage: float, current: float
     ) -> None:
         """Sets voltage and current valus for channel list."""
-        valid_channels = [
-            "Output",
-            "Preset",
-            "Protection",
-            "M1",
-            "M2",
-            "M3",
-            "M4",
-            "M5",
-            "M6",
-        ]
-
-        if not all(item in valid_channels for item in channels):
-            raise ValueError("Invalid channel in paramter list.")
+        self._check_channel_list(channels)
 
         minimalmodbus._check_numerical(
             voltage, self.min_voltage, self.max_voltage, description="voltage value"
@@ -289,7 +579,7 @@ class HM310P(minimalmodbus.Instrument):
             current, self.min_current, self.max_current, description="current value"
         )
 
-        for chan in set(channels):
+        for chan in dict.fromkeys(channels):
             register = self._lookup_register_value(chan, "v")
             self.write_registers(
                 register,
@@ -349,10 +639,18 @@ class HM310P(minimalmodbus.Instrument):
         """Returns protect state."""
         return self.read_register(Reg.PS_ProtectStat.value)
 
+    def get_protection_flags(self) -> ProtectionFlag:
+        """Returns protect state decoded into tripped protections."""
+        return ProtectionFlag(self.get_protectstate() & PROTECTION_MASK)
+
     def get_model(self) -> int:
         """Returns model."""
         return self.read_register(Reg.PS_Model.value)
 
+    def get_class_detail(self) -> int:
+        """Returns class detail."""
+        return self.read_register(Reg.PS_ClassDetail.value)
+
     def get_decimals(self) -> int:
         """Returns decimals."""
         return self.read_register(Reg.PS_Decimals.value)
@@ -360,14 +658,3 @@ class HM310P(minimalmodbus.Instrument):
     def get_slave_address(self) -> int:
         """Returns decimals."""
         return self.read_register(Reg.PS_Device.value)
-
-    def _check_channel(self, chan: str, chan_key: str) -> None:
-        """Checks if channel string is valid key in _channel_map."""
-        if chan not in self._channel_map:
-            raise KeyError(f"Invalid channel name {chan}")
-        if chan_key not in self._channel_map[chan]:
-            raise KeyError(f"Invalid channel property {chan_key}")
-
-    def _lookup_register_value(self, chan: str, chan_key: str) -> int:
-        self._check_channel(chan, chan_key)
-        return self._channel_map[chan][chan_key].value  # lookup of register value
@@ -0,0 +1,383 @@
+# src/hm310p_cli/hm310p_async.py
+# -*- coding: utf-8 -*-
+"""Asyncio driver for Hanmatek HM3xxP power supplies.
+
+The serial port is operated in non-blocking mode and its file descriptor is
+watched by the event loop, so every Modbus transaction is awaitable and a
+single loop can drive many supplies on many ports concurrently. Transactions
+on the same port are serialized by the transport.
+
+Example:
+    Read the output of several supplies at once::
+
+        supplies = [await AsyncHM310P.open(port, 1) for port in ports]
+        snapshots = await asyncio.gather(
+            *(psu.read_output_snapshot() for psu in supplies)
+        )
+
+Note:
+    The transport relies on loop.add_reader() and therefore on a POSIX
+    serial device.
+
+"""
+import asyncio
+from typing import Any, Dict, List, Optional
+
+# third party imports
+import minimalmodbus
+import serial
+
+# project imports
+from hm310p_cli import hm310p_rtu as rtu
+from hm310p_cli.hm310p import HM3xxpLayout, OutputSnapshot
+from hm310p_cli.hm310p_cache import DeviceIdentity, IdentityCache
+from hm310p_cli.hm310p_constants import PowerState, PowerSupplyError
+from hm310p_cli.hm310p_regdefs import HM3xxpRegisters as Reg
+
+
+class AsyncSerialTransport:
+    """Non-blocking Modbus RTU transport on top of a pyserial port.
+
+    Args:
+        port (serial.Serial): opened serial port, switched to non-blocking mode
+        timeout (float): response timeout in seconds
+
+    """
+
+    def __init__(self, port: serial.Serial, timeout: float = 0.25) -> None:
+        self.serial: serial.Serial = port
+        self.serial.timeout = 0
+        self.timeout: float = timeout
+        self._loop = asyncio.get_running_loop()
+        self._lock = asyncio.Lock()
+        self._buffer = bytearray()
+        self._expected: int = 0
+        self._waiter: Optional["asyncio.Future[bytes]"] = None
+        self._loop.add_reader(self.serial.fileno(), self._on_readable)
+
+    @classmethod
+    async def open(
+        cls, portname: str, baudrate: int = 9600, timeout: float = 0.25
+    ) -> "AsyncSerialTransport":
+        """Opens portname with the HM3xxP line settings."""
+        port = serial.Serial(
+            portname,
+            baudrate=baudrate,
+            bytesize=serial.EIGHTBITS,
+            parity=serial.PARITY_NONE,
+            stopbits=serial.STOPBITS_ONE,
+            timeout=0,
+        )
+        return cls(port, timeout)
+
+    def close(self) -> None:
+        """Stops watching and closes the serial port."""
+        if self.serial.is_open:
+            self._loop.remove_reader(self.serial.fileno())
+            self.serial.close()
+
+    async def transact(self, slaveaddress: int, request_pdu: bytes) -> bytes:
+        """Sends a request and returns the payload of its response.
+
+        Args:
+            slaveaddress (int): address of the slave
+            request_pdu (bytes): protocol data unit of the request
+
+        Returns:
+            bytes: response payload after the function code
+
+        Raises:
+            NoResponseError: no complete response within timeout
+
+        """
+        response = await self.transact_frame(slaveaddress, request_pdu)
+        return rtu.parse_response(response, slaveaddress, request_pdu)
+
+    async def transact_frame(self, slaveaddress: int, request_pdu: bytes) -> bytes:
+        """Sends a request and returns the unchecked response frame.
+
+        Args:
+            slaveaddress (int): address of the slave
+            request_pdu (bytes): protocol data unit of the request
+
+        Returns:
+            bytes: complete response frame including address and CRC
+
+        Raises:
+            NoResponseError: no complete response within timeout
+
+        """
+        request = rtu.build_frame(slaveaddress, request_pdu)
+        async with self._lock:
+            self._buffer.clear()
+            self.serial.reset_input_buffer()
+            self._expected = rtu.response_length(request_pdu)
+            self._waiter = self._loop.create_future()
+            self.serial.write(request)
+            try:
+                response = await asyncio.wait_for(self._waiter, self.timeout)
+            except asyncio.TimeoutError:
+                raise minimalmodbus.NoResponseError(
+                    f"No response from slave {slaveaddress} within {self.timeout} s"
+                ) from None
+            finally:
+                self._waiter = None
+            await asyncio.sleep(rtu.silent_interval(self.serial.baudrate))
+        return response
+
+    def _on_readable(self) -> None:
+        data = self.serial.read(self.serial.in_waiting or 1)
+        if self._waiter is None or self._waiter.done():
+            return  # late or unsolicited bytes
+        self._buffer.extend(data)
+        expected = self._expected
+        if rtu.is_exception_frame(self._buffer):
+            expected = rtu.EXCEPTION_RESPONSE_LENGTH
+        if len(self._buffer) >= expected:
+            self._waiter.set_result(bytes(self._buffer[:expected]))
+
+
+class AsyncHM310P(HM3xxpLayout):
+    """Asyncio counterpart of :class:`~hm310p_cli.hm310p.HM310P`.
+
+    Instances are created with :meth:`open`, which probes model and decimals
+    unless they are found in the identity cache.
+
+    Args:
+        transport (AsyncSerialTransport): transport of the port
+        slaveaddress (int): slave address in the range 1 to 247
+
+    """
+
+    def __init__(self, transport: AsyncSerialTransport, slaveaddress: int) -> None:
+        self.transport: AsyncSerialTransport = transport
+        self.address: int = slaveaddress
+        self._init_layout()
+
+    @classmethod
+    async def open(
+        cls,
+        portname: str,
+        slaveaddress: int,
+        identity_cache: Optional[IdentityCache] = None,
+        baudrate: int = 9600,
+        timeout: float = 0.25,
+    ) -> "AsyncHM310P":
+        """Opens the port and identifies the power supply.
+
+        Args:
+            portname (str): port name
+            slaveaddress (int): slave address in the range 1 to 247
+            identity_cache (IdentityCache): optional cache of model and decimals
+            baudrate (int): line rate
+            timeout (float): response timeout in seconds
+
+        Returns:
+            AsyncHM310P: ready to use driver
+
+        """
+        transport = await AsyncSerialTransport.open(portname, baudrate, timeout)
+        psupply = cls(transport, slaveaddress)
+        # the cache does file I/O and looks up the USB serial number of the
+        # port, neither may block the event loop
+        loop = asyncio.get_running_loop()
+        identity = None
+        try:
+            if identity_cache is not None:
+                identity = await loop.run_in_executor(
+                    None, identity_cache.load, portname, slaveaddress
+                )
+            if identity is None:
+                identity = await psupply.probe_identity()
+                if identity_cache is not None:
+                    await loop.run_in_executor(
+                        None, identity_cache.store, portname, slaveaddress, identity
+                    )
+        except BaseException:
+            transport.close()
+            raise
+        psupply._apply_identity(identity)
+        return psupply
+
+    async def close(self) -> None:
+        """Closes the serial port."""
+        self.transport.close()
+
+    async def __aenter__(self) -> "AsyncHM310P":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def read_registers(self, registeraddress: int, count: int) -> List[int]:
+        """Reads count holding registers."""
+        payload = await self.transport.transact(
+            self.address, rtu.read_registers_pdu(registeraddress, count)
+        )
+        return rtu.decode_registers(payload)
+
+    async def read_register(
+        self, registeraddress: int, number_of_decimals: int = 0
+    ) -> float:
+        """Reads one register scaled by number_of_decimals."""
+        (value,) = await self.read_registers(registeraddress, 1)
+        if number_of_decimals == 0:
+            return value
+        return value / 10 ** number_of_decimals
+
+    async def write_registers(self, registeraddress: int, values: List[int]) -> None:
+        """Writes consecutive holding registers."""
+        await self.transport.transact(
+            self.address, rtu.write_registers_pdu(registeraddress, values)
+        )
+
+    async def write_register(
+        self, registeraddress: int, value: float, number_of_decimals: int = 0
+    ) -> None:
+        """Writes one register scaled by number_of_decimals."""
+        await self.write_registers(
+            registeraddress, [int(round(value * 10 ** number_of_decimals))]
+        )
+
+    async def probe_identity(self) -> DeviceIdentity:
+        """Reads model, class detail and decimals in one transaction."""
+        model, class_detail, decimals = await self.read_registers(
+            Reg.PS_Model.value, 3
+        )
+        return DeviceIdentity(model, class_detail, decimals)
+
+    async def read_output_snapshot(self) -> OutputSnapshot:
+        """Returns output voltage, current and power from one block read."""
+        first, count = self._output_block()
+        return self._decode_output_block(await self.read_registers(first, count))
+
+    async def read_channel(self, chan: str) -> Dict[str, float]:
+        """Returns all registers of a channel from one block read."""
+        first, count = self._channel_block(chan)
+        return self._decode_channel_block(chan, await self.read_registers(first, count))
+
+    async def set_voltage(self, value: float, channel: str = "Preset") -> None:
+        """Sets voltage value."""
+        register = self._lookup_register_value(channel, "v")
+        minimalmodbus._check_numerical(
+            value, self.min_voltage, self.max_voltage, description="voltage value"
+        )
+        await self.write_register(register, value, self.number_of_decimals_voltage)
+
+    async def get_voltage(self, channel: str = "Preset") -> float:
+        """Returns voltage value of channel."""
+        register = self._lookup_register_value(channel, "v")
+        return await self.read_register(register, self.number_of_decimals_voltage)
+
+    async def set_current(self, value: float, channel: str = "Preset") -> None:
+        """Sets maximum output current."""
+        register = self._lookup_register_value(channel, "c")
+        minimalmodbus._check_numerical(
+            value, self.min_current, self.max_current, description="current value"
+        )
+        await self.write_register(register, value, self.number_of_decimals_current)
+
+    async def get_current(self, channel: str = "Preset") -> float:
+        """Returns current value of channel."""
+        register = self._lookup_register_value(channel, "c")
+        return await self.read_register(register, self.number_of_decimals_current)
+
+    async def set_power(self, value: float, channel: str = "Protection") -> None:
+        """Sets power value."""
+        register = self._lookup_register_value(channel, "ph")
+        minimalmodbus._check_numerical(
+            value, self.min_power, self.max_power, description="power value"
+        )
+        raw = int(value * 10 ** self.number_of_decimals_power)
+        await self.write_registers(register, [raw >> 16, raw & 0xFFFF])
+
+    async def get_power(self, channel: str = "Output") -> float:
+        """Gets power value."""
+        register = self._lookup_register_value(channel, "ph")
+        high, low = await self.read_registers(register, 2)
+        return ((high << 16) | low) / 10 ** self.number_of_decimals_power
+
+    async def set_voltage_and_current_of_channel_list(
+        self, channels: List[str], voltage: float, current: float
+    ) -> None:
+        """Sets voltage and current values for channel list."""
+        self._check_channel_list(channels)
+        minimalmodbus._check_numerical(
+            voltage, self.min_voltage, self.max_voltage, description="voltage value"
+        )
+        minimalmodbus._check_numerical(
+            current, self.min_current, self.max_current, description="current value"
+        )
+        for chan in dict.fromkeys(channels):
+            await self.write_registers(
+                self._lookup_register_value(chan, "v"),
+                [
+                    int(voltage * 10 ** self.number_of_decimals_voltage),
+                    int(current * 10 ** self.number_of_decimals_current),
+                ],
+            )
+
+    async def get_powerstate(self) -> PowerState:
+        """Returns power state."""
+        return PowerState(await self.read_register(Reg.PS_PowerSwitch.value))
+
+    async def set_powerstate(self, state: PowerState) -> None:
+        """Sets power state."""
+        if state not in [PowerState.On, PowerState.Off]:
+            raise ValueError(repr(PowerSupplyError.ValueErrorPowerState))
+        await self.write_register(Reg.PS_PowerSwitch.value, state.value)
+
+    async def toggle_powerstate(self) -> None:
+        """Toggles On-Off State."""
+        state = await self.get_powerstate()
+        if state == PowerState.On:
+            await self.set_powerstate(PowerState.Off)
+        elif state == PowerState.Off:
+            await self.set_powerstate(PowerState.On)
+        else:
+            raise ValueError(repr(PowerSupplyError.ValueErrorPowerState))
+
+    async def set_ocp(self, cur: float) -> None:
+        """Sets over current protection."""
+        await self.set_current(cur, "Protection")
+
+    async def get_ocp(self) -> float:
+        """Returns over current protection."""
+        return await self.get_current("Protection")
+
+    async def set_ovp(self, vol: float) -> None:
+        """Sets over voltage protection."""
+        await self.set_voltage(vol, "Protection")
+
+    async def get_ovp(self) -> float:
+        """Returns over voltage protection."""
+        return await self.get_voltage("Protection")
+
+    async def set_opp(self, opp: float = None) -> None:
+        """Set over power protection."""
+        if opp is None:
+            opp = await self.get_voltage() * await self.get_current()
+        await self.set_power(opp, "Protection")
+
+    async def get_opp(self) -> float:
+        """Returns over power protection."""
+        return await self.get_power("Protection")
+
+    async def get_protectstate(self) -> int:
+        """Returns protect state."""
+        return await self.read_register(Reg.PS_ProtectStat.value)
+
+    async def get_memory(self, memory: str) -> List[float]:
+        """Returns voltage and current stored in memory M1 to M6."""
+        register = self._lookup_register_value(memory, "v")
+        voltage, current = await self.read_registers(register, 2)
+        return [
+            voltage / 10 ** self.number_of_decimals_voltage,
+            current / 10 ** self.number_of_decimals_current,
+        ]
+
+    async def set_memory(self, memory: str, voltage: float, current: float) -> None:
+        """Stores voltage and current in memory M1 to M6."""
+        if memory not in ["M1", "M2", "M3", "M4", "M5", "M6"]:
+            raise KeyError(f"Invalid memory name {memory}")
+        await self.set_voltage_and_current_of_channel_list([memory], voltage, current)
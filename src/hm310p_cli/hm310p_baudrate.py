@@ -0,0 +1,191 @@
+# src/hm310p_cli/hm310p_baudrate.py
+# -*- coding: utf-8 -*-
+"""Detection of the line rate configured on a power supply.
+
+The HM3xxP series answers at 9600, 19200, 38400, 57600 or 115200 Bd,
+selected on the front panel. A device addressed at the wrong rate receives
+garbage and stays silent, so the configured rate is found by reading
+PS_Model at every candidate rate with a short timeout. Each candidate is
+tried several times; the measured round-trip times give the throughput the
+unit achieves at that rate.
+
+Example:
+    Open a supply at whatever rate it is configured to::
+
+        cache = IdentityCache()
+        baudrate = detect_baudrate(port, 1, identity_cache=cache)
+        psupply = HM310P(port, 1, cache, baudrate=baudrate)
+
+"""
+import time
+from typing import Iterable, List, Optional
+
+# third party imports
+import minimalmodbus
+import serial
+
+# project imports
+from hm310p_cli import hm310p_rtu as rtu
+from hm310p_cli.hm310p_cache import IdentityCache
+from hm310p_cli.hm310p_constants import BAUDRATES
+from hm310p_cli.hm310p_regdefs import HM3xxpRegisters as Reg
+
+#: response timeout of a probe on top of the frame times in seconds
+DEFAULT_PROBE_TIMEOUT = 0.05
+
+#: probe transactions per candidate rate
+DEFAULT_PROBE_ATTEMPTS = 5
+
+
+class BaudrateResult:
+    """Outcome of probing one line rate.
+
+    Attributes:
+        baudrate (int): probed line rate
+        attempts (int): number of probe transactions
+        responses (int): number of valid responses
+        elapsed (float): accumulated round-trip time of the valid
+            responses in seconds
+
+    """
+
+    __slots__ = ("baudrate", "attempts", "responses", "elapsed")
+
+    def __init__(
+        self, baudrate: int, attempts: int, responses: int, elapsed: float
+    ) -> None:
+        self.baudrate = baudrate
+        self.attempts = attempts
+        self.responses = responses
+        self.elapsed = elapsed
+
+    @property
+    def reliable(self) -> bool:
+        """Returns True if every probe transaction succeeded."""
+        return self.attempts > 0 and self.responses == self.attempts
+
+    @property
+    def mean_rtt(self) -> float:
+        """Returns mean round-trip time of the valid responses in seconds."""
+        return self.elapsed / self.responses if self.responses else 0.0
+
+    @property
+    def tps(self) -> float:
+        """Returns achieved transactions per second."""
+        return self.responses / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"BaudrateResult(baudrate={self.baudrate}, "
+            f"responses={self.responses}/{self.attempts}, tps={self.tps:.1f})"
+        )
+
+
+def probe_baudrate(
+    portname: str,
+    slaveaddress: int,
+    baudrate: int,
+    attempts: int = DEFAULT_PROBE_ATTEMPTS,
+    timeout: float = DEFAULT_PROBE_TIMEOUT,
+) -> BaudrateResult:
+    """Reads PS_Model repeatedly at one line rate.
+
+    Args:
+        portname (str): serial device
+        slaveaddress (int): slave address in the range 1 to 247
+        baudrate (int): line rate to probe
+        attempts (int): number of probe transactions
+        timeout (float): response timeout on top of the frame times
+
+    Returns:
+        BaudrateResult: responses and round-trip times
+
+    """
+    pdu = rtu.read_registers_pdu(Reg.PS_Model.value, 1)
+    request = rtu.build_frame(slaveaddress, pdu)
+    length = rtu.response_length(pdu)
+    line_time = rtu.frame_time(len(request) + length, baudrate)
+    responses = 0
+    elapsed = 0.0
+    with serial.Serial(portname, baudrate, timeout=line_time + timeout) as port:
+        for _ in range(attempts):
+            port.reset_input_buffer()
+            start = time.perf_counter()
+            port.write(request)
+            frame = port.read(length)
+            rtt = time.perf_counter() - start
+            try:
+                rtu.parse_response(frame, slaveaddress, pdu)
+            except (IOError, ValueError):
+                time.sleep(rtu.silent_interval(baudrate))
+                continue
+            responses += 1
+            elapsed += rtt
+    return BaudrateResult(baudrate, attempts, responses, elapsed)
+
+
+def probe_baudrates(
+    portname: str,
+    slaveaddress: int,
+    candidates: Iterable[int] = BAUDRATES,
+    attempts: int = DEFAULT_PROBE_ATTEMPTS,
+    timeout: float = DEFAULT_PROBE_TIMEOUT,
+) -> List[BaudrateResult]:
+    """Probes every candidate rate, see probe_baudrate()."""
+    return [
+        probe_baudrate(portname, slaveaddress, rate, attempts, timeout)
+        for rate in candidates
+    ]
+
+
+def best_baudrate(results: Iterable[BaudrateResult]) -> Optional[int]:
+    """Returns the fastest reliable rate or None."""
+    rates = [result.baudrate for result in results if result.reliable]
+    return max(rates) if rates else None
+
+
+def detect_baudrate(
+    portname: str,
+    slaveaddress: int,
+    candidates: Iterable[int] = BAUDRATES,
+    attempts: int = DEFAULT_PROBE_ATTEMPTS,
+    timeout: float = DEFAULT_PROBE_TIMEOUT,
+    identity_cache: Optional[IdentityCache] = None,
+) -> int:
+    """Returns the line rate the device answers at.
+
+    A cached rate is confirmed with a single probe transaction, otherwise
+    all candidates are probed and the fastest reliable rate is cached.
+
+    Args:
+        portname (str): serial device
+        slaveaddress (int): slave address in the range 1 to 247
+        candidates (Iterable[int]): rates to try
+        attempts (int): probe transactions per candidate
+        timeout (float): response timeout on top of the frame times
+        identity_cache (IdentityCache): optional cache of the result
+
+    Returns:
+        int: detected line rate
+
+    Raises:
+        NoResponseError: no candidate rate answered reliably
+
+    """
+    candidates = list(candidates)
+    if identity_cache is not None:
+        cached = identity_cache.load_baudrate(portname, slaveaddress)
+        if cached in candidates and probe_baudrate(
+            portname, slaveaddress, cached, 1, timeout
+        ).reliable:
+            return cached
+    results = probe_baudrates(portname, slaveaddress, candidates, attempts, timeout)
+    baudrate = best_baudrate(results)
+    if baudrate is None:
+        raise minimalmodbus.NoResponseError(
+            f"No response from slave {slaveaddress} on {portname} at "
+            f"{', '.join(str(rate) for rate in candidates)} Bd"
+        )
+    if identity_cache is not None:
+        identity_cache.store_baudrate(portname, slaveaddress, baudrate)
+    return baudrate
@@ -0,0 +1,225 @@
+# src/hm310p_cli/hm310p_benchmark.py
+# -*- coding: utf-8 -*-
+"""Throughput and latency benchmark of the HM310P driver.
+
+Every public driver method, the constructor and the console "on" sequence
+are timed against a :class:`~hm310p_cli.hm310p_simulator.HM3xxPSimulator`
+with baud-accurate latency. Results are written as JSON; given a baseline
+file, the run fails if a median latency regressed beyond the tolerance.
+
+Example:
+    Run through nox or directly::
+
+        $ nox -s benchmark
+        $ python -m hm310p_cli.hm310p_benchmark -o new.json -B old.json
+
+"""
+import contextlib
+import io
+import json
+import platform
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+# third party imports
+import click
+import click.testing
+import minimalmodbus
+
+# project imports
+from hm310p_cli import __version__, console
+from hm310p_cli.hm310p import HM310P
+from hm310p_cli.hm310p_constants import PowerState
+from hm310p_cli.hm310p_simulator import HM3xxPSimulator
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Returns nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(fraction * len(sorted_values))))
+    return sorted_values[rank]
+
+
+def summarize(durations: List[float]) -> Dict[str, float]:
+    """Returns rate and latency percentiles of measured durations."""
+    values = sorted(durations)
+    total = sum(values)
+    return {
+        "iterations": len(values),
+        "tps": len(values) / total if total > 0 else 0.0,
+        "mean": total / len(values) if values else 0.0,
+        "p50": percentile(values, 0.50),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+    }
+
+
+def measure(func: Callable[[], Any], iterations: int) -> Dict[str, float]:
+    """Calls func iterations times and summarizes the durations."""
+    durations = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return summarize(durations)
+
+
+def method_cases(psupply: HM310P) -> List[Tuple[str, Callable[[], Any]]]:
+    """Returns one call per public driver method."""
+    return [
+        ("get_model", psupply.get_model),
+        ("get_class_detail", psupply.get_class_detail),
+        ("get_decimals", psupply.get_decimals),
+        ("get_slave_address", psupply.get_slave_address),
+        ("probe_identity", psupply.probe_identity),
+        ("get_protectstate", psupply.get_protectstate),
+        ("get_powerstate", psupply.get_powerstate),
+        ("set_powerstate", lambda: psupply.set_powerstate(PowerState.Off)),
+        ("toggle_powerstate", psupply.toggle_powerstate),
+        ("set_voltage", lambda: psupply.set_voltage(5.0)),
+        ("get_voltage", psupply.get_voltage),
+        ("set_current", lambda: psupply.set_current(1.0)),
+        ("get_current", psupply.get_current),
+        ("set_power", lambda: psupply.set_power(100.0)),
+        ("get_power", psupply.get_power),
+        ("read_output_snapshot", psupply.read_output_snapshot),
+        ("set_ovp", lambda: psupply.set_ovp(30.0)),
+        ("get_ovp", psupply.get_ovp),
+        ("set_ocp", lambda: psupply.set_ocp(5.0)),
+        ("get_ocp", psupply.get_ocp),
+        ("set_opp", lambda: psupply.set_opp(300.0)),
+        ("get_opp", psupply.get_opp),
+        (
+            "set_voltage_and_current_of_channel_list",
+            lambda: psupply.set_voltage_and_current_of_channel_list(
+                ["M1", "M2", "M3", "M4", "M5", "M6"], 5.0, 1.0
+            ),
+        ),
+    ]
+
+
+def run_benchmark(
+    iterations: int = 50, baudrate: int = 9600, latency: bool = True
+) -> Dict[str, Any]:
+    """Runs all benchmarks and returns the results.
+
+    Args:
+        iterations (int): repetitions per measurement
+        baudrate (int): simulated line rate
+        latency (bool): simulate line latency
+
+    Returns:
+        Dict[str, Any]: json serializable results
+
+    """
+    results: Dict[str, Any] = {
+        "meta": {
+            "version": __version__,
+            "python": platform.python_version(),
+            "minimalmodbus": minimalmodbus.__version__,
+            "baudrate": baudrate,
+            "latency": latency,
+            "iterations": iterations,
+            "timestamp": time.time(),
+        },
+        "methods": {},
+    }
+    quiet = contextlib.redirect_stdout(io.StringIO())
+    with HM3xxPSimulator(baudrate=baudrate, latency=latency) as sim, quiet:
+        psupply = HM310P(sim.port, 1, baudrate=baudrate)
+        for name, func in method_cases(psupply):
+            results["methods"][name] = measure(func, iterations)
+        psupply.serial.close()
+
+        def cold_start() -> None:
+            HM310P(sim.port, 1, baudrate=baudrate).serial.close()
+
+        results["cold_start"] = measure(cold_start, iterations)
+
+        runner = click.testing.CliRunner()
+        args = ["-p", sim.port, "-b", str(baudrate), "--no-cache"]
+        args += ["-s", "on", "-V", "5", "-I", "1"]
+
+        def console_on() -> None:
+            result = runner.invoke(console.main, args)
+            if result.exit_code != 0:
+                raise RuntimeError(result.output) from result.exception
+
+        results["console_on"] = measure(console_on, iterations)
+    return results
+
+
+def find_regressions(
+    results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float
+) -> List[str]:
+    """Returns descriptions of medians slower than baseline by tolerance."""
+    pairs = [("cold_start", results, baseline), ("console_on", results, baseline)]
+    pairs += [
+        (name, results["methods"], baseline.get("methods", {}))
+        for name in results["methods"]
+    ]
+    regressions = []
+    for name, new, old in pairs:
+        if name not in old or name not in new:
+            continue
+        if new[name]["p50"] > old[name]["p50"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p50 {new[name]['p50'] * 1e3:.3f} ms "
+                f"(baseline {old[name]['p50'] * 1e3:.3f} ms)"
+            )
+    return regressions
+
+
+@click.command()
+@click.option("-n", "--iterations", type=click.IntRange(1), default=50)
+@click.option("-b", "--baudrate", type=int, default=9600, help="Simulated line rate")
+@click.option("--latency/--no-latency", default=True, help="Simulate line latency")
+@click.option(
+    "-o", "--output", type=click.Path(dir_okay=False), default="benchmark.json"
+)
+@click.option(
+    "-B",
+    "--baseline",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Earlier results to compare against",
+)
+@click.option(
+    "-t",
+    "--tolerance",
+    type=click.FloatRange(0.0),
+    default=0.2,
+    help="Allowed relative p50 slowdown against the baseline",
+)
+def main(
+    iterations: int,
+    baudrate: int,
+    latency: bool,
+    output: str,
+    baseline: str,
+    tolerance: float,
+) -> None:
+    """Benchmarks the driver against the simulator."""
+    results = run_benchmark(iterations, baudrate, latency)
+    with open(output, "w", encoding="utf-8") as fobj:
+        json.dump(results, fobj, indent=2)
+    for name, stats in sorted(results["methods"].items()):
+        click.echo(
+            f"{name:40s} {stats['tps']:8.1f} tps  p50 {stats['p50'] * 1e3:8.3f} ms"
+            f"  p99 {stats['p99'] * 1e3:8.3f} ms"
+        )
+    for name in ("cold_start", "console_on"):
+        stats = results[name]
+        click.echo(f"{name:40s} p50 {stats['p50'] * 1e3:8.3f} ms")
+    if baseline:
+        with open(baseline, encoding="utf-8") as fobj:
+            regressions = find_regressions(results, json.load(fobj), tolerance)
+        for line in regressions:
+            click.secho(f"Regression {line}", fg="red", err=True)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()  # pragma: no cover
@@ -0,0 +1,282 @@
+# src/hm310p_cli/hm310p_bus.py
+# -*- coding: utf-8 -*-
+"""Several HM3xxP supplies daisy-chained on one RS-485 port.
+
+A :class:`HM310PBus` owns the serial port and hands out one
+:class:`BusDevice` per slave address. Every Modbus transaction of a device
+has to be granted by the bus scheduler first. The scheduler serves priority
+classes strictly in order (protection polling before control before bulk
+logging) and round-robins between the slaves of the same class, so a busy
+slave cannot starve its neighbours.
+
+Example:
+    Poll two supplies sharing one adapter::
+
+        with HM310PBus("/dev/ttyUSB0") as bus:
+            left = bus.device(1)
+            right = bus.device(2, BusPriority.Bulk)
+            left.read_output_snapshot(), right.read_output_snapshot()
+            print(bus.statistics())
+
+"""
+import threading
+import time
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, Optional
+
+# third party imports
+import minimalmodbus
+import serial
+
+# project imports
+from hm310p_cli.hm310p import HM310P
+from hm310p_cli.hm310p_cache import IdentityCache
+from hm310p_cli.hm310p_constants import BusPriority, DEFAULT_BAUDRATE
+from hm310p_cli.hm310p_metrics import TransactionMonitor
+
+
+class SlaveStatistics:
+    """Transaction statistics of one slave on the bus.
+
+    Attributes:
+        queue_depth (int): transactions currently waiting for the bus
+        transactions (int): completed transactions
+        total_wait (float): accumulated time spent waiting for the bus
+        total_latency (float): accumulated wait plus transaction time
+        max_latency (float): largest wait plus transaction time
+
+    """
+
+    __slots__ = (
+        "queue_depth",
+        "transactions",
+        "total_wait",
+        "total_latency",
+        "max_latency",
+    )
+
+    def __init__(self) -> None:
+        self.queue_depth: int = 0
+        self.transactions: int = 0
+        self.total_wait: float = 0.0
+        self.total_latency: float = 0.0
+        self.max_latency: float = 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        """Returns mean latency of completed transactions in seconds."""
+        if self.transactions == 0:
+            return 0.0
+        return self.total_latency / self.transactions
+
+    @property
+    def mean_wait(self) -> float:
+        """Returns mean time spent waiting for the bus in seconds."""
+        if self.transactions == 0:
+            return 0.0
+        return self.total_wait / self.transactions
+
+    def __repr__(self) -> str:
+        return (
+            f"SlaveStatistics(queue_depth={self.queue_depth}, "
+            f"transactions={self.transactions}, "
+            f"mean_wait={self.mean_wait:.6f}, "
+            f"mean_latency={self.mean_latency:.6f}, "
+            f"max_latency={self.max_latency:.6f})"
+        )
+
+
+class _Ticket:
+    __slots__ = ("granted",)
+
+    def __init__(self) -> None:
+        self.granted = False
+
+
+class FairScheduler:
+    """Grants exclusive bus access by priority, round-robin per slave."""
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition()
+        self._busy = False
+        self._queues: Dict[BusPriority, "OrderedDict[int, Deque[_Ticket]]"] = {
+            priority: OrderedDict() for priority in BusPriority
+        }
+
+    def acquire(self, slaveaddress: int, priority: BusPriority) -> None:
+        """Blocks until the bus is granted to the caller."""
+        with self._cond:
+            if not self._busy and not self._waiting():
+                self._busy = True
+                return
+            ticket = _Ticket()
+            self._queues[priority].setdefault(slaveaddress, deque()).append(ticket)
+            while not ticket.granted:
+                self._cond.wait()
+
+    def release(self) -> None:
+        """Releases the bus and grants it to the next waiting caller."""
+        with self._cond:
+            self._busy = False
+            for queue in self._queues.values():
+                for slaveaddress, tickets in queue.items():
+                    if not tickets:
+                        continue
+                    tickets.popleft().granted = True
+                    queue.move_to_end(slaveaddress)
+                    self._busy = True
+                    self._cond.notify_all()
+                    return
+
+    def pending(self, slaveaddress: Optional[int] = None) -> int:
+        """Returns number of waiting callers, optionally of one slave only."""
+        with self._cond:
+            return sum(
+                len(tickets)
+                for queue in self._queues.values()
+                for slave, tickets in queue.items()
+                if slaveaddress is None or slave == slaveaddress
+            )
+
+    def _waiting(self) -> bool:
+        return any(
+            tickets for queue in self._queues.values() for tickets in queue.values()
+        )
+
+
+class HM310PBus:
+    """Owner of one serial port shared by several slave addresses.
+
+    Args:
+        portname (str): serial device
+        timeout (float): response timeout in seconds
+        monitor (TransactionMonitor): optional receiver of the transaction
+            events of all devices on the bus
+        baudrate (int): line rate shared by all devices on the bus, one of
+            BAUDRATES
+
+    """
+
+    def __init__(
+        self,
+        portname: str,
+        timeout: float = 0.25,
+        monitor: Optional[TransactionMonitor] = None,
+        baudrate: int = DEFAULT_BAUDRATE,
+    ) -> None:
+        self.portname: str = portname
+        self.monitor: Optional[TransactionMonitor] = monitor
+        self.baudrate: int = baudrate
+        self.serial: serial.Serial = serial.Serial(
+            portname,
+            baudrate=baudrate,
+            bytesize=serial.EIGHTBITS,
+            parity=serial.PARITY_NONE,
+            stopbits=serial.STOPBITS_ONE,
+            timeout=timeout,
+        )
+        # every minimalmodbus instrument on portname reuses this handle
+        minimalmodbus._serialports[portname] = self.serial
+        self.scheduler: FairScheduler = FairScheduler()
+        self._lock = threading.Lock()
+        self._statistics: Dict[int, SlaveStatistics] = {}
+
+    def device(
+        self,
+        slaveaddress: int,
+        priority: BusPriority = BusPriority.Control,
+        identity_cache: Optional[IdentityCache] = None,
+    ) -> "BusDevice":
+        """Returns a driver for slaveaddress that shares the bus.
+
+        Args:
+            slaveaddress (int): slave address in the range 1 to 247
+            priority (BusPriority): scheduling class of the transactions
+            identity_cache (IdentityCache): optional cache of model and decimals
+
+        Returns:
+            BusDevice: driver bound to this bus
+
+        """
+        return BusDevice(self, slaveaddress, priority, identity_cache)
+
+    @contextmanager
+    def transaction(self, slaveaddress: int, priority: BusPriority) -> Iterator[None]:
+        """Context holding the bus for one transaction of slaveaddress."""
+        stats = self._slave_statistics(slaveaddress)
+        with self._lock:
+            stats.queue_depth += 1
+        start = time.perf_counter()
+        self.scheduler.acquire(slaveaddress, priority)
+        granted = time.perf_counter()
+        with self._lock:
+            stats.queue_depth -= 1
+        try:
+            yield
+        finally:
+            self.scheduler.release()
+            latency = time.perf_counter() - start
+            with self._lock:
+                stats.transactions += 1
+                stats.total_wait += granted - start
+                stats.total_latency += latency
+                stats.max_latency = max(stats.max_latency, latency)
+
+    def statistics(self) -> Dict[int, SlaveStatistics]:
+        """Returns statistics per slave address."""
+        with self._lock:
+            return dict(self._statistics)
+
+    def close(self) -> None:
+        """Closes the serial port."""
+        if minimalmodbus._serialports.get(self.portname) is self.serial:
+            del minimalmodbus._serialports[self.portname]
+        self.serial.close()
+
+    def __enter__(self) -> "HM310PBus":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _slave_statistics(self, slaveaddress: int) -> SlaveStatistics:
+        with self._lock:
+            return self._statistics.setdefault(slaveaddress, SlaveStatistics())
+
+
+class BusDevice(HM310P):
+    """HM310P whose transactions are scheduled by a :class:`HM310PBus`.
+
+    Args:
+        bus (HM310PBus): bus owning the serial port
+        slaveaddress (int): slave address in the range 1 to 247
+        priority (BusPriority): scheduling class of the transactions
+        identity_cache (IdentityCache): optional cache of model and decimals
+
+    """
+
+    def __init__(
+        self,
+        bus: HM310PBus,
+        slaveaddress: int,
+        priority: BusPriority = BusPriority.Control,
+        identity_cache: Optional[IdentityCache] = None,
+    ) -> None:
+        #: bus owning the serial port
+        self.bus: HM310PBus = bus
+        #: scheduling class of the transactions
+        self.priority: BusPriority = priority
+        # the devices of a bus share its line rate, a different one would
+        # reconfigure the port under the other devices
+        HM310P.__init__(
+            self, bus.portname, slaveaddress, identity_cache, bus.monitor, bus.baudrate
+        )
+
+    def _transact(
+        self, functioncode: int, payload_to_slave: Any, attempt: int = 0
+    ) -> Any:
+        # the bus is released between repetitions of a failed transaction,
+        # the input flush of a repetition runs inside the attempt
+        with self.bus.transaction(self.address, self.priority):
+            return super()._transact(functioncode, payload_to_slave, attempt)
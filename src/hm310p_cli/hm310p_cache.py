@@ -0,0 +1,197 @@
+# src/hm310p_cli/hm310p_cache.py
+# -*- coding: utf-8 -*-
+"""Persistent cache of power supply identities.
+
+Opening an :class:`~hm310p_cli.hm310p.HM310P` probes the model, class detail
+and decimal layout of the device. These values never change for a given
+unit, so they are cached on disk keyed by port path, slave address and the
+USB serial number of the adapter. A warm start therefore needs no probe
+transactions at all. The line rate found by baud-rate detection is kept in
+the same entry.
+
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+
+# third party imports
+from serial.tools import list_ports
+
+
+def default_cache_path() -> str:
+    """Returns the default location of the identity cache file."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "hm310p", "identity.json")
+
+
+def usb_serial_number(port: str) -> str:
+    """Returns the USB serial number of the adapter behind port.
+
+    Args:
+        port (str): serial device, symbolic links are resolved
+
+    Returns:
+        str: serial number or an empty string for non USB devices
+
+    """
+    realport = os.path.realpath(port)
+    for info in list_ports.comports():
+        if info.device in (port, realport):
+            return info.serial_number or ""
+    return ""
+
+
+class DeviceIdentity:
+    """Static identification values of a power supply.
+
+    Attributes:
+        model (int): content of PS_Model
+        class_detail (int): content of PS_ClassDetail
+        decimals (int): content of PS_Decimals
+
+    """
+
+    __slots__ = ("model", "class_detail", "decimals")
+
+    def __init__(self, model: int, class_detail: int, decimals: int) -> None:
+        self.model = model
+        self.class_detail = class_detail
+        self.decimals = decimals
+
+    def __repr__(self) -> str:
+        return (
+            f"DeviceIdentity(model={self.model}, "
+            f"class_detail={self.class_detail:#06x}, "
+            f"decimals={self.decimals:#06x})"
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, DeviceIdentity):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def to_dict(self) -> Dict[str, int]:
+        """Returns identity as json serializable dictionary."""
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DeviceIdentity":
+        """Creates identity from dictionary written by to_dict."""
+        return cls(
+            int(data["model"]), int(data["class_detail"]), int(data["decimals"])
+        )
+
+
+class IdentityCache:
+    """On-disk cache of device identities.
+
+    Args:
+        path (str): cache file, defaults to default_cache_path()
+        max_age (float): entries older than max_age seconds are ignored,
+            None keeps entries forever
+
+    """
+
+    def __init__(self, path: Optional[str] = None, max_age: float = None) -> None:
+        self.path: str = path or default_cache_path()
+        self.max_age: Optional[float] = max_age
+        # serializes read-modify-write cycles of threads sharing the cache
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(port: str, slaveaddress: int) -> str:
+        """Returns cache key of a device."""
+        return f"{port}|{slaveaddress}|{usb_serial_number(port)}"
+
+    def load(self, port: str, slaveaddress: int) -> Optional[DeviceIdentity]:
+        """Returns cached identity or None on a cache miss."""
+        entry = self._read().get(self.key(port, slaveaddress))
+        if entry is None:
+            return None
+        age = time.time() - entry.get("stored", 0)
+        if self.max_age is not None and age > self.max_age:
+            return None
+        try:
+            return DeviceIdentity.from_dict(entry)
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def store(self, port: str, slaveaddress: int, identity: DeviceIdentity) -> None:
+        """Stores identity of a device."""
+        key = self.key(port, slaveaddress)
+        entry: Dict[str, Any] = identity.to_dict()
+        entry["stored"] = time.time()
+        with self._lock:
+            entries = self._read()
+            if "baudrate" in entries.get(key, {}):
+                entry["baudrate"] = entries[key]["baudrate"]
+            entries[key] = entry
+            self._write(entries)
+
+    def load_baudrate(self, port: str, slaveaddress: int) -> Optional[int]:
+        """Returns cached line rate or None on a cache miss."""
+        entry = self._read().get(self.key(port, slaveaddress), {})
+        try:
+            return int(entry["baudrate"])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def store_baudrate(self, port: str, slaveaddress: int, baudrate: int) -> None:
+        """Stores the line rate of a device."""
+        key = self.key(port, slaveaddress)
+        with self._lock:
+            entries = self._read()
+            entries.setdefault(key, {})["baudrate"] = baudrate
+            self._write(entries)
+
+    def invalidate(
+        self, port: str, slaveaddress: int, keep_baudrate: bool = False
+    ) -> None:
+        """Removes the entry of a device.
+
+        Args:
+            port (str): serial device
+            slaveaddress (int): slave address
+            keep_baudrate (bool): remove model and decimals only, the next
+                open probes the device and stores them again
+
+        """
+        key = self.key(port, slaveaddress)
+        with self._lock:
+            entries = self._read()
+            entry = entries.pop(key, None)
+            if entry is None:
+                return
+            if keep_baudrate and "baudrate" in entry:
+                entries[key] = {"baudrate": entry["baudrate"]}
+            self._write(entries)
+
+    def clear(self) -> None:
+        """Removes all entries."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, encoding="utf-8") as fobj:
+                entries = json.load(fobj)
+        except (OSError, ValueError):
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    def _write(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmpname = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fobj:
+                json.dump(entries, fobj, indent=2, sort_keys=True)
+            os.replace(tmpname, self.path)
+        except BaseException:
+            os.unlink(tmpname)
+            raise
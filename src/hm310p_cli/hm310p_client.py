@@ -0,0 +1,111 @@
+# src/hm310p_cli/hm310p_client.py
+# -*- coding: utf-8 -*-
+"""Client of the resident daemon, see :mod:`hm310p_cli.hm310p_daemon`.
+
+The module depends on the standard library only, so thin clients start
+without loading the serial and Modbus stack.
+
+"""
+import json
+import os
+import socket
+import tempfile
+from typing import Any, Optional
+
+#: JSON-RPC error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+DEVICE_ERROR = -32000
+
+
+def default_socket_path() -> str:
+    """Returns the default location of the daemon socket."""
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime:
+        return os.path.join(runtime, "hm310p.sock")
+    return os.path.join(tempfile.gettempdir(), f"hm310p-{os.getuid()}.sock")
+
+
+class DaemonError(Exception):
+    """Error response of the daemon.
+
+    Args:
+        code (int): JSON-RPC error code
+        message (str): error description
+
+    """
+
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(message)
+        self.code: int = code
+
+
+class DaemonClient:
+    """Connection to a running daemon.
+
+    Args:
+        path (str): socket path, defaults to default_socket_path()
+        timeout (float): socket timeout in seconds
+
+    Raises:
+        OSError: no daemon listens on path
+
+    """
+
+    def __init__(self, path: Optional[str] = None, timeout: float = 10.0) -> None:
+        self.path: str = path or default_socket_path()
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        self._socket.connect(self.path)
+        self._file = self._socket.makefile("rwb")
+        self._next_id = 0
+
+    def call(self, method: str, **params: Any) -> Any:
+        """Performs one request and returns its result.
+
+        Args:
+            method (str): JSON-RPC method
+            params (Any): request parameters
+
+        Returns:
+            Any: result of the request
+
+        Raises:
+            DaemonError: error response of the daemon
+
+        """
+        self._next_id += 1
+        request = {"jsonrpc": "2.0", "id": self._next_id, "method": method}
+        if params:
+            request["params"] = params
+        self._file.write(json.dumps(request).encode("utf-8") + b"\n")
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise DaemonError(DEVICE_ERROR, "Daemon closed the connection")
+        response = json.loads(line.decode("utf-8"))
+        if "error" in response:
+            error = response["error"]
+            raise DaemonError(error["code"], error["message"])
+        return response["result"]
+
+    def device_call(
+        self, port: str, address: int, method: str, *args: Any, **kwargs: Any
+    ) -> Any:
+        """Calls a driver method of the device at port and address."""
+        return self.call(
+            method, port=port, address=address, args=list(args), kwargs=kwargs
+        )
+
+    def close(self) -> None:
+        """Closes the connection."""
+        self._file.close()
+        self._socket.close()
+
+    def __enter__(self) -> "DaemonClient":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -1,7 +1,7 @@
 # src/hm310p_cli/hm310p_constants.py
 # -*- coding: utf-8 -*-
 
-from enum import auto, Enum, IntEnum, unique
+from enum import auto, Enum, IntEnum, IntFlag, unique
 
 UNIT = 0x01
 
@@ -45,3 +45,36 @@ class PowerState(IntEnum):
     Off = 0x00
     On = 0x01
     Invalid = 0x02
+
+
+@unique
+class ProtectionFlag(IntFlag):
+    OVP = 0x01
+    OCP = 0x02
+    OPP = 0x04
+    OTP = 0x08
+    SCP = 0x10
+
+
+#: bits of PS_ProtectStat with a known meaning
+PROTECTION_MASK = sum(ProtectionFlag)
+
+
+@unique
+class BusPriority(IntEnum):
+    Protection = 0
+    Control = 1
+    Bulk = 2
+
+
+#: line rates supported by the HM3xxP series, slowest first
+BAUDRATES = (9600, 19200, 38400, 57600, 115200)
+
+#: factory setting of the line rate
+DEFAULT_BAUDRATE = 9600
+
+#: PS_Model values of the supported supplies
+MODEL_NAMES = {3010: "HM310P", 3005: "HM305P"}
+
+#: PS_ClassDetail reported by the HM3xxP series
+HM3XXP_CLASS_DETAIL = 0x4B58
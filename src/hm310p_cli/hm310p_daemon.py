@@ -0,0 +1,279 @@
+# src/hm310p_cli/hm310p_daemon.py
+# -*- coding: utf-8 -*-
+"""Resident daemon keeping power supplies open behind a Unix socket.
+
+Opening an :class:`~hm310p_cli.hm310p.HM310P` costs a process start, the
+port setup and an identity probe. The daemon opens every device once on
+first use and serves JSON-RPC 2.0 requests over a Unix domain socket, so a
+command issued by a script costs one bus transaction.
+
+Requests and responses are single JSON objects terminated by a newline. A
+connection may carry any number of requests. Driver calls name the device
+in their parameters::
+
+    {"jsonrpc": "2.0", "id": 1, "method": "get_voltage",
+     "params": {"port": "/dev/ttyUSB0", "address": 1, "args": ["Output"]}}
+
+Transactions on the same port are serialized, different ports are served
+in parallel. The client side lives in :mod:`hm310p_cli.hm310p_client`.
+
+"""
+import json
+import os
+import socket
+import socketserver
+import threading
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# project imports
+from hm310p_cli.hm310p import HM310P, OutputSnapshot
+from hm310p_cli.hm310p_cache import IdentityCache
+from hm310p_cli.hm310p_client import (
+    DaemonError,
+    default_socket_path,
+    DEVICE_ERROR,
+    INVALID_PARAMS,
+    INVALID_REQUEST,
+    METHOD_NOT_FOUND,
+    PARSE_ERROR,
+)
+from hm310p_cli.hm310p_constants import DEFAULT_BAUDRATE, PowerState
+from hm310p_cli.hm310p_plan import set_output_state
+from hm310p_cli.hm310p_retry import RetryPolicy
+
+#: driver methods callable through the daemon
+DRIVER_METHODS = frozenset(
+    [
+        "get_class_detail",
+        "get_current",
+        "get_decimals",
+        "get_model",
+        "get_ocp",
+        "get_opp",
+        "get_ovp",
+        "get_power",
+        "get_powerstate",
+        "get_protectstate",
+        "get_protection_flags",
+        "get_slave_address",
+        "get_voltage",
+        "read_channel",
+        "read_output_snapshot",
+        "set_current",
+        "set_ocp",
+        "set_opp",
+        "set_ovp",
+        "set_power",
+        "set_powerstate",
+        "set_voltage",
+        "toggle_powerstate",
+    ]
+)
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, OutputSnapshot):
+        return {slot: getattr(value, slot) for slot in value.__slots__}
+    return value
+
+
+class DeviceRegistry:
+    """Open drivers of the daemon, one per port and slave address.
+
+    Args:
+        identity_cache (IdentityCache): cache of model, decimals and line
+            rate, None disables caching
+        baudrate (int): line rate, None uses the cached rate or 9600
+        retries (int): repetitions of transient failures
+
+    """
+
+    def __init__(
+        self,
+        identity_cache: Optional[IdentityCache] = None,
+        baudrate: Optional[int] = None,
+        retries: int = 2,
+    ) -> None:
+        self.identity_cache: Optional[IdentityCache] = identity_cache
+        self.baudrate: Optional[int] = baudrate
+        self.retries: int = retries
+        self._devices: Dict[Tuple[str, int], HM310P] = {}
+        self._port_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def call(self, port: str, address: int, func: Callable[[HM310P], Any]) -> Any:
+        """Calls func with the driver of port and address on the locked port."""
+        with self._lock:
+            port_lock = self._port_locks.setdefault(port, threading.Lock())
+        with port_lock:
+            return func(self._device(port, address))
+
+    def devices(self) -> List[Dict[str, Any]]:
+        """Returns port, address and model of the open drivers."""
+        with self._lock:
+            return [
+                {"port": port, "address": address, "model": device.model}
+                for (port, address), device in sorted(self._devices.items())
+            ]
+
+    def close(self, port: Optional[str] = None) -> None:
+        """Closes the drivers of port, or all drivers.
+
+        Each port is closed with its lock held, so a transaction running on
+        it completes first.
+        """
+        with self._lock:
+            port_locks = [
+                (name, lock)
+                for name, lock in self._port_locks.items()
+                if port in (None, name)
+            ]
+        for name, port_lock in port_locks:
+            # _device() takes self._lock with the port lock held, so the
+            # port lock is never awaited while holding self._lock
+            with port_lock:
+                with self._lock:
+                    keys = [k for k in self._devices if k[0] == name]
+                    devices = [self._devices.pop(k) for k in keys]
+                if devices:
+                    devices[0].serial.close()  # shared by the slaves of a port
+
+    def _device(self, port: str, address: int) -> HM310P:
+        # called with the port lock held, so a driver is opened only once
+        device = self._devices.get((port, address))
+        if device is None:
+            baudrate = self.baudrate
+            if baudrate is None and self.identity_cache is not None:
+                baudrate = self.identity_cache.load_baudrate(port, address)
+            device = HM310P(
+                port,
+                address,
+                self.identity_cache,
+                baudrate=baudrate or DEFAULT_BAUDRATE,
+                retry_policy=RetryPolicy(self.retries),
+            )
+            with self._lock:
+                self._devices[(port, address)] = device
+        return device
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    server: "HM310PDaemon"
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            response = self.server.dispatch(line)
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class HM310PDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """JSON-RPC server in front of a DeviceRegistry.
+
+    Args:
+        path (str): socket path, defaults to default_socket_path()
+        registry (DeviceRegistry): drivers to serve
+
+    Raises:
+        OSError: another daemon listens on path
+
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self, path: Optional[str] = None, registry: Optional[DeviceRegistry] = None
+    ) -> None:
+        self.path: str = path or default_socket_path()
+        self.registry: DeviceRegistry = registry or DeviceRegistry(IdentityCache())
+        self._remove_stale_socket()
+        # create the socket owner-only, a chmod() after bind() leaves a window
+        umask = os.umask(0o077)
+        try:
+            socketserver.UnixStreamServer.__init__(self, self.path, _RequestHandler)
+        finally:
+            os.umask(umask)
+
+    def dispatch(self, line: bytes) -> Dict[str, Any]:
+        """Returns the response object to one request line."""
+        try:
+            request = json.loads(line.decode("utf-8"))
+        except ValueError as exc:
+            return self._error(None, PARSE_ERROR, str(exc))
+        if not isinstance(request, dict) or not isinstance(
+            request.get("method"), str
+        ):
+            return self._error(None, INVALID_REQUEST, "Invalid request")
+        ident = request.get("id")
+        params = request.get("params", {})
+        if not isinstance(params, dict):
+            return self._error(ident, INVALID_PARAMS, "Params must be an object")
+        try:
+            result = self._execute(request["method"], params)
+        except DaemonError as exc:
+            return self._error(ident, exc.code, str(exc))
+        except (TypeError, ValueError, KeyError) as exc:
+            return self._error(ident, INVALID_PARAMS, str(exc))
+        except Exception as exc:
+            return self._error(ident, DEVICE_ERROR, f"{type(exc).__name__}: {exc}")
+        return {"jsonrpc": "2.0", "id": ident, "result": _jsonable(result)}
+
+    def server_close(self) -> None:
+        """Closes the socket and all drivers."""
+        socketserver.UnixStreamServer.server_close(self)
+        self.registry.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def _execute(self, method: str, params: Dict[str, Any]) -> Any:
+        if method == "ping":
+            return "pong"
+        if method == "devices":
+            return self.registry.devices()
+        if method == "close":
+            self.registry.close(params.get("port"))
+            return None
+        if method == "shutdown":
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return None
+        port = params["port"]
+        address = int(params.get("address", 1))
+        args = params.get("args", [])
+        kwargs = params.get("kwargs", {})
+        if method == "set_output_state":
+            return self.registry.call(
+                port, address, lambda dev: set_output_state(dev, *args, **kwargs)
+            )
+        if method not in DRIVER_METHODS:
+            raise DaemonError(METHOD_NOT_FOUND, f"Unknown method {method}")
+        if method == "set_powerstate":
+            args = [PowerState(args[0])] + list(args[1:])
+        return self.registry.call(
+            port, address, lambda dev: getattr(dev, method)(*args, **kwargs)
+        )
+
+    @staticmethod
+    def _error(ident: Any, code: int, message: str) -> Dict[str, Any]:
+        return {
+            "jsonrpc": "2.0",
+            "id": ident,
+            "error": {"code": code, "message": message},
+        }
+
+    def _remove_stale_socket(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.path)
+        except OSError:
+            os.unlink(self.path)  # left behind by a daemon that died
+        else:
+            raise OSError(f"Daemon already listening on {self.path}")
+        finally:
+            probe.close()
@@ -0,0 +1,223 @@
+# src/hm310p_cli/hm310p_fleet.py
+# -*- coding: utf-8 -*-
+"""Parallel operations on many supplies.
+
+A rack of supplies on separate USB adapters is independent hardware, yet
+configuring it one device after the other adds up the port setup, the
+identity probe and the transactions of every unit. :func:`run_on_devices`
+fans an action out on a bounded thread pool instead, so the wall time
+approaches that of the slowest device.
+
+Devices sharing a port (daisy-chained slave addresses) are handled one
+after the other by the same worker, because their transactions cannot
+overlap on the wire. A failing device records its exception in its
+:class:`DeviceResult` and does not affect the others.
+
+The devices usually come from an inventory file, see
+:mod:`hm310p_cli.hm310p_inventory`.
+
+Example:
+    Switch every supply of a rack to 5 V, 1 A::
+
+        report = run_on_devices(
+            load_inventory("rack1.json"),
+            lambda dev: set_output_state(dev, PowerState.On, 5.0, 1.0),
+            identity_cache=IdentityCache(),
+        )
+        for result in report.failed:
+            print(result.spec, result.error)
+
+"""
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+
+# third party imports
+import minimalmodbus
+
+# project imports
+from hm310p_cli.hm310p import HM310P
+from hm310p_cli.hm310p_cache import IdentityCache
+from hm310p_cli.hm310p_constants import DEFAULT_BAUDRATE
+from hm310p_cli.hm310p_inventory import DeviceSpec
+from hm310p_cli.hm310p_metrics import TransactionMonitor
+from hm310p_cli.hm310p_retry import RetryPolicy
+
+#: default number of ports served at the same time
+DEFAULT_WORKERS = 8
+
+
+class DeviceResult:
+    """Outcome of an action on one device.
+
+    Attributes:
+        spec (DeviceSpec): the device
+        result (Any): return value of the action, None on failure
+        error (BaseException): exception of the device, None on success
+        elapsed (float): time of opening and action in seconds
+
+    """
+
+    __slots__ = ("spec", "result", "error", "elapsed")
+
+    def __init__(
+        self,
+        spec: DeviceSpec,
+        result: Any,
+        error: Optional[BaseException],
+        elapsed: float,
+    ) -> None:
+        self.spec = spec
+        self.result = result
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def ok(self) -> bool:
+        """Returns True if the action succeeded."""
+        return self.error is None
+
+    def __repr__(self) -> str:
+        outcome = f"result={self.result!r}" if self.ok else f"error={self.error!r}"
+        return f"DeviceResult({self.spec}, {outcome}, elapsed={self.elapsed:.6f})"
+
+
+class FleetReport:
+    """Results of an action on many devices.
+
+    Attributes:
+        results (List[DeviceResult]): one result per device, in order of
+            the specs
+        elapsed (float): wall time of the whole run in seconds
+
+    """
+
+    def __init__(self, results: List[DeviceResult], elapsed: float) -> None:
+        self.results: List[DeviceResult] = results
+        self.elapsed: float = elapsed
+
+    @property
+    def succeeded(self) -> List[DeviceResult]:
+        """Returns results of the devices the action succeeded on."""
+        return [result for result in self.results if result.ok]
+
+    @property
+    def failed(self) -> List[DeviceResult]:
+        """Returns results of the devices the action failed on."""
+        return [result for result in self.results if not result.ok]
+
+    @property
+    def slowest(self) -> float:
+        """Returns the longest time spent on one device in seconds."""
+        return max((result.elapsed for result in self.results), default=0.0)
+
+    def __repr__(self) -> str:
+        return (
+            f"FleetReport(devices={len(self.results)}, "
+            f"failed={len(self.failed)}, elapsed={self.elapsed:.6f}, "
+            f"slowest={self.slowest:.6f})"
+        )
+
+
+def run_on_devices(
+    specs: List[DeviceSpec],
+    action: Callable[[HM310P], Any],
+    max_workers: int = DEFAULT_WORKERS,
+    identity_cache: Optional[IdentityCache] = None,
+    retries: int = 2,
+    keep_open: bool = False,
+) -> FleetReport:
+    """Opens every device and calls action with its driver.
+
+    Args:
+        specs (List[DeviceSpec]): devices, see load_inventory()
+        action (Callable[[HM310P], Any]): called once per device in a
+            worker thread
+        max_workers (int): number of ports served at the same time
+        identity_cache (IdentityCache): cache of model, decimals and line
+            rate, None probes every device
+        retries (int): repetitions of transient failures
+        keep_open (bool): leave the ports open, e.g. when action returns
+            the driver for later use
+
+    Returns:
+        FleetReport: per device results in order of specs
+
+    """
+    if max_workers < 1:
+        raise ValueError("At least one worker is needed.")
+    ports: "OrderedDict[str, List[int]]" = OrderedDict()
+    for index, spec in enumerate(specs):
+        ports.setdefault(spec.port, []).append(index)
+    results: List[Optional[DeviceResult]] = [None] * len(specs)
+
+    def serve_port(indices: List[int]) -> None:
+        portname = specs[indices[0]].port
+        registered = minimalmodbus._serialports.get(portname)
+        devices: List[HM310P] = []
+        try:
+            for index in indices:
+                spec = specs[index]
+                start = time.perf_counter()
+                try:
+                    psupply = open_device(spec, identity_cache, retries)
+                    devices.append(psupply)
+                    result = DeviceResult(spec, action(psupply), None, 0.0)
+                except Exception as exc:
+                    result = DeviceResult(spec, None, exc, 0.0)
+                result.elapsed = time.perf_counter() - start
+                results[index] = result
+        finally:
+            # the drivers of a port share one handle, minimalmodbus registers
+            # it before the identity probe, so a failed open leaves it behind
+            handle = minimalmodbus._serialports.get(portname)
+            if handle is not None and handle is not registered:
+                if not (keep_open and devices):
+                    del minimalmodbus._serialports[portname]
+                    handle.close()
+            for psupply in devices[: 0 if keep_open else 1]:
+                psupply.serial.close()
+
+    start = time.perf_counter()
+    if ports:
+        workers = min(max_workers, len(ports))
+        with ThreadPoolExecutor(workers, thread_name_prefix="hm310p-fleet") as pool:
+            for future in [pool.submit(serve_port, i) for i in ports.values()]:
+                future.result()
+    elapsed = time.perf_counter() - start
+    return FleetReport([result for result in results if result is not None], elapsed)
+
+
+def open_device(
+    spec: DeviceSpec,
+    identity_cache: Optional[IdentityCache] = None,
+    retries: int = 2,
+    monitor: Optional[TransactionMonitor] = None,
+) -> HM310P:
+    """Opens the driver of one device.
+
+    Args:
+        spec (DeviceSpec): the device, without line rate the cached rate
+            or 9600 Bd is used
+        identity_cache (IdentityCache): cache of model, decimals and line
+            rate, None probes the device
+        retries (int): repetitions of transient failures
+        monitor (TransactionMonitor): optional receiver of transaction
+            events
+
+    Returns:
+        HM310P: the driver
+
+    """
+    baudrate = spec.baudrate
+    if baudrate is None and identity_cache is not None:
+        baudrate = identity_cache.load_baudrate(spec.port, spec.address)
+    return HM310P(
+        spec.port,
+        spec.address,
+        identity_cache,
+        monitor,
+        baudrate or DEFAULT_BAUDRATE,
+        retry_policy=RetryPolicy(retries),
+    )
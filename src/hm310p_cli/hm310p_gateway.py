@@ -0,0 +1,260 @@
+# src/hm310p_cli/hm310p_gateway.py
+# -*- coding: utf-8 -*-
+"""Modbus TCP gateway in front of the RTU link of a power supply.
+
+Only one process can own the serial port. The gateway owns it and accepts
+any number of Modbus TCP clients, e.g. SCADA systems and lab tools at the
+same time. Their requests are checked against the
+:class:`~hm310p_cli.hm310p_regdefs.HM3xxpRegisters` address space, requests
+the device cannot serve are answered locally, and the rest is serialized
+onto the RTU link by an
+:class:`~hm310p_cli.hm310p_async.AsyncSerialTransport`.
+
+Reads within the output block PS_Voltage..PS_PowerCal are coalesced. The
+block is read as a whole, concurrent readers wait for the same serial
+transaction, and the values are reused for a short freshness window. A
+write to a slave invalidates its block.
+
+Example:
+    Serve the supply on localhost::
+
+        $ hm310p gateway -p /dev/ttyUSB0 --tcp-port 5020
+
+"""
+import asyncio
+import struct
+from typing import Dict, List, Optional, Tuple
+
+# third party imports
+import minimalmodbus
+import serial
+
+# project imports
+from hm310p_cli import hm310p_rtu as rtu
+from hm310p_cli.hm310p_async import AsyncSerialTransport
+from hm310p_cli.hm310p_regdefs import HM3xxpRegisters as Reg
+
+#: first register and size of the coalesced output block
+HOT_FIRST = Reg.PS_Voltage.value
+HOT_COUNT = Reg.PS_PowerCal.value - Reg.PS_Voltage.value + 1
+
+#: default freshness window of the output block in seconds
+DEFAULT_FRESHNESS = 0.02
+
+#: Modbus exception codes answered by the gateway
+ILLEGAL_FUNCTION = 0x01
+ILLEGAL_DATA_ADDRESS = 0x02
+ILLEGAL_DATA_VALUE = 0x03
+SLAVE_DEVICE_FAILURE = 0x04
+GATEWAY_TARGET_FAILED = 0x0B
+
+_MBAP = struct.Struct(">HHHB")
+_ADDRESSES = frozenset(int(reg) for reg in Reg)
+
+
+class GatewayStatistics:
+    """Request counters of a gateway.
+
+    Attributes:
+        requests (int): requests received from clients
+        local (int): requests answered without a serial transaction
+        serial (int): serial transactions performed
+        coalesced (int): output block reads served by a pending transaction
+        cached (int): output block reads served within the freshness window
+
+    """
+
+    __slots__ = ("requests", "local", "serial", "coalesced", "cached")
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.local = 0
+        self.serial = 0
+        self.coalesced = 0
+        self.cached = 0
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{s}={getattr(self, s)}" for s in self.__slots__)
+        return f"GatewayStatistics({fields})"
+
+
+def _exception_pdu(functioncode: int, code: int) -> bytes:
+    return bytes([functioncode | 0x80, code])
+
+
+class ModbusTcpGateway:
+    """Asyncio Modbus TCP server forwarding to one RTU transport.
+
+    Args:
+        transport (AsyncSerialTransport): owner of the serial port
+        default_slave (int): slave address used for unit id 0 and 255
+        freshness (float): reuse window of the output block in seconds, 0
+            still coalesces concurrent reads
+
+    """
+
+    def __init__(
+        self,
+        transport: AsyncSerialTransport,
+        default_slave: int = 1,
+        freshness: float = DEFAULT_FRESHNESS,
+    ) -> None:
+        self.transport: AsyncSerialTransport = transport
+        self.default_slave: int = default_slave
+        self.freshness: float = freshness
+        self.statistics: GatewayStatistics = GatewayStatistics()
+        self._hot: Dict[int, Tuple[float, bytes]] = {}
+        self._pending: Dict[int, "asyncio.Future[bytes]"] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 5020) -> None:
+        """Starts listening on host and port, 0 picks a free port."""
+        self._server = await asyncio.start_server(self._serve_client, host, port)
+
+    @property
+    def sockets(self) -> List[Tuple[str, int]]:
+        """Returns the listening addresses."""
+        if self._server is None:
+            return []
+        return [sock.getsockname()[:2] for sock in self._server.sockets]
+
+    async def close(self) -> None:
+        """Stops listening, the transport stays open."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def serve_forever(self) -> None:
+        """Serves until cancelled."""
+        if self._server is None:
+            raise RuntimeError("Gateway not started")
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def handle(self, unit: int, request_pdu: bytes) -> bytes:
+        """Returns the response pdu to a request pdu.
+
+        Args:
+            unit (int): unit identifier of the request
+            request_pdu (bytes): function code and request data
+
+        Returns:
+            bytes: response pdu, an exception pdu on errors
+
+        """
+        self.statistics.requests += 1
+        slave = self.default_slave if unit in (0, 255) else unit
+        error = self._validate(request_pdu)
+        if error is not None:
+            self.statistics.local += 1
+            return _exception_pdu(request_pdu[0] if request_pdu else 0, error)
+        functioncode = request_pdu[0]
+        if functioncode == rtu.READ_HOLDING_REGISTERS:
+            first, count = struct.unpack(">HH", request_pdu[1:5])
+            if HOT_FIRST <= first and first + count <= HOT_FIRST + HOT_COUNT:
+                response = await self._read_hot(slave)
+                if response[0] & 0x80:
+                    return response
+                offset = 2 + 2 * (first - HOT_FIRST)
+                data = response[offset : offset + 2 * count]
+                return bytes([functioncode, 2 * count]) + data
+        response = await self._forward(slave, request_pdu)
+        if functioncode != rtu.READ_HOLDING_REGISTERS:
+            # after the write, a block read pending meanwhile may be stale
+            self._hot.pop(slave, None)
+        return response
+
+    async def _forward(self, slave: int, request_pdu: bytes) -> bytes:
+        self.statistics.serial += 1
+        try:
+            frame = await self.transport.transact_frame(slave, request_pdu)
+        except (minimalmodbus.NoResponseError, serial.SerialException):
+            # a failing adapter is answered like a silent slave, the client
+            # connection stays usable
+            return _exception_pdu(request_pdu[0], GATEWAY_TARGET_FAILED)
+        try:
+            address, response = rtu.split_frame(frame)
+        except minimalmodbus.InvalidResponseError:
+            return _exception_pdu(request_pdu[0], SLAVE_DEVICE_FAILURE)
+        if address != slave or response[0] & 0x7F != request_pdu[0]:
+            return _exception_pdu(request_pdu[0], SLAVE_DEVICE_FAILURE)
+        return response
+
+    async def _read_hot(self, slave: int) -> bytes:
+        loop = asyncio.get_running_loop()
+        cached = self._hot.get(slave)
+        if cached is not None and loop.time() - cached[0] <= self.freshness:
+            self.statistics.cached += 1
+            return cached[1]
+        pending = self._pending.get(slave)
+        if pending is not None:
+            self.statistics.coalesced += 1
+            return await asyncio.shield(pending)
+        pending = loop.create_future()
+        self._pending[slave] = pending
+        try:
+            response = await self._forward(
+                slave, rtu.read_registers_pdu(HOT_FIRST, HOT_COUNT)
+            )
+            if not response[0] & 0x80:
+                self._hot[slave] = (loop.time(), response)
+            pending.set_result(response)
+        except BaseException as exc:
+            pending.set_exception(exc)
+            # coalesced readers get the exception through their shield, mark
+            # it retrieved in case there are none
+            pending.exception()
+            raise
+        finally:
+            del self._pending[slave]
+        return response
+
+    @staticmethod
+    def _validate(pdu: bytes) -> Optional[int]:
+        if not pdu:
+            return ILLEGAL_FUNCTION
+        functioncode = pdu[0]
+        if functioncode == rtu.READ_HOLDING_REGISTERS:
+            if len(pdu) != 5:
+                return ILLEGAL_DATA_VALUE
+            first, count = struct.unpack(">HH", pdu[1:5])
+            if not 1 <= count <= rtu.MAX_READ_REGISTERS:
+                return ILLEGAL_DATA_VALUE
+        elif functioncode == rtu.WRITE_SINGLE_REGISTER:
+            if len(pdu) != 5:
+                return ILLEGAL_DATA_VALUE
+            (first,) = struct.unpack(">H", pdu[1:3])
+            count = 1
+        elif functioncode == rtu.WRITE_MULTIPLE_REGISTERS:
+            if len(pdu) < 6:
+                return ILLEGAL_DATA_VALUE
+            first, count, bytecount = struct.unpack(">HHB", pdu[1:6])
+            valid = 1 <= count <= rtu.MAX_WRITE_REGISTERS and bytecount == 2 * count
+            if not valid or len(pdu) != 6 + bytecount:
+                return ILLEGAL_DATA_VALUE
+        else:
+            return ILLEGAL_FUNCTION
+        if not all(a in _ADDRESSES for a in range(first, first + count)):
+            return ILLEGAL_DATA_ADDRESS
+        return None
+
+    async def _serve_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                header = await reader.readexactly(_MBAP.size)
+                transaction, protocol, length, unit = _MBAP.unpack(header)
+                if protocol != 0 or not 2 <= length <= 254:
+                    break  # not Modbus, drop the connection
+                request = await reader.readexactly(length - 1)
+                response = await self.handle(unit, request)
+                writer.write(
+                    _MBAP.pack(transaction, 0, len(response) + 1, unit) + response
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,330 @@
+# src/hm310p_cli/hm310p_group.py
+# -*- coding: utf-8 -*-
+"""Synchronized power switching of several supplies.
+
+Switching supplies one after the other brings rails up one port open and
+a few transactions apart. :func:`switch_group` starts one thread per port
+instead. Each thread first stages its devices, e.g. writes protection
+limits and setpoints, and then waits at a barrier. Only the
+PS_PowerSwitch writes follow the barrier, so all ports send them at the
+same time. If staging fails on any device the barrier is broken and no
+supply is switched.
+
+The device applies the switch when the request has arrived, somewhere
+between the start and the return of its write. Every
+:class:`SwitchTiming` records both times, and the :class:`GroupReport`
+reports the spread of the start times as skew. Supplies sharing a port
+are switched one after the other by their thread, which adds about one
+transaction time per device to the skew.
+
+:func:`run_sequence` switches groups in order with defined delays between
+their releases, with all groups staged before the first release.
+
+Example:
+    Bring up the core rail 50 ms before both I/O rails::
+
+        reports = run_sequence(
+            [[core], [io_a, io_b]],
+            PowerState.On,
+            delays=0.05,
+            stage=lambda dev: stage_output_state(dev, 3.3, 1.0),
+        )
+        print([report.skew for report in reports])
+
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+# project imports
+from hm310p_cli.hm310p_constants import PowerState
+from hm310p_cli.hm310p_plan import plan_output_state
+
+#: default time to wait for staging before the group is aborted
+DEFAULT_TIMEOUT = 5.0
+
+
+class GroupAbortedError(RuntimeError):
+    """The device was not switched because its group was aborted."""
+
+
+class SwitchTiming:
+    """Switch write of one device.
+
+    Attributes:
+        device (Any): the driver
+        released (float): perf_counter time the write started, None if it
+            was not sent
+        completed (float): perf_counter time the write returned, None if it
+            was not sent
+        error (BaseException): exception of staging or switching, None on
+            success
+
+    """
+
+    __slots__ = ("device", "released", "completed", "error")
+
+    def __init__(self, device: Any) -> None:
+        self.device = device
+        self.released: Optional[float] = None
+        self.completed: Optional[float] = None
+        self.error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        """Returns True if the device was switched."""
+        return self.error is None and self.completed is not None
+
+    @property
+    def duration(self) -> float:
+        """Returns time of the switch write in seconds, 0 if not sent."""
+        if self.released is None or self.completed is None:
+            return 0.0
+        return self.completed - self.released
+
+    def __repr__(self) -> str:
+        device = f"{self.device.serial.port}:{self.device.address}"
+        if self.error is not None:
+            return f"SwitchTiming({device}, error={self.error!r})"
+        return f"SwitchTiming({device}, duration={self.duration:.6f})"
+
+
+class GroupReport:
+    """Timing of a group switch.
+
+    Attributes:
+        powerstate (PowerState): target state
+        timings (List[SwitchTiming]): one timing per device, in order of
+            the devices
+
+    """
+
+    def __init__(self, powerstate: PowerState, timings: List[SwitchTiming]) -> None:
+        self.powerstate: PowerState = powerstate
+        self.timings: List[SwitchTiming] = timings
+
+    @property
+    def ok(self) -> bool:
+        """Returns True if every device was switched."""
+        return all(timing.ok for timing in self.timings)
+
+    @property
+    def released(self) -> Optional[float]:
+        """Returns perf_counter time of the first switch write."""
+        starts = [t.released for t in self.timings if t.released is not None]
+        return min(starts) if starts else None
+
+    @property
+    def skew(self) -> float:
+        """Returns spread of the switch write starts in seconds."""
+        starts = [t.released for t in self.timings if t.ok]
+        return max(starts) - min(starts) if starts else 0.0
+
+    @property
+    def completion_skew(self) -> float:
+        """Returns spread of the switch write returns in seconds."""
+        ends = [t.completed for t in self.timings if t.ok]
+        return max(ends) - min(ends) if ends else 0.0
+
+    @property
+    def max_duration(self) -> float:
+        """Returns the longest switch write in seconds."""
+        return max((timing.duration for timing in self.timings), default=0.0)
+
+    def __repr__(self) -> str:
+        return (
+            f"GroupReport(powerstate={self.powerstate.name}, "
+            f"devices={len(self.timings)}, ok={self.ok}, skew={self.skew:.6f}, "
+            f"completion_skew={self.completion_skew:.6f}, "
+            f"max_duration={self.max_duration:.6f})"
+        )
+
+
+def stage_output_state(
+    psupply: Any,
+    voltage: Optional[float] = None,
+    current: Optional[float] = None,
+    ovp: Optional[float] = None,
+    ocp: Optional[float] = None,
+    opp: Optional[float] = None,
+) -> int:
+    """Writes protection limits and setpoints without switching.
+
+    Returns:
+        int: number of writes
+
+    """
+    plan = plan_output_state(psupply, PowerState.On, voltage, current, ovp, ocp, opp)
+    return len(plan.apply(psupply, ("protection", "setpoints")))
+
+
+def switch_group(
+    devices: Sequence[Any],
+    powerstate: PowerState,
+    stage: Optional[Callable[[Any], Any]] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    not_before: Optional[float] = None,
+) -> GroupReport:
+    """Switches devices at the same time.
+
+    Args:
+        devices (Sequence[Any]): HM310P drivers, none of them may be used
+            by another thread meanwhile
+        powerstate (PowerState): On or Off
+        stage (Callable[[Any], Any]): optional preparation of each device,
+            e.g. stage_output_state(), run before the barrier
+        timeout (float): time to wait for staging in seconds
+        not_before (float): perf_counter time before which the switch
+            writes are not released
+
+    Returns:
+        GroupReport: per device timing and errors
+
+    Raises:
+        ValueError: invalid power state
+
+    """
+    if powerstate not in (PowerState.On, PowerState.Off):
+        raise ValueError(f"Invalid power state {powerstate}")
+    timings = [SwitchTiming(device) for device in devices]
+    ports: Dict[str, List[SwitchTiming]] = OrderedDict()
+    for timing in timings:
+        ports.setdefault(timing.device.serial.port, []).append(timing)
+    # the caller is a party too and releases the group
+    barrier = threading.Barrier(len(ports) + 1)
+    hold = 0.0 if not_before is None else max(0.0, not_before - time.perf_counter())
+
+    def serve_port(port_timings: List[SwitchTiming]) -> None:
+        if stage is not None:
+            for timing in port_timings:
+                try:
+                    stage(timing.device)
+                except Exception as exc:
+                    timing.error = exc
+                    barrier.abort()
+                    return
+        try:
+            barrier.wait(timeout + hold)
+        except threading.BrokenBarrierError:
+            return
+        for timing in port_timings:
+            timing.released = time.perf_counter()
+            try:
+                timing.device.set_powerstate(powerstate)
+            except Exception as exc:
+                timing.error = exc
+            timing.completed = time.perf_counter()
+
+    threads = [
+        threading.Thread(
+            target=serve_port, args=(port_timings,), name="hm310p-group", daemon=True
+        )
+        for port_timings in ports.values()
+    ]
+    for thread in threads:
+        thread.start()
+    if not_before is not None:
+        remaining = not_before - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
+    try:
+        barrier.wait(timeout)
+    except threading.BrokenBarrierError:
+        pass
+    for thread in threads:
+        thread.join()
+    for timing in timings:
+        if timing.released is None and timing.error is None:
+            timing.error = GroupAbortedError("Group aborted before switching")
+    return GroupReport(powerstate, timings)
+
+
+def run_sequence(
+    groups: Sequence[Sequence[Any]],
+    powerstate: PowerState,
+    delays: Union[float, Sequence[float]] = 0.0,
+    stage: Optional[Callable[[Any], Any]] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> List[GroupReport]:
+    """Switches groups one after the other.
+
+    All devices of all groups are staged in parallel first. Group k + 1 is
+    released delays[k] seconds after the first switch write of group k.
+    The sequence stops at the first group that is not switched completely,
+    so later rails never come up without their predecessors.
+
+    Args:
+        groups (Sequence[Sequence[Any]]): devices per group in switching
+            order, devices on one port must be in the same group
+        powerstate (PowerState): On or Off
+        delays (Union[float, Sequence[float]]): time between the releases
+            of consecutive groups in seconds, one value for all gaps or one
+            per gap
+        stage (Callable[[Any], Any]): optional preparation of each device
+        timeout (float): time to wait for staging in seconds
+
+    Returns:
+        List[GroupReport]: reports of the groups switched or attempted, one
+        per group with the staging errors if staging failed
+
+    Raises:
+        ValueError: number of delays does not match the groups
+
+    """
+    if isinstance(delays, (int, float)):
+        gaps = [float(delays)] * max(len(groups) - 1, 0)
+    else:
+        gaps = [float(delay) for delay in delays]
+    if len(gaps) != max(len(groups) - 1, 0):
+        raise ValueError(f"Expected {len(groups) - 1} delays, got {len(gaps)}")
+    if stage is not None:
+        failed = _stage_all([device for group in groups for device in group], stage)
+        if failed:
+            reports = []
+            for group in groups:
+                timings = [SwitchTiming(device) for device in group]
+                for timing in timings:
+                    timing.error = failed.get(id(timing.device)) or GroupAbortedError(
+                        "Staging failed on another device"
+                    )
+                reports.append(GroupReport(powerstate, timings))
+            return reports
+    reports: List[GroupReport] = []
+    not_before = None
+    for index, group in enumerate(groups):
+        report = switch_group(group, powerstate, None, timeout, not_before)
+        reports.append(report)
+        if not report.ok or report.released is None:
+            break
+        if index < len(gaps):
+            not_before = report.released + gaps[index]
+    return reports
+
+
+def _stage_all(
+    devices: List[Any], stage: Callable[[Any], Any]
+) -> Dict[int, BaseException]:
+    ports: Dict[str, List[Any]] = OrderedDict()
+    for device in devices:
+        ports.setdefault(device.serial.port, []).append(device)
+    errors: Dict[int, BaseException] = {}
+
+    def serve_port(port_devices: List[Any]) -> None:
+        for device in port_devices:
+            try:
+                stage(device)
+            except Exception as exc:
+                errors[id(device)] = exc
+
+    threads = [
+        threading.Thread(
+            target=serve_port, args=(port_devices,), name="hm310p-stage", daemon=True
+        )
+        for port_devices in ports.values()
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
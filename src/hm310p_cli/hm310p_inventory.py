@@ -0,0 +1,124 @@
+# src/hm310p_cli/hm310p_inventory.py
+# -*- coding: utf-8 -*-
+"""Device lists for operations on many supplies.
+
+An inventory is a JSON file listing the devices::
+
+    {"devices": [
+        {"port": "/dev/ttyUSB0", "address": 1, "baudrate": 9600,
+         "name": "rack1-slot1"},
+        {"port": "/dev/ttyUSB1"}
+    ]}
+
+Only port is required, address defaults to 1 and a missing baudrate to
+the cached rate or 9600. The module needs the standard library only, so the
+command line interface can parse targets without loading the driver.
+
+"""
+import json
+import os
+import tempfile
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class DeviceSpec:
+    """Location of one supply.
+
+    Attributes:
+        port (str): serial device
+        address (int): slave address
+        baudrate (int): line rate, None uses the cached rate or 9600
+        name (str): optional label, e.g. the rack slot
+
+    """
+
+    __slots__ = ("port", "address", "baudrate", "name")
+
+    def __init__(
+        self,
+        port: str,
+        address: int = 1,
+        baudrate: Optional[int] = None,
+        name: Optional[str] = None,
+    ) -> None:
+        if not 1 <= address <= 247:
+            raise ValueError(f"Invalid slave address {address}")
+        self.port = port
+        self.address = address
+        self.baudrate = baudrate
+        self.name = name
+
+    @classmethod
+    def parse(cls, text: str) -> "DeviceSpec":
+        """Returns spec of PORT or PORT:ADDRESS, e.g. /dev/ttyUSB0:2."""
+        port, sep, address = text.rpartition(":")
+        if sep and port and address.isdigit():
+            return cls(port, int(address))
+        return cls(text)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DeviceSpec":
+        """Returns spec of an inventory entry."""
+        baudrate = data.get("baudrate")
+        return cls(
+            str(data["port"]),
+            int(data.get("address", 1)),
+            None if baudrate is None else int(baudrate),
+            data.get("name"),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns inventory entry of the spec."""
+        data: Dict[str, Any] = {"port": self.port, "address": self.address}
+        if self.baudrate is not None:
+            data["baudrate"] = self.baudrate
+        if self.name is not None:
+            data["name"] = self.name
+        return data
+
+    def __str__(self) -> str:
+        label = f"{self.port}:{self.address}"
+        return label if self.name is None else f"{self.name} ({label})"
+
+    def __repr__(self) -> str:
+        return (
+            f"DeviceSpec(port={self.port!r}, address={self.address}, "
+            f"baudrate={self.baudrate}, name={self.name!r})"
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, DeviceSpec):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+
+def load_inventory(path: str) -> List[DeviceSpec]:
+    """Returns the devices of an inventory file.
+
+    Raises:
+        ValueError: malformed inventory
+
+    """
+    with open(path, encoding="utf-8") as fobj:
+        data = json.load(fobj)
+    entries = data.get("devices") if isinstance(data, dict) else data
+    if not isinstance(entries, list):
+        raise ValueError(f"{path}: expected a list of devices")
+    try:
+        return [DeviceSpec.from_dict(entry) for entry in entries]
+    except (KeyError, TypeError, ValueError) as exc:
+        raise ValueError(f"{path}: invalid device entry: {exc}")
+
+
+def write_inventory(path: str, specs: Iterable[DeviceSpec]) -> None:
+    """Writes an inventory file atomically."""
+    directory = os.path.dirname(path) or "."
+    fd, tmpname = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fobj:
+            json.dump({"devices": [spec.to_dict() for spec in specs]}, fobj, indent=2)
+            fobj.write("\n")
+        os.replace(tmpname, path)
+    except BaseException:
+        os.unlink(tmpname)
+        raise
@@ -0,0 +1,179 @@
+# src/hm310p_cli/hm310p_ivcurve.py
+# -*- coding: utf-8 -*-
+"""Current-voltage characterization of a device under test.
+
+The sweep steps the voltage setpoint through a profile with
+:func:`~hm310p_cli.hm310p_ramp.run_profile` and reads voltage, current and
+power of every step from one block read. The samples go straight into
+preallocated NumPy arrays, and all derived quantities are computed on whole
+arrays, so curves with thousands of points need no per-sample Python code
+after the sweep.
+
+Requires the optional NumPy dependency::
+
+    $ pip install hm310p-cli[analysis]
+
+Example:
+    Characterize a diode behind a series resistor::
+
+        curve = sweep_iv(psupply, linear_profile(0.0, 3.0, 301), 0.05)
+        knee = curve.knee()
+        curve.save("diode.npz")
+
+"""
+from typing import Any, Dict, List, Optional
+
+# third party imports
+import numpy as np
+
+# project imports
+from hm310p_cli.hm310p_ramp import RampStep, run_profile
+
+#: arrays stored by IVCurve.save()
+FIELDS = ("setpoint", "voltage", "current", "power", "time")
+
+
+class IVCurve:
+    """Measured points of a sweep.
+
+    Args:
+        setpoint (np.ndarray): voltage setpoints in Volt
+        voltage (np.ndarray): measured output voltage in Volt
+        current (np.ndarray): measured output current in Ampere
+        power (np.ndarray): measured output power in Watt
+        time (np.ndarray): monotonic start time of each write in seconds,
+            relative to the first one
+
+    """
+
+    def __init__(
+        self,
+        setpoint: np.ndarray,
+        voltage: np.ndarray,
+        current: np.ndarray,
+        power: np.ndarray,
+        time: np.ndarray,
+    ) -> None:
+        self.setpoint: np.ndarray = np.asarray(setpoint, dtype=np.float64)
+        self.voltage: np.ndarray = np.asarray(voltage, dtype=np.float64)
+        self.current: np.ndarray = np.asarray(current, dtype=np.float64)
+        self.power: np.ndarray = np.asarray(power, dtype=np.float64)
+        self.time: np.ndarray = np.asarray(time, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.voltage)
+
+    def computed_power(self) -> np.ndarray:
+        """Returns voltage times current, independent of PS_Power rounding."""
+        return self.voltage * self.current
+
+    def dynamic_resistance(self) -> np.ndarray:
+        """Returns dV/dI in Ohm, NaN where the current does not change.
+
+        Derivatives use central differences inside and one-sided
+        differences at both ends of the curve.
+
+        """
+        if len(self) < 2:
+            return np.full(len(self), np.nan)
+        dv = np.gradient(self.voltage)
+        di = np.gradient(self.current)
+        resistance = np.full(len(self), np.nan)
+        np.divide(dv, di, out=resistance, where=di != 0)
+        return resistance
+
+    def knee(self) -> Optional[int]:
+        """Returns index of the knee of the curve, None if there is none.
+
+        The knee is the point farthest from the straight line through the
+        first and the last point after scaling both axes to [0, 1]. For a
+        diode this is where conduction sets in.
+
+        """
+        if len(self) < 3:
+            return None
+        v_span = np.ptp(self.voltage)
+        i_span = np.ptp(self.current)
+        if v_span == 0 or i_span == 0:
+            return None
+        v = (self.voltage - self.voltage.min()) / v_span
+        i = (self.current - self.current.min()) / i_span
+        dx, dy = v[-1] - v[0], i[-1] - i[0]
+        distance = np.abs(dx * (i - i[0]) - dy * (v - v[0]))
+        index = int(np.argmax(distance))
+        if distance[index] == 0:
+            return None  # a straight line has no knee
+        return index
+
+    def summary(self) -> Dict[str, Any]:
+        """Returns point count, knee and maximum power."""
+        knee = self.knee()
+        peak = int(np.argmax(self.power)) if len(self) else None
+        return {
+            "points": len(self),
+            "knee_voltage": None if knee is None else float(self.voltage[knee]),
+            "knee_current": None if knee is None else float(self.current[knee]),
+            "max_power": None if peak is None else float(self.power[peak]),
+            "max_power_voltage": None if peak is None else float(self.voltage[peak]),
+        }
+
+    def save(self, path: str) -> None:
+        """Writes all arrays to a compressed .npz file."""
+        np.savez_compressed(path, **{name: getattr(self, name) for name in FIELDS})
+
+    @classmethod
+    def load(cls, path: str) -> "IVCurve":
+        """Reads a file written by save()."""
+        with np.load(path) as data:
+            return cls(*(data[name] for name in FIELDS))
+
+    def to_csv(self, path: str) -> None:
+        """Writes all arrays and the dynamic resistance as CSV."""
+        columns = [getattr(self, name) for name in FIELDS]
+        columns.append(self.dynamic_resistance())
+        np.savetxt(
+            path,
+            np.column_stack(columns),
+            delimiter=",",
+            header=",".join(FIELDS + ("resistance",)),
+            comments="",
+            fmt="%.6g",
+        )
+
+
+def sweep_iv(
+    psupply: Any, setpoints: List[float], period: float = 0.0, **kwargs: Any
+) -> IVCurve:
+    """Sweeps the voltage setpoint and records the output.
+
+    Args:
+        psupply (Any): HM310P driver, its output must be switched on
+        setpoints (List[float]): voltage profile, see hm310p_ramp
+        period (float): time between steps in seconds, gives the device
+            under test time to settle
+        kwargs (Any): further arguments of run_profile(), e.g. stop
+
+    Returns:
+        IVCurve: measured points, fewer than setpoints if stopped early
+
+    """
+    count = len(setpoints)
+    data = np.empty((len(FIELDS), count), dtype=np.float64)
+
+    def record(step: RampStep) -> None:
+        snapshot = step.snapshot
+        data[:, step.index] = (
+            step.setpoint,
+            snapshot.voltage,
+            snapshot.current,
+            snapshot.power,
+            step.deadline + step.error,  # actual start of the write
+        )
+
+    report = run_profile(
+        psupply, setpoints, period, "voltage", True, callback=record, **kwargs
+    )
+    data = data[:, : len(report.steps)]
+    if len(report.steps):
+        data[4] -= data[4, 0]
+    return IVCurve(*data)
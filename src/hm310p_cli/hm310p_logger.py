@@ -0,0 +1,266 @@
+# src/hm310p_cli/hm310p_logger.py
+# -*- coding: utf-8 -*-
+"""Continuous logging of the output register block.
+
+The poll loop reads one :class:`~hm310p_cli.hm310p.OutputSnapshot` per
+transaction and hands it to a bounded ring buffer. A writer thread drains
+the buffer to a CSV or binary file. When the disk falls behind the buffer
+drops samples instead of blocking, so file I/O never stalls the serial
+poll loop; the number of dropped samples is reported.
+
+The binary format starts with the 8 byte header ``b"HM3LOG\\x00\\x01"``
+followed by little endian records of a double timestamp and float32
+voltage, current and power.
+
+"""
+import struct
+import threading
+import time
+from typing import Any, BinaryIO, Iterator, List, Optional, TextIO
+
+# project imports
+from hm310p_cli.hm310p import OutputSnapshot
+
+#: header of binary log files
+BINARY_HEADER = b"HM3LOG\x00\x01"
+#: record layout of binary log files
+BINARY_RECORD = struct.Struct("<dfff")
+
+
+class SampleRingBuffer:
+    """Bounded single producer, single consumer ring buffer.
+
+    Args:
+        capacity (int): number of samples the buffer can hold
+
+    """
+
+    def __init__(self, capacity: int = 4096) -> None:
+        if capacity < 1:
+            raise ValueError("Capacity must be positive.")
+        self.capacity: int = capacity
+        #: samples rejected because the buffer was full
+        self.dropped: int = 0
+        self._slots: List[Any] = [None] * capacity
+        self._head = 0
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def put(self, sample: Any) -> bool:
+        """Appends sample without blocking, returns False if it was dropped."""
+        with self._cond:
+            if self._size == self.capacity:
+                self.dropped += 1
+                return False
+            self._slots[(self._head + self._size) % self.capacity] = sample
+            self._size += 1
+            self._cond.notify()
+            return True
+
+    def drain(self, timeout: Optional[float] = None) -> List[Any]:
+        """Removes and returns all buffered samples.
+
+        Args:
+            timeout (float): time to wait for the first sample, None waits
+                until a sample arrives or the buffer is closed
+
+        Returns:
+            List[Any]: samples in order of arrival, empty on timeout or close
+
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._size or self._closed, timeout)
+            batch = []
+            while self._size:
+                batch.append(self._slots[self._head])
+                self._slots[self._head] = None
+                self._head = (self._head + 1) % self.capacity
+                self._size -= 1
+            return batch
+
+    def close(self) -> None:
+        """Wakes up the consumer, which stops once the buffer is empty."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        """Returns True after close()."""
+        return self._closed
+
+    def __len__(self) -> int:
+        with self._cond:
+            return self._size
+
+
+class CsvSampleWriter:
+    """Writes snapshots as CSV lines."""
+
+    def __init__(self, stream: TextIO) -> None:
+        self.stream: TextIO = stream
+        self.stream.write("timestamp,voltage,current,power\n")
+
+    def write(self, samples: List[OutputSnapshot]) -> None:
+        """Writes a batch of samples."""
+        self.stream.write(
+            "".join(
+                f"{s.timestamp:.6f},{s.voltage},{s.current},{s.power}\n"
+                for s in samples
+            )
+        )
+
+    def flush(self) -> None:
+        """Flushes the stream."""
+        self.stream.flush()
+
+
+class BinarySampleWriter:
+    """Writes snapshots as fixed size binary records."""
+
+    def __init__(self, stream: BinaryIO) -> None:
+        self.stream: BinaryIO = stream
+        self.stream.write(BINARY_HEADER)
+
+    def write(self, samples: List[OutputSnapshot]) -> None:
+        """Writes a batch of samples."""
+        self.stream.write(
+            b"".join(
+                BINARY_RECORD.pack(s.timestamp, s.voltage, s.current, s.power)
+                for s in samples
+            )
+        )
+
+    def flush(self) -> None:
+        """Flushes the stream."""
+        self.stream.flush()
+
+
+def read_binary_samples(stream: BinaryIO) -> Iterator[OutputSnapshot]:
+    """Yields the snapshots of a binary log file."""
+    if stream.read(len(BINARY_HEADER)) != BINARY_HEADER:
+        raise ValueError("Not a hm310p binary log file.")
+    while True:
+        record = stream.read(BINARY_RECORD.size)
+        if len(record) < BINARY_RECORD.size:
+            return
+        timestamp, voltage, current, power = BINARY_RECORD.unpack(record)
+        yield OutputSnapshot(voltage, current, power, timestamp)
+
+
+class LoggerReport:
+    """Summary of a logging run.
+
+    Attributes:
+        samples (int): samples read from the device
+        dropped (int): samples lost because the writer fell behind
+        elapsed (float): duration of the poll loop in seconds
+
+    """
+
+    __slots__ = ("samples", "dropped", "elapsed")
+
+    def __init__(self, samples: int, dropped: int, elapsed: float) -> None:
+        self.samples = samples
+        self.dropped = dropped
+        self.elapsed = elapsed
+
+    @property
+    def rate(self) -> float:
+        """Returns achieved sample rate in Hz."""
+        return self.samples / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"LoggerReport(samples={self.samples}, dropped={self.dropped}, "
+            f"elapsed={self.elapsed:.3f}, rate={self.rate:.1f})"
+        )
+
+
+class StreamingLogger:
+    """Polls the output block as fast as the bus allows.
+
+    Args:
+        psupply (Any): driver offering read_output_snapshot()
+        writer (Any): CsvSampleWriter or BinarySampleWriter
+        capacity (int): ring buffer capacity in samples
+        interval (float): minimum time between two samples, 0 polls
+            back to back
+
+    """
+
+    def __init__(
+        self, psupply: Any, writer: Any, capacity: int = 4096, interval: float = 0.0
+    ) -> None:
+        self.psupply: Any = psupply
+        self.writer: Any = writer
+        self.buffer: SampleRingBuffer = SampleRingBuffer(capacity)
+        self.interval: float = interval
+        self._stop = threading.Event()
+        self._writer_error: Optional[BaseException] = None
+
+    def stop(self) -> None:
+        """Ends run() after the current sample."""
+        self._stop.set()
+
+    def run(
+        self, samples: Optional[int] = None, duration: Optional[float] = None
+    ) -> LoggerReport:
+        """Logs until samples or duration is reached or stop() is called.
+
+        Args:
+            samples (int): number of samples, None for no limit
+            duration (float): run time in seconds, None for no limit
+
+        Returns:
+            LoggerReport: achieved rate and dropped samples
+
+        Raises:
+            Exception: error of the writer, e.g. OSError of a full disk or
+                a closed pipe, which also ends the poll loop
+
+        """
+        writer_thread = threading.Thread(
+            target=self._write_loop, name="hm310p-log-writer", daemon=True
+        )
+        writer_thread.start()
+        count = 0
+        start = time.perf_counter()
+        deadline = None if duration is None else start + duration
+        next_sample = start
+        try:
+            while not self._stop.is_set() and self._writer_error is None:
+                if samples is not None and count >= samples:
+                    break
+                now = time.perf_counter()
+                if deadline is not None and now >= deadline:
+                    break
+                if self.interval > 0:
+                    if now < next_sample:
+                        time.sleep(next_sample - now)
+                    # skip missed ticks instead of polling back to back
+                    late = time.perf_counter() - next_sample
+                    missed = max(0, int(late / self.interval))
+                    next_sample += (missed + 1) * self.interval
+                self.buffer.put(self.psupply.read_output_snapshot())
+                count += 1
+        finally:
+            elapsed = time.perf_counter() - start
+            self.buffer.close()
+            writer_thread.join()
+        if self._writer_error is not None:
+            raise self._writer_error
+        return LoggerReport(count, self.buffer.dropped, elapsed)
+
+    def _write_loop(self) -> None:
+        try:
+            while True:
+                batch = self.buffer.drain()
+                if batch:
+                    self.writer.write(batch)
+                elif self.buffer.closed:
+                    break
+            self.writer.flush()
+        except Exception as exc:
+            self._writer_error = exc
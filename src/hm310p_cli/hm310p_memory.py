@@ -0,0 +1,201 @@
+# src/hm310p_cli/hm310p_memory.py
+# -*- coding: utf-8 -*-
+"""Reading and diff-based programming of the M1 to M6 memories.
+
+Each memory consists of the five consecutive registers Mx_V, Mx_A,
+Mx_Time, Mx_Enable and Mx_NextOffset. A program is read with as few block
+reads as possible, compared word by word with the desired program, and only
+the changed contiguous runs are written back. Reprogramming a supply that
+already holds the desired program costs the reads only.
+
+Example:
+    Store two presets and enable them::
+
+        upload_memory_program(psupply, {
+            "M1": MemorySlot(voltage=3.3, current=0.5, enable=1),
+            "M2": MemorySlot(voltage=5.0, current=1.0, enable=1),
+        })
+
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# third party imports
+import minimalmodbus
+
+# project imports
+from hm310p_cli import hm310p_rtu as rtu
+
+#: memory channel names
+MEMORIES: Tuple[str, ...] = ("M1", "M2", "M3", "M4", "M5", "M6")
+
+#: channel map keys of the memory registers in address order
+_SLOT_KEYS: Tuple[str, ...] = ("v", "c", "ts", "en", "no")
+
+
+class MemorySlot:
+    """Content of one memory, None fields are left unchanged on upload.
+
+    Attributes:
+        voltage (float): voltage in Volt
+        current (float): current limit in Ampere
+        time_span (int): raw content of Mx_Time
+        enable (int): raw content of Mx_Enable
+        next_offset (int): raw content of Mx_NextOffset
+
+    """
+
+    __slots__ = ("voltage", "current", "time_span", "enable", "next_offset")
+
+    def __init__(
+        self,
+        voltage: Optional[float] = None,
+        current: Optional[float] = None,
+        time_span: Optional[int] = None,
+        enable: Optional[int] = None,
+        next_offset: Optional[int] = None,
+    ) -> None:
+        self.voltage = voltage
+        self.current = current
+        self.time_span = time_span
+        self.enable = enable
+        self.next_offset = next_offset
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, MemorySlot):
+            return NotImplemented
+        return all(getattr(self, s) == getattr(other, s) for s in self.__slots__)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{s}={getattr(self, s)}" for s in self.__slots__)
+        return f"MemorySlot({fields})"
+
+
+def _slot_addresses(psupply: Any, memory: str) -> List[int]:
+    return [psupply._lookup_register_value(memory, key) for key in _SLOT_KEYS]
+
+
+def _encode(psupply: Any, slot: MemorySlot) -> List[Optional[int]]:
+    words: List[Optional[int]] = [None] * len(_SLOT_KEYS)
+    if slot.voltage is not None:
+        minimalmodbus._check_numerical(
+            slot.voltage,
+            psupply.min_voltage,
+            psupply.max_voltage,
+            description="voltage value",
+        )
+        words[0] = int(round(slot.voltage * 10 ** psupply.number_of_decimals_voltage))
+    if slot.current is not None:
+        minimalmodbus._check_numerical(
+            slot.current,
+            psupply.min_current,
+            psupply.max_current,
+            description="current value",
+        )
+        words[1] = int(round(slot.current * 10 ** psupply.number_of_decimals_current))
+    for index, raw in enumerate((slot.time_span, slot.enable, slot.next_offset), 2):
+        if raw is not None:
+            minimalmodbus._check_int(raw, 0, 0xFFFF, description="register value")
+            words[index] = raw
+    return words
+
+
+def _decode(psupply: Any, words: List[int]) -> MemorySlot:
+    return MemorySlot(
+        words[0] / 10 ** psupply.number_of_decimals_voltage,
+        words[1] / 10 ** psupply.number_of_decimals_current,
+        words[2],
+        words[3],
+        words[4],
+    )
+
+
+def read_memory_words(
+    psupply: Any, memories: Iterable[str] = MEMORIES, max_gap: int = 0
+) -> Dict[int, int]:
+    """Returns raw register contents of memories by address.
+
+    Args:
+        psupply (Any): HM310P driver
+        memories (Iterable[str]): memory names
+        max_gap (int): unwanted registers a block read may span, the
+            registers between two memories are only readable on some
+            firmware versions
+
+    Returns:
+        Dict[int, int]: register values
+
+    """
+    addresses = [a for m in memories for a in _slot_addresses(psupply, m)]
+    words: Dict[int, int] = {}
+    for start, count in rtu.coalesce_ranges(addresses, max_gap):
+        values = psupply.read_registers(start, count)
+        words.update(zip(range(start, start + count), values))
+    return {address: words[address] for address in addresses}
+
+
+def read_memory_program(
+    psupply: Any, memories: Iterable[str] = MEMORIES, max_gap: int = 0
+) -> Dict[str, MemorySlot]:
+    """Returns the content of memories.
+
+    Args:
+        psupply (Any): HM310P driver
+        memories (Iterable[str]): memory names
+        max_gap (int): see read_memory_words()
+
+    Returns:
+        Dict[str, MemorySlot]: memory contents by name
+
+    """
+    memories = list(memories)
+    words = read_memory_words(psupply, memories, max_gap)
+    return {
+        m: _decode(psupply, [words[a] for a in _slot_addresses(psupply, m)])
+        for m in memories
+    }
+
+
+def plan_memory_writes(
+    psupply: Any, program: Dict[str, MemorySlot], current: Dict[int, int]
+) -> List[Tuple[int, List[int]]]:
+    """Returns the block writes turning current into program.
+
+    Args:
+        psupply (Any): HM310P driver, provides layout and decimals
+        program (Dict[str, MemorySlot]): desired memory contents
+        current (Dict[int, int]): register values from read_memory_words()
+
+    Returns:
+        List[Tuple[int, List[int]]]: (start address, values) of changed runs
+
+    """
+    changed: Dict[int, int] = {}
+    for memory, slot in program.items():
+        if memory not in MEMORIES:
+            raise KeyError(f"Invalid memory name {memory}")
+        addresses = _slot_addresses(psupply, memory)
+        for address, word in zip(addresses, _encode(psupply, slot)):
+            if word is not None and current.get(address) != word:
+                changed[address] = word
+    return rtu.contiguous_runs(changed)
+
+
+def upload_memory_program(
+    psupply: Any, program: Dict[str, MemorySlot], max_gap: int = 0
+) -> List[Tuple[int, List[int]]]:
+    """Writes the changed registers of program to the supply.
+
+    Args:
+        psupply (Any): HM310P driver
+        program (Dict[str, MemorySlot]): desired memory contents
+        max_gap (int): see read_memory_words()
+
+    Returns:
+        List[Tuple[int, List[int]]]: the block writes that were performed
+
+    """
+    current = read_memory_words(psupply, program, max_gap)
+    writes = plan_memory_writes(psupply, program, current)
+    for start, values in writes:
+        psupply.write_registers(start, values)
+    return writes
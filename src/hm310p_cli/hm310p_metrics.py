@@ -0,0 +1,363 @@
+# src/hm310p_cli/hm310p_metrics.py
+# -*- coding: utf-8 -*-
+"""Per-transaction instrumentation of the HM310P driver.
+
+A :class:`TransactionMonitor` attached to a driver receives one
+:class:`TransactionEvent` per Modbus transaction and forwards it to its
+subscribers. :class:`HistogramCollector` aggregates round-trip times per
+function code and register, :class:`PrometheusTextfileExporter` writes the
+aggregate in the text format read by the node exporter textfile collector.
+
+Example:
+    Find the calls that dominate the cycle time::
+
+        monitor = TransactionMonitor()
+        collector = monitor.subscribe(HistogramCollector())
+        psupply = HM310P(port, 1, monitor=monitor)
+        ...
+        for key, stats in collector.top(5):
+            print(key, stats.total)
+
+"""
+import os
+import struct
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# third party imports
+import minimalmodbus
+
+# project imports
+from hm310p_cli.hm310p_regdefs import HM3xxpRegisters as Reg
+from hm310p_cli.hm310p_rtu import ChecksumError
+
+OUTCOME_OK = "ok"
+OUTCOME_TIMEOUT = "timeout"
+OUTCOME_CRC = "crc"
+OUTCOME_INVALID = "invalid"
+OUTCOME_SLAVE_EXCEPTION = "slave_exception"
+OUTCOME_ERROR = "error"
+
+#: RTU overhead of a frame, slave address, function code and CRC
+RTU_FRAME_OVERHEAD = 4
+
+#: default histogram bucket bounds in seconds
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001,
+    0.002,
+    0.005,
+    0.01,
+    0.02,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+)
+
+
+def register_name(address: Optional[int]) -> str:
+    """Returns HM3xxpRegisters name of address or its hex representation."""
+    if address is None:
+        return "unknown"
+    try:
+        return Reg(address).name
+    except ValueError:
+        return f"0x{address:04X}"
+
+
+def classify_exception(exc: BaseException) -> str:
+    """Returns the outcome class of a transaction exception.
+
+    CRC errors are recognised by type, the drivers raise ChecksumError
+    after checking the raw frame.
+    """
+    if isinstance(exc, minimalmodbus.NoResponseError):
+        return OUTCOME_TIMEOUT
+    if isinstance(exc, ChecksumError):
+        return OUTCOME_CRC
+    if isinstance(exc, minimalmodbus.InvalidResponseError):
+        return OUTCOME_INVALID
+    if isinstance(exc, minimalmodbus.SlaveReportedException):
+        return OUTCOME_SLAVE_EXCEPTION
+    return OUTCOME_ERROR
+
+
+def _as_bytes(payload: Any) -> bytes:
+    # minimalmodbus 1.x passes payloads as latin-1 strings, 2.x as bytes
+    if isinstance(payload, str):
+        return payload.encode("latin-1")
+    return bytes(payload)
+
+
+class TransactionEvent:
+    """Record of one Modbus transaction.
+
+    Attributes:
+        slaveaddress (int): addressed slave
+        functioncode (int): Modbus function code
+        address (int): first register address, None if not applicable
+        register (str): HM3xxpRegisters name of address
+        request_bytes (int): bytes sent on the wire
+        response_bytes (int): bytes received, 0 without a valid response
+        rtt (float): round-trip time in seconds
+        outcome (str): ok, timeout, crc, invalid, slave_exception or error
+        timestamp (float): completion time in seconds since the epoch
+
+    """
+
+    __slots__ = (
+        "slaveaddress",
+        "functioncode",
+        "address",
+        "register",
+        "request_bytes",
+        "response_bytes",
+        "rtt",
+        "outcome",
+        "timestamp",
+    )
+
+    def __init__(
+        self,
+        slaveaddress: int,
+        functioncode: int,
+        address: Optional[int],
+        request_bytes: int,
+        response_bytes: int,
+        rtt: float,
+        outcome: str,
+    ) -> None:
+        self.slaveaddress = slaveaddress
+        self.functioncode = functioncode
+        self.address = address
+        self.register = register_name(address)
+        self.request_bytes = request_bytes
+        self.response_bytes = response_bytes
+        self.rtt = rtt
+        self.outcome = outcome
+        self.timestamp = time.time()
+
+    @classmethod
+    def from_payloads(
+        cls,
+        slaveaddress: int,
+        functioncode: int,
+        request_payload: Any,
+        response_payload: Any,
+        rtt: float,
+        outcome: str,
+    ) -> "TransactionEvent":
+        """Creates event from the payloads seen by Instrument._perform_command."""
+        request = _as_bytes(request_payload)
+        address = struct.unpack(">H", request[:2])[0] if len(request) >= 2 else None
+        response_bytes = 0
+        if response_payload is not None:
+            response_bytes = len(_as_bytes(response_payload)) + RTU_FRAME_OVERHEAD
+        return cls(
+            slaveaddress,
+            functioncode,
+            address,
+            len(request) + RTU_FRAME_OVERHEAD,
+            response_bytes,
+            rtt,
+            outcome,
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"TransactionEvent(slave={self.slaveaddress}, "
+            f"fc={self.functioncode}, register={self.register}, "
+            f"rtt={self.rtt:.6f}, outcome={self.outcome})"
+        )
+
+
+Subscriber = Callable[[TransactionEvent], None]
+
+
+class TransactionMonitor:
+    """Distributes transaction events to subscribers."""
+
+    def __init__(self) -> None:
+        self._subscribers: List[Subscriber] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, subscriber: Any) -> Any:
+        """Registers a callable taking a TransactionEvent and returns it."""
+        with self._lock:
+            self._subscribers = self._subscribers + [subscriber]
+        return subscriber
+
+    def unsubscribe(self, subscriber: Any) -> None:
+        """Removes a subscriber."""
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s is not subscriber]
+
+    def publish(self, event: TransactionEvent) -> None:
+        """Passes event to all subscribers."""
+        for subscriber in self._subscribers:
+            subscriber(event)
+
+
+class Histogram:
+    """Cumulative round-trip time histogram of one transaction kind.
+
+    Attributes:
+        bounds (Sequence[float]): upper bucket bounds in seconds
+        counts (List[int]): observations per bucket, last bucket is +Inf
+        total (float): sum of observed round-trip times
+        count (int): number of observations
+        outcomes (Dict[str, int]): transactions per outcome
+        request_bytes (int): bytes sent
+        response_bytes (int): bytes received
+
+    """
+
+    __slots__ = (
+        "bounds",
+        "counts",
+        "total",
+        "count",
+        "outcomes",
+        "request_bytes",
+        "response_bytes",
+    )
+
+    def __init__(self, bounds: Sequence[float]) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.outcomes: Dict[str, int] = {}
+        self.request_bytes = 0
+        self.response_bytes = 0
+
+    def observe(self, event: TransactionEvent) -> None:
+        """Adds event to the histogram."""
+        index = len(self.bounds)
+        for i, bound in enumerate(self.bounds):
+            if event.rtt <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.total += event.rtt
+        self.count += 1
+        self.outcomes[event.outcome] = self.outcomes.get(event.outcome, 0) + 1
+        self.request_bytes += event.request_bytes
+        self.response_bytes += event.response_bytes
+
+    @property
+    def mean(self) -> float:
+        """Returns mean round-trip time in seconds."""
+        return self.total / self.count if self.count else 0.0
+
+
+class HistogramCollector:
+    """Subscriber aggregating events per (function code, register).
+
+    Args:
+        bounds (Sequence[float]): upper bucket bounds in seconds
+
+    """
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.bounds: Sequence[float] = tuple(sorted(bounds))
+        self.histograms: Dict[Tuple[int, str], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event: TransactionEvent) -> None:
+        key = (event.functioncode, event.register)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.bounds)
+            histogram.observe(event)
+
+    def items(self) -> List[Tuple[Tuple[int, str], Histogram]]:
+        """Returns histograms sorted by function code and register."""
+        with self._lock:
+            return sorted(self.histograms.items())
+
+    def top(self, number: int = 10) -> List[Tuple[Tuple[int, str], Histogram]]:
+        """Returns the entries with the largest accumulated round-trip time."""
+        with self._lock:
+            items = list(self.histograms.items())
+        return sorted(items, key=lambda item: item[1].total, reverse=True)[:number]
+
+
+class PrometheusTextfileExporter:
+    """Writes a HistogramCollector in Prometheus text exposition format.
+
+    Args:
+        collector (HistogramCollector): source of the metrics
+        path (str): output file, usually in the node exporter textfile
+            collector directory
+
+    """
+
+    def __init__(self, collector: HistogramCollector, path: str) -> None:
+        self.collector: HistogramCollector = collector
+        self.path: str = path
+
+    def render(self) -> str:
+        """Returns metrics as text."""
+        items = self.collector.items()
+        lines = [
+            "# HELP hm310p_transaction_seconds Modbus round-trip time.",
+            "# TYPE hm310p_transaction_seconds histogram",
+        ]
+        for (functioncode, register), hist in items:
+            labels = f'function="{functioncode}",register="{register}"'
+            cumulative = 0
+            for bound, count in zip(hist.bounds, hist.counts):
+                cumulative += count
+                lines.append(
+                    f"hm310p_transaction_seconds_bucket{{{labels},"
+                    f'le="{bound}"}} {cumulative}'
+                )
+            lines.append(
+                f'hm310p_transaction_seconds_bucket{{{labels},le="+Inf"}} '
+                f"{hist.count}"
+            )
+            lines.append(f"hm310p_transaction_seconds_sum{{{labels}}} {hist.total}")
+            lines.append(f"hm310p_transaction_seconds_count{{{labels}}} {hist.count}")
+        lines += [
+            "# HELP hm310p_transactions_total Modbus transactions by outcome.",
+            "# TYPE hm310p_transactions_total counter",
+        ]
+        for (functioncode, register), hist in items:
+            for outcome, count in sorted(hist.outcomes.items()):
+                lines.append(
+                    f'hm310p_transactions_total{{function="{functioncode}",'
+                    f'register="{register}",outcome="{outcome}"}} {count}'
+                )
+        lines += [
+            "# HELP hm310p_bytes_total Bytes on the wire.",
+            "# TYPE hm310p_bytes_total counter",
+        ]
+        for (functioncode, register), hist in items:
+            labels = f'function="{functioncode}",register="{register}"'
+            lines.append(
+                f'hm310p_bytes_total{{{labels},direction="tx"}} '
+                f"{hist.request_bytes}"
+            )
+            lines.append(
+                f'hm310p_bytes_total{{{labels},direction="rx"}} '
+                f"{hist.response_bytes}"
+            )
+        return "\n".join(lines) + "\n"
+
+    def write(self) -> None:
+        """Atomically replaces the output file."""
+        directory = os.path.dirname(self.path) or "."
+        fd, tmpname = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fobj:
+                fobj.write(self.render())
+            os.chmod(tmpname, 0o644)
+            os.replace(tmpname, self.path)
+        except BaseException:
+            os.unlink(tmpname)
+            raise
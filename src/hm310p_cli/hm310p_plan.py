@@ -0,0 +1,232 @@
+# src/hm310p_cli/hm310p_plan.py
+# -*- coding: utf-8 -*-
+"""Planning of register writes with a minimum number of transactions.
+
+A :class:`TransactionPlan` collects the desired end state register by
+register. Writing a register twice keeps the last value, and adjacent
+registers of the same stage are merged into one multi-register write. The
+stages are applied in a fixed safety order: protection limits before
+setpoints before the power switch.
+
+Switching a supply on with OVP, OCP, OPP, voltage and current therefore
+takes three transactions: one write of PS_ProtectVol..PS_ProtectPowL, one
+of PS_SetVoltage..PS_SetCurrent and one of PS_PowerSwitch.
+
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+# third party imports
+import minimalmodbus
+
+# project imports
+from hm310p_cli import hm310p_rtu as rtu
+from hm310p_cli.hm310p import HM3xxpLayout
+from hm310p_cli.hm310p_cache import DeviceIdentity
+from hm310p_cli.hm310p_constants import PowerState
+from hm310p_cli.hm310p_metrics import register_name
+from hm310p_cli.hm310p_regdefs import HM3xxpRegisters as Reg
+
+#: stages in the order they are applied
+STAGES: Tuple[str, ...] = ("protection", "setpoints", "power")
+
+#: identity assumed when planning without access to the device
+DEFAULT_IDENTITY = DeviceIdentity(3010, 0x4B58, 0x0233)
+
+#: typical processing time of the supply between request and response
+DEFAULT_TURNAROUND = 0.0005
+
+
+def offline_layout(identity: Optional[DeviceIdentity] = None) -> HM3xxpLayout:
+    """Returns register layout for identity without opening a port."""
+    layout = HM3xxpLayout()
+    layout._init_layout()
+    layout._apply_identity(identity or DEFAULT_IDENTITY)
+    return layout
+
+
+class PlannedWrite:
+    """One multi-register write of a plan.
+
+    Attributes:
+        stage (str): stage of the write
+        address (int): first register address
+        values (List[int]): raw register values
+
+    """
+
+    __slots__ = ("stage", "address", "values")
+
+    def __init__(self, stage: str, address: int, values: List[int]) -> None:
+        self.stage = stage
+        self.address = address
+        self.values = values
+
+    def frame(self, slaveaddress: int) -> bytes:
+        """Returns the request frame of the write."""
+        return rtu.build_frame(
+            slaveaddress, rtu.write_registers_pdu(self.address, self.values)
+        )
+
+    def bus_time(self, baudrate: int, turnaround: float = DEFAULT_TURNAROUND) -> float:
+        """Returns estimated time the write occupies the bus in seconds."""
+        request = 9 + 2 * len(self.values)
+        response = 8
+        return (
+            rtu.frame_time(request + response, baudrate)
+            + turnaround
+            + 2 * rtu.silent_interval(baudrate)
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"PlannedWrite(stage={self.stage}, address=0x{self.address:04X}, "
+            f"values={self.values})"
+        )
+
+
+class TransactionPlan:
+    """Desired register values grouped into ordered stages.
+
+    Args:
+        slaveaddress (int): address used to render frames
+
+    """
+
+    def __init__(self, slaveaddress: int = 1) -> None:
+        self.slaveaddress: int = slaveaddress
+        self._words: Dict[str, Dict[int, int]] = {stage: {} for stage in STAGES}
+
+    def set_register(self, stage: str, address: int, value: int) -> None:
+        """Sets the desired raw value of a register, replacing earlier ones."""
+        if stage not in self._words:
+            raise KeyError(f"Invalid stage {stage}")
+        minimalmodbus._check_int(value, 0, 0xFFFF, description="register value")
+        for words in self._words.values():
+            words.pop(int(address), None)
+        self._words[stage][int(address)] = value
+
+    def writes(self, stages: Tuple[str, ...] = STAGES) -> List[PlannedWrite]:
+        """Returns the merged writes of stages in application order."""
+        return [
+            PlannedWrite(stage, address, values)
+            for stage in STAGES
+            if stage in stages
+            for address, values in rtu.contiguous_runs(self._words[stage])
+        ]
+
+    def estimate_bus_time(
+        self, baudrate: int, turnaround: float = DEFAULT_TURNAROUND
+    ) -> float:
+        """Returns estimated bus time of the whole plan in seconds."""
+        return sum(w.bus_time(baudrate, turnaround) for w in self.writes())
+
+    def describe(self, baudrate: int) -> List[str]:
+        """Returns one human readable line per planned write."""
+        lines = []
+        for write in self.writes():
+            last = write.address + len(write.values) - 1
+            registers = register_name(write.address)
+            if last != write.address:
+                registers += f"..{register_name(last)}"
+            frame = " ".join(f"{b:02x}" for b in write.frame(self.slaveaddress))
+            lines.append(
+                f"{write.stage:<10s} {registers:<32s} {frame}  "
+                f"{write.bus_time(baudrate) * 1e3:6.2f} ms"
+            )
+        return lines
+
+    def apply(
+        self, psupply: Any, stages: Tuple[str, ...] = STAGES
+    ) -> List[PlannedWrite]:
+        """Performs the planned writes of stages on psupply and returns them."""
+        writes = self.writes(stages)
+        for write in writes:
+            psupply.write_registers(write.address, write.values)
+        return writes
+
+
+def _raw(value: float, decimals: int) -> int:
+    return int(round(value * 10 ** decimals))
+
+
+def plan_output_state(
+    layout: HM3xxpLayout,
+    powerstate: PowerState,
+    voltage: Optional[float] = None,
+    current: Optional[float] = None,
+    ovp: Optional[float] = None,
+    ocp: Optional[float] = None,
+    opp: Optional[float] = None,
+    slaveaddress: int = 1,
+) -> TransactionPlan:
+    """Returns plan reaching the given output state.
+
+    Args:
+        layout (HM3xxpLayout): driver or offline_layout() providing decimals
+            and limits
+        powerstate (PowerState): final state of the power switch
+        voltage (float): preset voltage in Volt, None keeps it
+        current (float): preset current in Ampere, None keeps it
+        ovp (float): over voltage protection in Volt, None keeps it
+        ocp (float): over current protection in Ampere, None keeps it
+        opp (float): over power protection in Watt, None keeps it
+        slaveaddress (int): address used to render frames
+
+    Returns:
+        TransactionPlan: plan to apply
+
+    Raises:
+        ValueError: invalid power state or value out of range
+
+    """
+    if powerstate not in [PowerState.On, PowerState.Off]:
+        raise ValueError(f"Invalid power state {powerstate}")
+    plan = TransactionPlan(slaveaddress)
+    dec_v = layout.number_of_decimals_voltage
+    dec_c = layout.number_of_decimals_current
+    dec_p = layout.number_of_decimals_power
+
+    for value, desc in [(voltage, "voltage value"), (ovp, "voltage value")]:
+        if value is not None:
+            minimalmodbus._check_numerical(
+                value, layout.min_voltage, layout.max_voltage, description=desc
+            )
+    for value, desc in [(current, "current value"), (ocp, "current value")]:
+        if value is not None:
+            minimalmodbus._check_numerical(
+                value, layout.min_current, layout.max_current, description=desc
+            )
+
+    if ovp is not None:
+        plan.set_register("protection", Reg.PS_ProtectVol, _raw(ovp, dec_v))
+    if ocp is not None:
+        plan.set_register("protection", Reg.PS_ProtectCur, _raw(ocp, dec_c))
+    if opp is not None:
+        minimalmodbus._check_numerical(
+            opp, layout.min_power, layout.max_power, description="power value"
+        )
+        raw = int(opp * 10 ** dec_p)
+        plan.set_register("protection", Reg.PS_ProtectPowH, raw >> 16)
+        plan.set_register("protection", Reg.PS_ProtectPowL, raw & 0xFFFF)
+    if voltage is not None:
+        plan.set_register("setpoints", Reg.PS_SetVoltage, _raw(voltage, dec_v))
+    if current is not None:
+        plan.set_register("setpoints", Reg.PS_SetCurrent, _raw(current, dec_c))
+    plan.set_register("power", Reg.PS_PowerSwitch, powerstate.value)
+    return plan
+
+
+def set_output_state(
+    psupply: Any,
+    powerstate: int,
+    voltage: Optional[float] = None,
+    current: Optional[float] = None,
+    ovp: Optional[float] = None,
+    ocp: Optional[float] = None,
+    opp: Optional[float] = None,
+) -> int:
+    """Applies a planned output state and returns the number of writes."""
+    plan = plan_output_state(
+        psupply, PowerState(powerstate), voltage, current, ovp, ocp, opp
+    )
+    return len(plan.apply(psupply))
@@ -0,0 +1,278 @@
+# src/hm310p_cli/hm310p_protection.py
+# -*- coding: utf-8 -*-
+"""Background watcher of the protection status.
+
+A :class:`ProtectionWatcher` polls PS_ProtectStat on absolute deadlines of
+a fixed interval, decodes it into a
+:class:`~hm310p_cli.hm310p_constants.ProtectionFlag` and passes every
+change to its subscribers as a :class:`ProtectionEvent`.
+
+The device does not report when a protection tripped. The trip happened
+after the previous poll was sent, so the time from the start of that poll
+to the return of the last subscriber bounds the trip to notification
+latency. Each event carries this bound, and the watcher statistics keep
+its maximum, which is what a test rig has to budget for.
+
+On a shared bus, give the watcher a device of the protection class, so its
+polls overtake control and bulk transactions::
+
+    with HM310PBus("/dev/ttyUSB0") as bus:
+        watcher = ProtectionWatcher(bus.device(1, BusPriority.Protection))
+        watcher.subscribe(lambda event: print(event.raised))
+        with watcher:
+            ...
+
+"""
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+# project imports
+from hm310p_cli.hm310p_constants import ProtectionFlag
+
+#: default time between two polls in seconds
+DEFAULT_INTERVAL = 0.02
+
+Subscriber = Callable[["ProtectionEvent"], None]
+
+
+class ProtectionEvent:
+    """Change of the protection status.
+
+    Attributes:
+        flags (ProtectionFlag): protections tripped now
+        previous (ProtectionFlag): protections tripped at the previous poll
+        timestamp (float): time of the detecting poll in seconds since the
+            epoch
+        detected (float): monotonic time the detecting poll returned
+        since (float): monotonic start time of the previous poll, the trip
+            happened later
+        latency (float): upper bound of the trip to notification latency,
+            set once all subscribers returned
+
+    """
+
+    __slots__ = ("flags", "previous", "timestamp", "detected", "since", "latency")
+
+    def __init__(
+        self,
+        flags: ProtectionFlag,
+        previous: ProtectionFlag,
+        timestamp: float,
+        detected: float,
+        since: float,
+    ) -> None:
+        self.flags = flags
+        self.previous = previous
+        self.timestamp = timestamp
+        self.detected = detected
+        self.since = since
+        self.latency = 0.0
+
+    @property
+    def raised(self) -> ProtectionFlag:
+        """Returns protections that tripped since the previous poll."""
+        return self.flags & ~self.previous
+
+    @property
+    def cleared(self) -> ProtectionFlag:
+        """Returns protections that were reset since the previous poll."""
+        return self.previous & ~self.flags
+
+    def __repr__(self) -> str:
+        return (
+            f"ProtectionEvent(flags={self.flags!r}, raised={self.raised!r}, "
+            f"cleared={self.cleared!r}, latency={self.latency:.6f})"
+        )
+
+
+class WatcherStatistics:
+    """Poll and notification statistics of a watcher.
+
+    Attributes:
+        polls (int): successful polls
+        errors (int): polls that raised an exception
+        subscriber_errors (int): subscriber calls that raised an exception
+        events (int): published events
+        max_poll (float): longest poll transaction in seconds
+        max_gap (float): longest time between the starts of two
+            successful polls in seconds
+        total_latency (float): sum of the event latency bounds
+        max_latency (float): largest event latency bound
+
+    """
+
+    __slots__ = (
+        "polls",
+        "errors",
+        "subscriber_errors",
+        "events",
+        "max_poll",
+        "max_gap",
+        "total_latency",
+        "max_latency",
+    )
+
+    def __init__(self) -> None:
+        self.polls: int = 0
+        self.errors: int = 0
+        self.subscriber_errors: int = 0
+        self.events: int = 0
+        self.max_poll: float = 0.0
+        self.max_gap: float = 0.0
+        self.total_latency: float = 0.0
+        self.max_latency: float = 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        """Returns mean event latency bound in seconds."""
+        if self.events == 0:
+            return 0.0
+        return self.total_latency / self.events
+
+    def __repr__(self) -> str:
+        return (
+            f"WatcherStatistics(polls={self.polls}, errors={self.errors}, "
+            f"subscriber_errors={self.subscriber_errors}, "
+            f"events={self.events}, max_poll={self.max_poll:.6f}, "
+            f"max_gap={self.max_gap:.6f}, mean_latency={self.mean_latency:.6f}, "
+            f"max_latency={self.max_latency:.6f})"
+        )
+
+
+class ProtectionWatcher:
+    """Polls the protection status in a background thread.
+
+    Args:
+        psupply (Any): driver offering get_protection_flags(), it must not
+            be used by other threads unless it is a BusDevice
+        interval (float): time between two polls in seconds
+        clock (Callable[[], float]): monotonic time source
+
+    """
+
+    def __init__(
+        self,
+        psupply: Any,
+        interval: float = DEFAULT_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if interval <= 0:
+            raise ValueError("Interval must be positive.")
+        self.psupply: Any = psupply
+        self.interval: float = interval
+        self.clock: Callable[[], float] = clock
+        self.statistics: WatcherStatistics = WatcherStatistics()
+        #: protections tripped at the last successful poll, None before it
+        self.flags: Optional[ProtectionFlag] = None
+        #: last exception raised by a poll or a subscriber
+        self.last_error: Optional[BaseException] = None
+        self._subscribers: List[Subscriber] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_start: Optional[float] = None
+
+    def subscribe(self, subscriber: Any) -> Any:
+        """Registers a callable taking a ProtectionEvent and returns it.
+
+        Subscribers run in the watcher thread and delay the next poll, so
+        they should hand slow work to another thread. An exception of a
+        subscriber is counted and stored in last_error, the remaining
+        subscribers still receive the event.
+
+        """
+        with self._lock:
+            self._subscribers = self._subscribers + [subscriber]
+        return subscriber
+
+    def unsubscribe(self, subscriber: Any) -> None:
+        """Removes a subscriber."""
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s is not subscriber]
+
+    def poll(self) -> Optional[ProtectionEvent]:
+        """Reads the status once and publishes a change.
+
+        The first poll only records the initial status. It publishes an
+        event only if a protection is already tripped.
+
+        Returns:
+            ProtectionEvent: the published event, None without a change
+
+        Raises:
+            Exception: errors of the driver, counted in the statistics
+
+        """
+        stats = self.statistics
+        start = self.clock()
+        try:
+            flags = self.psupply.get_protection_flags()
+        except Exception as exc:
+            stats.errors += 1
+            self.last_error = exc
+            raise
+        detected = self.clock()
+        stats.polls += 1
+        stats.max_poll = max(stats.max_poll, detected - start)
+        since, self._last_start = self._last_start, start
+        if since is not None:
+            stats.max_gap = max(stats.max_gap, start - since)
+        previous = self.flags
+        self.flags = flags
+        if previous is None:
+            if not flags:
+                return None
+            previous, since = ProtectionFlag(0), start
+        elif flags == previous:
+            return None
+        event = ProtectionEvent(flags, previous, time.time(), detected, since)
+        for subscriber in self._subscribers:
+            try:
+                subscriber(event)
+            except Exception as exc:
+                stats.subscriber_errors += 1
+                self.last_error = exc
+        event.latency = self.clock() - event.since
+        stats.events += 1
+        stats.total_latency += event.latency
+        stats.max_latency = max(stats.max_latency, event.latency)
+        return event
+
+    def start(self) -> "ProtectionWatcher":
+        """Starts polling in a daemon thread."""
+        if self._thread is not None:
+            raise RuntimeError("Watcher already running")
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="hm310p-protection", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stops polling and waits for the thread to end."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "ProtectionWatcher":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        start = self.clock()
+        tick = 0
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception:
+                pass  # counted by poll(), the next poll may succeed
+            # absolute deadlines, a slow poll skips ticks instead of drifting
+            tick = max(tick + 1, int((self.clock() - start) / self.interval) + 1)
+            remaining = start + tick * self.interval - self.clock()
+            if remaining > 0:
+                self._stop.wait(remaining)
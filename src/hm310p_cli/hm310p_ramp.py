@@ -0,0 +1,219 @@
+# src/hm310p_cli/hm310p_ramp.py
+# -*- coding: utf-8 -*-
+"""Ramps and sweeps of the voltage or current setpoint.
+
+A profile is a list of setpoints. :func:`run_profile` writes one setpoint
+per period and reads the output block right after it. Step i is scheduled
+at the absolute deadline start + i * period of the monotonic clock, so bus
+jitter and the time spent in the transactions never accumulate: a late step
+shortens the wait before the next one instead of shifting all that follow.
+
+Every step records how late its write started. The report summarizes these
+timing errors and counts overruns, steps that started after the deadline of
+their successor because the period is shorter than write and readback.
+
+Example:
+    Ramp from 0 V to 12 V in 25 steps, one step every 100 ms::
+
+        report = run_profile(psupply, linear_profile(0.0, 12.0, 25), 0.1)
+        print(report.max_error)
+
+"""
+import math
+import threading
+import time
+from typing import Any, Callable, Iterable, List, Optional
+
+# third party imports
+import minimalmodbus
+
+# project imports
+from hm310p_cli.hm310p import OutputSnapshot
+
+#: setpoint kinds a profile may drive
+QUANTITIES = ("voltage", "current")
+
+
+def linear_profile(start: float, stop: float, steps: int) -> List[float]:
+    """Returns steps setpoints evenly spaced from start to stop inclusive."""
+    if steps < 1:
+        raise ValueError("A profile needs at least one step.")
+    if steps == 1:
+        return [stop]
+    return [start + (stop - start) * i / (steps - 1) for i in range(steps)]
+
+
+def log_profile(start: float, stop: float, steps: int) -> List[float]:
+    """Returns steps setpoints geometrically spaced from start to stop.
+
+    Raises:
+        ValueError: start or stop not positive
+
+    """
+    if start <= 0 or stop <= 0:
+        raise ValueError("Logarithmic profiles need positive start and stop.")
+    exponents = linear_profile(math.log(start), math.log(stop), steps)
+    return [math.exp(e) for e in exponents]
+
+
+def table_profile(values: Iterable[float]) -> List[float]:
+    """Returns setpoints of an arbitrary table."""
+    setpoints = [float(value) for value in values]
+    if not setpoints:
+        raise ValueError("A profile needs at least one step.")
+    return setpoints
+
+
+class RampStep:
+    """Result of one profile step.
+
+    Attributes:
+        index (int): step number starting at 0
+        setpoint (float): written setpoint
+        deadline (float): scheduled monotonic time of the write
+        error (float): start of the write minus deadline in seconds
+        duration (float): time of write and readback in seconds
+        snapshot (OutputSnapshot): output read after the write, None
+            without readback
+
+    """
+
+    __slots__ = ("index", "setpoint", "deadline", "error", "duration", "snapshot")
+
+    def __init__(
+        self,
+        index: int,
+        setpoint: float,
+        deadline: float,
+        error: float,
+        duration: float,
+        snapshot: Optional[OutputSnapshot],
+    ) -> None:
+        self.index = index
+        self.setpoint = setpoint
+        self.deadline = deadline
+        self.error = error
+        self.duration = duration
+        self.snapshot = snapshot
+
+    def __repr__(self) -> str:
+        return (
+            f"RampStep(index={self.index}, setpoint={self.setpoint}, "
+            f"error={self.error:.6f}, snapshot={self.snapshot})"
+        )
+
+
+class RampReport:
+    """Steps and timing statistics of a profile run.
+
+    Attributes:
+        period (float): scheduled time between steps in seconds
+        steps (List[RampStep]): performed steps
+        completed (bool): False if the run was stopped early
+
+    """
+
+    def __init__(self, period: float, steps: List[RampStep], completed: bool) -> None:
+        self.period: float = period
+        self.steps: List[RampStep] = steps
+        self.completed: bool = completed
+
+    @property
+    def max_error(self) -> float:
+        """Returns the largest start delay of a step in seconds."""
+        return max((step.error for step in self.steps), default=0.0)
+
+    @property
+    def mean_error(self) -> float:
+        """Returns the mean start delay of the steps in seconds."""
+        if not self.steps:
+            return 0.0
+        return sum(step.error for step in self.steps) / len(self.steps)
+
+    @property
+    def overruns(self) -> int:
+        """Returns number of steps started after their successor's deadline."""
+        return sum(1 for step in self.steps if step.error > self.period)
+
+    def __repr__(self) -> str:
+        return (
+            f"RampReport(steps={len(self.steps)}, completed={self.completed}, "
+            f"mean_error={self.mean_error:.6f}, max_error={self.max_error:.6f}, "
+            f"overruns={self.overruns})"
+        )
+
+
+def _check_setpoints(psupply: Any, quantity: str, setpoints: List[float]) -> None:
+    if quantity == "voltage":
+        low, high = psupply.min_voltage, psupply.max_voltage
+    elif quantity == "current":
+        low, high = psupply.min_current, psupply.max_current
+    else:
+        raise ValueError(f"Invalid quantity {quantity}")
+    for setpoint in setpoints:
+        minimalmodbus._check_numerical(
+            setpoint, low, high, description=f"{quantity} value"
+        )
+
+
+def run_profile(
+    psupply: Any,
+    setpoints: List[float],
+    period: float,
+    quantity: str = "voltage",
+    readback: bool = True,
+    stop: Optional[threading.Event] = None,
+    callback: Optional[Callable[[RampStep], None]] = None,
+    clock: Callable[[], float] = time.monotonic,
+) -> RampReport:
+    """Writes setpoints on absolute deadlines.
+
+    All setpoints are checked against the limits of the supply before the
+    first write, so an invalid profile never leaves a ramp half done.
+
+    Args:
+        psupply (Any): HM310P driver
+        setpoints (List[float]): profile, see linear_profile(),
+            log_profile() and table_profile()
+        period (float): time between steps in seconds
+        quantity (str): voltage or current
+        readback (bool): read the output block after each write
+        stop (threading.Event): optional event ending the run early
+        callback (Callable[[RampStep], None]): optional receiver of each
+            step, called outside the timed section
+        clock (Callable[[], float]): monotonic time source
+
+    Returns:
+        RampReport: steps and timing statistics
+
+    Raises:
+        ValueError: invalid quantity, period or setpoint
+
+    """
+    if period < 0:
+        raise ValueError("Period must not be negative.")
+    _check_setpoints(psupply, quantity, setpoints)
+    write = psupply.set_voltage if quantity == "voltage" else psupply.set_current
+    steps: List[RampStep] = []
+    start = clock()
+    for index, setpoint in enumerate(setpoints):
+        deadline = start + index * period
+        remaining = deadline - clock()
+        if remaining > 0:
+            if stop is not None:
+                if stop.wait(remaining):
+                    return RampReport(period, steps, False)
+            else:
+                time.sleep(remaining)
+        elif stop is not None and stop.is_set():
+            return RampReport(period, steps, False)
+        begin = clock()
+        write(setpoint)
+        snapshot = psupply.read_output_snapshot() if readback else None
+        step = RampStep(
+            index, setpoint, deadline, begin - deadline, clock() - begin, snapshot
+        )
+        steps.append(step)
+        if callback is not None:
+            callback(step)
+    return RampReport(period, steps, True)
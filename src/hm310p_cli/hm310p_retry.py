@@ -0,0 +1,164 @@
+# src/hm310p_cli/hm310p_retry.py
+# -*- coding: utf-8 -*-
+"""Retry policy for transient Modbus failures.
+
+Timeouts, CRC errors and garbled responses on noisy USB to RS485 links are
+usually transient. A :class:`RetryPolicy` decides whether a failed
+transaction is repeated and how long to wait before, and
+:class:`RetryStatistics` counts what happened.
+
+Only idempotent requests are repeated. Reads and writes of absolute values
+leave the device in the same state when performed twice. A write of
+PS_Device is not idempotent: if the response got lost after the device
+accepted the new address, the repetition is sent to an address the device
+no longer answers to.
+
+"""
+import random
+import struct
+from typing import Any, Dict, Optional
+
+# third party imports
+import minimalmodbus
+
+# project imports
+from hm310p_cli import hm310p_rtu as rtu
+from hm310p_cli.hm310p_metrics import (
+    classify_exception,
+    OUTCOME_CRC,
+    OUTCOME_INVALID,
+    OUTCOME_TIMEOUT,
+)
+from hm310p_cli.hm310p_regdefs import HM3xxpRegisters as Reg
+
+IDEMPOTENT = "idempotent"
+NON_IDEMPOTENT = "non_idempotent"
+
+#: registers whose writes are never repeated
+NON_IDEMPOTENT_REGISTERS = frozenset([Reg.PS_Device])
+
+#: transaction outcomes worth repeating
+RETRYABLE_OUTCOMES = frozenset([OUTCOME_TIMEOUT, OUTCOME_CRC, OUTCOME_INVALID])
+
+
+def classify_request(functioncode: int, payload_to_slave: Any) -> str:
+    """Returns IDEMPOTENT or NON_IDEMPOTENT for a request.
+
+    Args:
+        functioncode (int): Modbus function code
+        payload_to_slave (Any): request payload as passed to
+            Instrument._perform_command
+
+    Returns:
+        str: idempotency class
+
+    """
+    if functioncode == rtu.READ_HOLDING_REGISTERS:
+        return IDEMPOTENT
+    if functioncode not in (rtu.WRITE_SINGLE_REGISTER, rtu.WRITE_MULTIPLE_REGISTERS):
+        return NON_IDEMPOTENT
+    payload = payload_to_slave
+    if isinstance(payload, str):
+        payload = payload.encode("latin-1")  # minimalmodbus 1.x
+    try:
+        (address,) = struct.unpack(">H", bytes(payload)[:2])
+        count = 1
+        if functioncode == rtu.WRITE_MULTIPLE_REGISTERS:
+            (count,) = struct.unpack(">H", bytes(payload)[2:4])
+    except struct.error:
+        return NON_IDEMPOTENT
+    if any(a in NON_IDEMPOTENT_REGISTERS for a in range(address, address + count)):
+        return NON_IDEMPOTENT
+    return IDEMPOTENT
+
+
+class RetryPolicy:
+    """Bounded retries with exponential, jittered backoff.
+
+    Args:
+        retries (int): repetitions after the first attempt, 0 disables
+            retrying
+        backoff (float): delay before the first repetition in seconds
+        max_backoff (float): upper bound of the delay in seconds
+        jitter (float): relative spread of the delay, 0.5 draws it from
+            50% to 150% of the nominal value
+        seed (int): seed of the jitter generator, None for a random seed
+
+    """
+
+    def __init__(
+        self,
+        retries: int = 2,
+        backoff: float = 0.01,
+        max_backoff: float = 0.2,
+        jitter: float = 0.5,
+        seed: Optional[int] = None,
+    ) -> None:
+        minimalmodbus._check_int(retries, 0, description="number of retries")
+        minimalmodbus._check_numerical(jitter, 0.0, 1.0, description="jitter")
+        self.retries: int = retries
+        self.backoff: float = backoff
+        self.max_backoff: float = max_backoff
+        self.jitter: float = jitter
+        self._random = random.Random(seed)
+
+    def retryable(self, request_class: str, exc: BaseException) -> bool:
+        """Returns True if a request of request_class failing with exc is
+        worth repeating."""
+        if request_class != IDEMPOTENT:
+            return False
+        if isinstance(exc, minimalmodbus.SlaveDeviceBusyError):
+            return True
+        return classify_exception(exc) in RETRYABLE_OUTCOMES
+
+    def should_retry(
+        self, attempt: int, request_class: str, exc: BaseException
+    ) -> bool:
+        """Returns True if failed attempt number attempt is repeated."""
+        return attempt < self.retries and self.retryable(request_class, exc)
+
+    def delay(self, attempt: int) -> float:
+        """Returns the wait time before repeating attempt in seconds."""
+        nominal = min(self.max_backoff, self.backoff * 2 ** attempt)
+        spread = self._random.uniform(1 - self.jitter, 1 + self.jitter)
+        return min(self.max_backoff, nominal * spread)
+
+    def __repr__(self) -> str:
+        return (
+            f"RetryPolicy(retries={self.retries}, backoff={self.backoff}, "
+            f"max_backoff={self.max_backoff}, jitter={self.jitter})"
+        )
+
+
+class RetryStatistics:
+    """Failure and recovery counters of one driver.
+
+    Attributes:
+        transactions (int): requested transactions
+        retries (int): repeated attempts
+        recovered (int): transactions that succeeded after a repetition
+        exhausted (int): transactions that failed after all repetitions
+        failures (Dict[str, int]): failed attempts per outcome class
+
+    """
+
+    __slots__ = ("transactions", "retries", "recovered", "exhausted", "failures")
+
+    def __init__(self) -> None:
+        self.transactions = 0
+        self.retries = 0
+        self.recovered = 0
+        self.exhausted = 0
+        self.failures: Dict[str, int] = {}
+
+    def count_failure(self, exc: BaseException) -> None:
+        """Counts a failed attempt by its outcome class."""
+        outcome = classify_exception(exc)
+        self.failures[outcome] = self.failures.get(outcome, 0) + 1
+
+    def __repr__(self) -> str:
+        return (
+            f"RetryStatistics(transactions={self.transactions}, "
+            f"retries={self.retries}, recovered={self.recovered}, "
+            f"exhausted={self.exhausted}, failures={self.failures})"
+        )
@@ -0,0 +1,124 @@
+# src/hm310p_cli/hm310p_rto.py
+# -*- coding: utf-8 -*-
+"""Adaptive response timeout of Modbus transactions.
+
+The estimator follows the retransmission timeout computation of TCP
+(RFC 6298). It keeps a smoothed round-trip time and its mean deviation and
+derives the timeout from both, clamped to a floor and a ceiling. A
+response timeout doubles the current value until the next valid sample.
+
+Only the part of a round trip that is not spent transmitting the frames is
+estimated. The line time of the request and the expected response is added
+per transaction, so a long block read gets a proportionally longer timeout
+than a single register at the same device turnaround. The driver hands a
+longer timeout to the port at once, rounded up to half of
+RECONFIGURE_TOLERANCE, and keeps the current one while it exceeds the new
+value by less than RECONFIGURE_TOLERANCE, so round-trip jitter and
+alternating request sizes do not reconfigure the port on every transaction.
+
+"""
+import math
+from typing import Optional
+
+#: gain of the smoothed round-trip time
+ALPHA = 1 / 8
+
+#: gain of the round-trip time deviation
+BETA = 1 / 4
+
+#: weight of the deviation in the timeout
+K = 4
+
+#: lower bound of the timeout on top of the line time in seconds
+DEFAULT_FLOOR = 0.01
+
+#: upper bound of the timeout on top of the line time in seconds
+DEFAULT_CEILING = 0.25
+
+#: resolution of the timeout handed to the serial port in seconds
+GRANULARITY = 0.001
+
+#: decrease of the timeout kept on the open port in seconds, as setting
+#: the timeout of a pyserial port is a tcsetattr() call
+RECONFIGURE_TOLERANCE = 0.02
+
+
+class RtoEstimator:
+    """Smoothed round-trip time and timeout of one device.
+
+    Args:
+        floor (float): smallest timeout in seconds
+        ceiling (float): largest timeout in seconds, also used until the
+            first sample arrives. floor == ceiling gives a fixed timeout.
+
+    Attributes:
+        srtt (float): smoothed round-trip time, None without samples
+        rttvar (float): round-trip time deviation, None without samples
+        rto (float): current timeout without line time
+        samples (int): number of valid samples
+        timeouts (int): number of reported timeouts
+
+    """
+
+    def __init__(
+        self, floor: float = DEFAULT_FLOOR, ceiling: float = DEFAULT_CEILING
+    ) -> None:
+        if not 0 < floor <= ceiling:
+            raise ValueError(f"Invalid timeout bounds {floor} and {ceiling}")
+        self.floor: float = floor
+        self.ceiling: float = ceiling
+        self.srtt: Optional[float] = None
+        self.rttvar: Optional[float] = None
+        self.rto: float = ceiling
+        self.samples: int = 0
+        self.timeouts: int = 0
+
+    def observe(self, rtt: float) -> None:
+        """Updates the estimate with the round-trip time of a valid response.
+
+        Args:
+            rtt (float): measured time beyond the line time in seconds
+
+        """
+        rtt = max(rtt, 0.0)
+        if self.srtt is None or self.rttvar is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = (1 - BETA) * self.rttvar + BETA * abs(self.srtt - rtt)
+            self.srtt = (1 - ALPHA) * self.srtt + ALPHA * rtt
+        self.samples += 1
+        self.rto = self._clamp(self.srtt + max(GRANULARITY, K * self.rttvar))
+
+    def backoff(self) -> None:
+        """Doubles the timeout after a missing response."""
+        self.timeouts += 1
+        self.rto = self._clamp(2 * self.rto)
+
+    def reset(self) -> None:
+        """Forgets all samples, e.g. after changing the line rate."""
+        self.srtt = self.rttvar = None
+        self.rto = self.ceiling
+        self.samples = self.timeouts = 0
+
+    def timeout(self, line_time: float = 0.0) -> float:
+        """Returns response timeout of a transaction.
+
+        Args:
+            line_time (float): time to transmit request and response
+
+        Returns:
+            float: timeout in seconds, rounded up to GRANULARITY
+
+        """
+        return math.ceil((line_time + self.rto) / GRANULARITY) * GRANULARITY
+
+    def _clamp(self, value: float) -> float:
+        return min(self.ceiling, max(self.floor, value))
+
+    def __repr__(self) -> str:
+        return (
+            f"RtoEstimator(srtt={self.srtt}, rttvar={self.rttvar}, "
+            f"rto={self.rto:.6f}, samples={self.samples}, "
+            f"timeouts={self.timeouts})"
+        )
@@ -0,0 +1,229 @@
+# src/hm310p_cli/hm310p_rtu.py
+# -*- coding: utf-8 -*-
+"""Modbus RTU framing for the holding register functions used by HM3xxP.
+
+minimalmodbus builds and parses its frames internally and only offers a
+blocking interface. The helpers in this module expose the same framing for
+the drivers that manage the serial line themselves.
+
+"""
+import struct
+from typing import Dict, Iterable, List, Tuple
+
+# third party imports
+import minimalmodbus
+
+READ_HOLDING_REGISTERS = 0x03
+WRITE_SINGLE_REGISTER = 0x06
+WRITE_MULTIPLE_REGISTERS = 0x10
+
+#: maximum number of registers of one read request
+MAX_READ_REGISTERS = 125
+#: maximum number of registers of one write request
+MAX_WRITE_REGISTERS = 123
+
+#: bits per character on the wire, start + 8 data + stop bit
+BITS_PER_CHARACTER = 10
+
+#: length of an exception response frame
+EXCEPTION_RESPONSE_LENGTH = 5
+
+
+class ChecksumError(minimalmodbus.InvalidResponseError):
+    """CRC of a received frame does not match its content."""
+
+
+def crc16(data: bytes) -> int:
+    """Returns the Modbus CRC-16 of data."""
+    crc = 0xFFFF
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            if crc & 0x0001:
+                crc = (crc >> 1) ^ 0xA001
+            else:
+                crc >>= 1
+    return crc
+
+
+def build_frame(slaveaddress: int, pdu: bytes) -> bytes:
+    """Returns RTU frame consisting of address, pdu and CRC."""
+    body = bytes([slaveaddress]) + pdu
+    return body + struct.pack("<H", crc16(body))
+
+
+def split_frame(frame: bytes) -> Tuple[int, bytes]:
+    """Returns slave address and pdu of a frame after checking its CRC.
+
+    Args:
+        frame (bytes): complete RTU frame
+
+    Returns:
+        Tuple[int, bytes]: slave address and protocol data unit
+
+    Raises:
+        InvalidResponseError: frame too short
+        ChecksumError: CRC mismatch
+
+    """
+    if len(frame) < 4:
+        raise minimalmodbus.InvalidResponseError(f"Frame too short: {frame!r}")
+    check_crc(frame)
+    return frame[0], frame[1:-2]
+
+
+def check_crc(frame: bytes) -> None:
+    """Checks the CRC in the last two bytes of a frame.
+
+    Raises:
+        ChecksumError: CRC mismatch
+
+    """
+    (received,) = struct.unpack("<H", frame[-2:])
+    if received != crc16(frame[:-2]):
+        raise ChecksumError(f"CRC mismatch: {frame!r}")
+
+
+def read_registers_pdu(address: int, count: int) -> bytes:
+    """Returns pdu of a read holding registers request."""
+    return struct.pack(">BHH", READ_HOLDING_REGISTERS, address, count)
+
+
+def write_register_pdu(address: int, value: int) -> bytes:
+    """Returns pdu of a write single register request."""
+    return struct.pack(">BHH", WRITE_SINGLE_REGISTER, address, value)
+
+
+def write_registers_pdu(address: int, values: List[int]) -> bytes:
+    """Returns pdu of a write multiple registers request."""
+    return struct.pack(
+        f">BHHB{len(values)}H",
+        WRITE_MULTIPLE_REGISTERS,
+        address,
+        len(values),
+        2 * len(values),
+        *values,
+    )
+
+
+def response_length(request_pdu: bytes) -> int:
+    """Returns length of the regular response frame to a request."""
+    functioncode = request_pdu[0]
+    if functioncode == READ_HOLDING_REGISTERS:
+        (count,) = struct.unpack(">H", request_pdu[3:5])
+        return 5 + 2 * count
+    if functioncode in (WRITE_SINGLE_REGISTER, WRITE_MULTIPLE_REGISTERS):
+        return 8
+    raise ValueError(f"Unsupported function code {functioncode}")
+
+
+def parse_response(frame: bytes, slaveaddress: int, request_pdu: bytes) -> bytes:
+    """Checks response frame and returns its payload after the function code.
+
+    Args:
+        frame (bytes): complete response frame
+        slaveaddress (int): address the request was sent to
+        request_pdu (bytes): pdu of the request
+
+    Returns:
+        bytes: response payload
+
+    Raises:
+        InvalidResponseError: malformed response
+        SlaveReportedException: exception response of the slave
+
+    """
+    address, pdu = split_frame(frame)
+    if address != slaveaddress:
+        raise minimalmodbus.InvalidResponseError(
+            f"Wrong slave address {address} instead of {slaveaddress}"
+        )
+    if pdu[0] == request_pdu[0] | 0x80:
+        raise _slave_exception(pdu[1])
+    if pdu[0] != request_pdu[0]:
+        raise minimalmodbus.InvalidResponseError(
+            f"Wrong function code {pdu[0]} instead of {request_pdu[0]}"
+        )
+    return pdu[1:]
+
+
+def decode_registers(payload: bytes) -> List[int]:
+    """Returns register values of a read holding registers payload."""
+    count = payload[0] // 2
+    return list(struct.unpack(f">{count}H", payload[1 : 1 + 2 * count]))
+
+
+def is_exception_frame(frame: bytes) -> bool:
+    """Returns True if the partial frame starts an exception response."""
+    return len(frame) >= 2 and bool(frame[1] & 0x80)
+
+
+def frame_time(number_of_bytes: float, baudrate: int) -> float:
+    """Returns time in seconds to transmit number_of_bytes."""
+    return number_of_bytes * BITS_PER_CHARACTER / baudrate
+
+
+def silent_interval(baudrate: int) -> float:
+    """Returns the 3.5 character inter-frame delay of Modbus RTU."""
+    return max(frame_time(3.5, baudrate), 0.00175)
+
+
+def _slave_exception(code: int) -> minimalmodbus.SlaveReportedException:
+    if code in (1, 2, 3):
+        return minimalmodbus.IllegalRequestError(
+            f"Slave reported illegal request {code}"
+        )
+    if code == 6:
+        return minimalmodbus.SlaveDeviceBusyError("Slave reported device busy")
+    return minimalmodbus.SlaveReportedException(f"Slave reported exception {code}")
+
+
+def coalesce_ranges(
+    addresses: Iterable[int], max_gap: int = 0, max_length: int = MAX_READ_REGISTERS
+) -> List[Tuple[int, int]]:
+    """Returns (start, count) block reads covering all addresses.
+
+    Args:
+        addresses (Iterable[int]): register addresses to read
+        max_gap (int): number of unwanted registers a block may span to
+            merge two ranges, only safe if the gap registers are readable
+        max_length (int): maximum registers per block
+
+    Returns:
+        List[Tuple[int, int]]: ascending blocks
+
+    """
+    blocks: List[Tuple[int, int]] = []
+    for address in sorted(set(addresses)):
+        if blocks:
+            start, count = blocks[-1]
+            end = start + count
+            if address - end <= max_gap and address - start < max_length:
+                blocks[-1] = (start, address - start + 1)
+                continue
+        blocks.append((address, 1))
+    return blocks
+
+
+def contiguous_runs(
+    words: Dict[int, int], max_length: int = MAX_WRITE_REGISTERS
+) -> List[Tuple[int, List[int]]]:
+    """Returns (start, values) write blocks of consecutive addresses.
+
+    Args:
+        words (Dict[int, int]): register values by address
+        max_length (int): maximum registers per block
+
+    Returns:
+        List[Tuple[int, List[int]]]: ascending blocks
+
+    """
+    runs: List[Tuple[int, List[int]]] = []
+    for address in sorted(words):
+        if runs:
+            start, values = runs[-1]
+            if address == start + len(values) and len(values) < max_length:
+                values.append(words[address])
+                continue
+        runs.append((address, [words[address]]))
+    return runs
@@ -0,0 +1,257 @@
+# src/hm310p_cli/hm310p_scan.py
+# -*- coding: utf-8 -*-
+"""Discovery of supplies on serial ports.
+
+A scan reads PS_Model, PS_ClassDetail and PS_Decimals of every candidate
+slave address in one transaction. That is the whole identity of a device,
+so the results can warm the
+:class:`~hm310p_cli.hm310p_cache.IdentityCache` and later opens need no
+probe at all.
+
+Absent addresses dominate a scan, so a probe only waits for the first
+response byte: the request time plus a short margin. The rest of the frame
+is awaited only once the first byte arrived. Transactions on one port
+cannot overlap, the addresses of a port are probed one after the other,
+but all ports are scanned in parallel.
+
+Example:
+    Find every supply and write an inventory::
+
+        report = scan(list_serial_ports())
+        write_inventory("rack.json", [r.spec() for r in report.results])
+
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence
+
+# third party imports
+import serial
+from serial.tools import list_ports
+
+# project imports
+from hm310p_cli import hm310p_rtu as rtu
+from hm310p_cli.hm310p_cache import DeviceIdentity, IdentityCache
+from hm310p_cli.hm310p_constants import (
+    DEFAULT_BAUDRATE,
+    HM3XXP_CLASS_DETAIL,
+    MODEL_NAMES,
+)
+from hm310p_cli.hm310p_inventory import DeviceSpec
+from hm310p_cli.hm310p_regdefs import HM3xxpRegisters as Reg
+
+#: time to wait for the first response byte after the request in seconds
+DEFAULT_SCAN_TIMEOUT = 0.02
+
+#: default number of ports scanned at the same time
+DEFAULT_WORKERS = 8
+
+#: all valid unicast slave addresses
+ALL_ADDRESSES = range(1, 248)
+
+_IDENTITY_PDU = rtu.read_registers_pdu(Reg.PS_Model.value, 3)
+
+
+class ScanResult:
+    """Supply found by a scan.
+
+    Attributes:
+        port (str): serial device
+        address (int): slave address
+        baudrate (int): line rate the device answered at
+        identity (DeviceIdentity): model, class detail and decimals
+        rtt (float): round-trip time of the probe in seconds
+
+    """
+
+    __slots__ = ("port", "address", "baudrate", "identity", "rtt")
+
+    def __init__(
+        self,
+        port: str,
+        address: int,
+        baudrate: int,
+        identity: DeviceIdentity,
+        rtt: float,
+    ) -> None:
+        self.port = port
+        self.address = address
+        self.baudrate = baudrate
+        self.identity = identity
+        self.rtt = rtt
+
+    @property
+    def model_name(self) -> Optional[str]:
+        """Returns HM310P or HM305P, None for an unknown device."""
+        if self.identity.class_detail != HM3XXP_CLASS_DETAIL:
+            return None
+        return MODEL_NAMES.get(self.identity.model)
+
+    def spec(self) -> DeviceSpec:
+        """Returns inventory entry of the device."""
+        return DeviceSpec(self.port, self.address, self.baudrate)
+
+    def __repr__(self) -> str:
+        return (
+            f"ScanResult(port={self.port!r}, address={self.address}, "
+            f"baudrate={self.baudrate}, model={self.model_name}, "
+            f"rtt={self.rtt:.6f})"
+        )
+
+
+class ScanReport:
+    """Results of a scan.
+
+    Attributes:
+        results (List[ScanResult]): devices found, sorted by port and
+            address
+        errors (Dict[str, str]): ports that could not be opened and why
+        elapsed (float): wall time of the scan in seconds
+
+    """
+
+    def __init__(
+        self,
+        results: List[ScanResult],
+        errors: Dict[str, str],
+        elapsed: float,
+    ) -> None:
+        self.results: List[ScanResult] = results
+        self.errors: Dict[str, str] = errors
+        self.elapsed: float = elapsed
+
+    def __repr__(self) -> str:
+        return (
+            f"ScanReport(devices={len(self.results)}, errors={len(self.errors)}, "
+            f"elapsed={self.elapsed:.3f})"
+        )
+
+
+def list_serial_ports() -> List[str]:
+    """Returns the serial devices of the system."""
+    return sorted(info.device for info in list_ports.comports())
+
+
+def probe_identity(
+    port: serial.Serial,
+    address: int,
+    timeout: float = DEFAULT_SCAN_TIMEOUT,
+) -> Optional[ScanResult]:
+    """Reads the identity of one slave address on an open port.
+
+    Args:
+        port (serial.Serial): open port at the line rate to probe
+        address (int): slave address in the range 1 to 247
+        timeout (float): time to wait for the first response byte on top
+            of the request time in seconds
+
+    Returns:
+        ScanResult: the device, None if no valid response arrived
+
+    """
+    baudrate = port.baudrate
+    request = rtu.build_frame(address, _IDENTITY_PDU)
+    length = rtu.response_length(_IDENTITY_PDU)
+    port.timeout = rtu.frame_time(len(request), baudrate) + timeout
+    port.reset_input_buffer()
+    start = time.perf_counter()
+    port.write(request)
+    frame = port.read(1)
+    if frame:
+        port.timeout = rtu.frame_time(length, baudrate) + timeout
+        frame += port.read(length - 1)
+    rtt = time.perf_counter() - start
+    try:
+        payload = rtu.parse_response(frame, address, _IDENTITY_PDU)
+        model, class_detail, decimals = rtu.decode_registers(payload)
+    except (IOError, ValueError):
+        if frame:
+            time.sleep(rtu.silent_interval(baudrate))  # let garbage pass by
+        return None
+    return ScanResult(
+        port.port, address, baudrate, DeviceIdentity(model, class_detail, decimals), rtt
+    )
+
+
+def scan_port(
+    portname: str,
+    addresses: Iterable[int] = ALL_ADDRESSES,
+    baudrates: Sequence[int] = (DEFAULT_BAUDRATE,),
+    timeout: float = DEFAULT_SCAN_TIMEOUT,
+) -> List[ScanResult]:
+    """Probes addresses at every line rate on one port.
+
+    An address found at one rate is not probed again at the next ones.
+
+    Raises:
+        SerialException: the port cannot be opened
+
+    """
+    addresses = list(addresses)
+    results: List[ScanResult] = []
+    with serial.Serial(portname, baudrates[0]) as port:
+        for baudrate in baudrates:
+            port.baudrate = baudrate
+            found = {result.address for result in results}
+            for address in addresses:
+                if address in found:
+                    continue
+                result = probe_identity(port, address, timeout)
+                if result is not None:
+                    results.append(result)
+    return results
+
+
+def scan(
+    ports: Optional[Iterable[str]] = None,
+    addresses: Iterable[int] = ALL_ADDRESSES,
+    baudrates: Sequence[int] = (DEFAULT_BAUDRATE,),
+    timeout: float = DEFAULT_SCAN_TIMEOUT,
+    max_workers: int = DEFAULT_WORKERS,
+    identity_cache: Optional[IdentityCache] = None,
+) -> ScanReport:
+    """Scans ports in parallel.
+
+    Args:
+        ports (Iterable[str]): serial devices, None scans all of the system
+        addresses (Iterable[int]): slave addresses to probe on every port
+        baudrates (Sequence[int]): line rates to probe, in order
+        timeout (float): time to wait for the first response byte on top
+            of the request time in seconds
+        max_workers (int): number of ports scanned at the same time
+        identity_cache (IdentityCache): optional cache receiving identity
+            and line rate of every supported supply found, other devices
+            answering at an address are not cached
+
+    Returns:
+        ScanReport: devices found and ports that failed
+
+    """
+    portnames = list_serial_ports() if ports is None else list(ports)
+    addresses = list(addresses)
+    if not baudrates:
+        raise ValueError("At least one line rate is needed.")
+    results: List[ScanResult] = []
+    errors: Dict[str, str] = {}
+    start = time.perf_counter()
+    if portnames:
+        workers = min(max_workers, len(portnames))
+        with ThreadPoolExecutor(workers, thread_name_prefix="hm310p-scan") as pool:
+            futures = {
+                name: pool.submit(scan_port, name, addresses, baudrates, timeout)
+                for name in portnames
+            }
+            for name, future in futures.items():
+                try:
+                    results.extend(future.result())
+                except (OSError, serial.SerialException) as exc:
+                    errors[name] = str(exc)
+    elapsed = time.perf_counter() - start
+    results.sort(key=lambda result: (result.port, result.address))
+    if identity_cache is not None:
+        for result in results:
+            if result.model_name is None:
+                continue
+            identity_cache.store(result.port, result.address, result.identity)
+            identity_cache.store_baudrate(result.port, result.address, result.baudrate)
+    return ScanReport(results, errors, elapsed)
@@ -0,0 +1,392 @@
+# src/hm310p_cli/hm310p_script.py
+# -*- coding: utf-8 -*-
+"""Line oriented command language for test sequences.
+
+A script runs many steps on one open driver, so a sequence of a few
+hundred steps costs bus time only instead of a process start and a port
+open per step. One command per line, ``#`` starts a comment::
+
+    set ovp 13.0
+    set ocp 1.1
+    set v 12
+    set i 0.5
+    set state on
+    wait 200ms
+    assert v 12 0.05        # measured voltage within 50 mV
+    assert i 0.25 2%        # measured current within 2 percent
+    get p
+    off
+
+Quantities:
+    v, i, p: measured output voltage, current and power, read only
+    vset, iset: voltage and current setpoints
+    ovp, ocp, opp: protection limits
+    state: power state, on or off
+
+``set v`` and ``set i`` write the setpoints, so ``set v 12`` is followed
+by ``assert v 12 ...`` on the measured value. ``on`` and ``off`` are short
+for ``set state on|off``.
+
+The whole script is parsed before the first transaction, so a typo in the
+last line does not leave the supply half configured.
+
+"""
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# project imports
+from hm310p_cli.hm310p_constants import PowerState
+
+#: alternative spellings of the quantities
+ALIASES = {
+    "voltage": "v",
+    "current": "i",
+    "power": "p",
+    "powerstate": "state",
+}
+
+#: quantity -> (getter, setter or None)
+QUANTITIES: Dict[str, Tuple[Callable[[Any], Any], Optional[Callable]]] = {
+    "v": (lambda ps: ps.get_voltage("Output"), None),
+    "i": (lambda ps: ps.get_current("Output"), None),
+    "p": (lambda ps: ps.get_power("Output"), None),
+    "vset": (lambda ps: ps.get_voltage(), lambda ps, x: ps.set_voltage(x)),
+    "iset": (lambda ps: ps.get_current(), lambda ps, x: ps.set_current(x)),
+    "ovp": (lambda ps: ps.get_ovp(), lambda ps, x: ps.set_ovp(x)),
+    "ocp": (lambda ps: ps.get_ocp(), lambda ps, x: ps.set_ocp(x)),
+    "opp": (lambda ps: ps.get_opp(), lambda ps, x: ps.set_opp(x)),
+    "state": (
+        lambda ps: ps.get_powerstate(),
+        lambda ps, x: ps.set_powerstate(x),
+    ),
+}
+
+#: commands of the language
+COMMANDS = ("set", "get", "assert", "wait", "on", "off")
+
+#: quantities written by set v and set i
+_SETPOINTS = {"v": "vset", "i": "iset"}
+
+_STATES = {"on": PowerState.On, "off": PowerState.Off}
+
+
+class ScriptError(ValueError):
+    """Syntax error of a script line.
+
+    Attributes:
+        lineno (int): line number, 0 if unknown
+
+    """
+
+    def __init__(self, message: str, lineno: int = 0) -> None:
+        super().__init__(f"line {lineno}: {message}" if lineno else message)
+        self.lineno = lineno
+
+
+class ScriptAssertionError(AssertionError):
+    """Value read by an assert step is out of tolerance."""
+
+
+class Step:
+    """Parsed script line.
+
+    Attributes:
+        lineno (int): line number in the script
+        text (str): the line without comment
+        command (str): one of COMMANDS
+        quantity (str): quantity, None for wait
+        value (Any): value to write or expect, seconds for wait
+        tolerance (float): absolute tolerance of an assert
+        relative (bool): tolerance is a fraction of the expected value
+
+    """
+
+    __slots__ = (
+        "lineno",
+        "text",
+        "command",
+        "quantity",
+        "value",
+        "tolerance",
+        "relative",
+    )
+
+    def __init__(
+        self,
+        lineno: int,
+        text: str,
+        command: str,
+        quantity: Optional[str] = None,
+        value: Any = None,
+        tolerance: float = 0.0,
+        relative: bool = False,
+    ) -> None:
+        self.lineno = lineno
+        self.text = text
+        self.command = command
+        self.quantity = quantity
+        self.value = value
+        self.tolerance = tolerance
+        self.relative = relative
+
+    def __repr__(self) -> str:
+        return f"Step({self.lineno}, {self.text!r})"
+
+
+class StepResult:
+    """Outcome of one step.
+
+    Attributes:
+        step (Step): the step
+        value (Any): value read by get and assert, None otherwise
+        elapsed (float): time of the step in seconds
+        error (BaseException): exception of the step, None on success
+
+    """
+
+    __slots__ = ("step", "value", "elapsed", "error")
+
+    def __init__(
+        self,
+        step: Step,
+        value: Any,
+        elapsed: float,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        self.step = step
+        self.value = value
+        self.elapsed = elapsed
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        """Returns True if the step succeeded."""
+        return self.error is None
+
+    def __repr__(self) -> str:
+        outcome = f"value={self.value!r}" if self.ok else f"error={self.error!r}"
+        return f"StepResult({self.step!r}, {outcome}, elapsed={self.elapsed:.6f})"
+
+
+class ScriptReport:
+    """Results of a script run.
+
+    Attributes:
+        results (List[StepResult]): results of the steps run, in order
+        elapsed (float): wall time of the run in seconds
+
+    """
+
+    def __init__(self, results: List[StepResult], elapsed: float) -> None:
+        self.results: List[StepResult] = results
+        self.elapsed: float = elapsed
+
+    @property
+    def ok(self) -> bool:
+        """Returns True if every step succeeded."""
+        return all(result.ok for result in self.results)
+
+    @property
+    def failed(self) -> List[StepResult]:
+        """Returns results of the failed steps."""
+        return [result for result in self.results if not result.ok]
+
+    @property
+    def bus_time(self) -> float:
+        """Returns time spent in steps other than wait in seconds."""
+        return sum(r.elapsed for r in self.results if r.step.command != "wait")
+
+    def __repr__(self) -> str:
+        return (
+            f"ScriptReport(steps={len(self.results)}, "
+            f"failed={len(self.failed)}, elapsed={self.elapsed:.6f}, "
+            f"bus_time={self.bus_time:.6f})"
+        )
+
+
+def _quantity(word: str, lineno: int) -> str:
+    name = ALIASES.get(word, word)
+    if name not in QUANTITIES:
+        raise ScriptError(f"Unknown quantity {word!r}", lineno)
+    return name
+
+
+def _number(word: str, lineno: int) -> float:
+    try:
+        return float(word)
+    except ValueError:
+        raise ScriptError(f"Invalid number {word!r}", lineno)
+
+
+def _value(quantity: str, word: str, lineno: int) -> Any:
+    if quantity == "state":
+        if word not in _STATES:
+            raise ScriptError(f"Invalid power state {word!r}", lineno)
+        return _STATES[word]
+    return _number(word, lineno)
+
+
+def _duration(word: str, lineno: int) -> float:
+    if word.endswith("ms"):
+        seconds = _number(word[:-2], lineno) / 1e3
+    else:
+        seconds = _number(word[:-1] if word.endswith("s") else word, lineno)
+    if seconds < 0:
+        raise ScriptError("Negative wait", lineno)
+    return seconds
+
+
+def parse_line(line: str, lineno: int = 0) -> Optional[Step]:
+    """Parses one line.
+
+    Args:
+        line (str): command, optionally followed by a comment
+        lineno (int): line number reported in errors
+
+    Returns:
+        Step: the step, None for blank and comment lines
+
+    Raises:
+        ScriptError: invalid line
+
+    """
+    text = line.split("#", 1)[0].strip()
+    words = text.lower().split()
+    if not words:
+        return None
+    command, args = words[0], words[1:]
+    if command in ("on", "off"):
+        if args:
+            raise ScriptError(f"{command} takes no arguments", lineno)
+        return Step(lineno, text, "set", "state", _STATES[command])
+    if command == "wait":
+        if len(args) != 1:
+            raise ScriptError("Usage: wait SECONDS", lineno)
+        return Step(lineno, text, "wait", None, _duration(args[0], lineno))
+    if command == "get":
+        if len(args) != 1:
+            raise ScriptError("Usage: get QUANTITY", lineno)
+        return Step(lineno, text, "get", _quantity(args[0], lineno))
+    if command == "set":
+        if len(args) != 2:
+            raise ScriptError("Usage: set QUANTITY VALUE", lineno)
+        quantity = _quantity(args[0], lineno)
+        quantity = _SETPOINTS.get(quantity, quantity)
+        if QUANTITIES[quantity][1] is None:
+            raise ScriptError(f"{args[0]} cannot be set", lineno)
+        value = _value(quantity, args[1], lineno)
+        return Step(lineno, text, "set", quantity, value)
+    if command == "assert":
+        if len(args) not in (2, 3):
+            raise ScriptError("Usage: assert QUANTITY VALUE [TOLERANCE[%]]", lineno)
+        quantity = _quantity(args[0], lineno)
+        expected = _value(quantity, args[1], lineno)
+        step = Step(lineno, text, "assert", quantity, expected)
+        if len(args) == 3:
+            if quantity == "state":
+                raise ScriptError("The power state takes no tolerance", lineno)
+            tolerance = args[2]
+            step.relative = tolerance.endswith("%")
+            step.tolerance = _number(tolerance.rstrip("%"), lineno)
+            if step.relative:
+                step.tolerance /= 100.0
+            if step.tolerance < 0:
+                raise ScriptError("Negative tolerance", lineno)
+        return step
+    raise ScriptError(f"Unknown command {command!r}", lineno)
+
+
+def parse_script(lines: Iterable[str]) -> List[Step]:
+    """Parses a script, e.g. an open file.
+
+    Raises:
+        ScriptError: first invalid line
+
+    """
+    steps = []
+    for lineno, line in enumerate(lines, 1):
+        step = parse_line(line, lineno)
+        if step is not None:
+            steps.append(step)
+    return steps
+
+
+def execute(
+    psupply: Any, step: Step, sleep: Callable[[float], Any] = time.sleep
+) -> Any:
+    """Runs one step on the driver.
+
+    Returns:
+        Any: value read by get and assert, None otherwise
+
+    Raises:
+        ScriptAssertionError: value of an assert out of tolerance
+        Exception: errors of the driver
+
+    """
+    if step.command == "wait":
+        sleep(step.value)
+        return None
+    getter, setter = QUANTITIES[step.quantity]
+    if step.command == "set":
+        setter(psupply, step.value)
+        return None
+    value = getter(psupply)
+    if step.command == "assert":
+        if step.quantity == "state":
+            if value != step.value:
+                raise ScriptAssertionError(
+                    f"state is {value.name.lower()}, expected "
+                    f"{step.value.name.lower()}"
+                )
+        else:
+            limit = step.tolerance * (abs(step.value) if step.relative else 1.0)
+            if abs(value - step.value) > limit:
+                raise ScriptAssertionError(
+                    f"{step.quantity} is {value}, expected {step.value} +- {limit:g}"
+                )
+    return value
+
+
+def run_script(
+    psupply: Any,
+    steps: Iterable[Step],
+    keep_going: bool = False,
+    callback: Optional[Callable[[StepResult], Any]] = None,
+) -> ScriptReport:
+    """Runs steps one after the other on one driver.
+
+    Args:
+        psupply (Any): HM310P driver
+        steps (Iterable[Step]): parsed steps, see parse_script()
+        keep_going (bool): continue after a failed step
+        callback (Callable[[StepResult], Any]): called after every step
+
+    Returns:
+        ScriptReport: results of the steps run
+
+    """
+    results = []
+    start = time.perf_counter()
+    for step in steps:
+        begin = time.perf_counter()
+        try:
+            result = StepResult(step, execute(psupply, step), 0.0)
+        except Exception as exc:
+            result = StepResult(step, None, 0.0, exc)
+        result.elapsed = time.perf_counter() - begin
+        results.append(result)
+        if callback is not None:
+            callback(result)
+        if not result.ok and not keep_going:
+            break
+    return ScriptReport(results, time.perf_counter() - start)
+
+
+def format_value(value: Any) -> str:
+    """Returns value of a step as printed by the console."""
+    if value is None:
+        return ""
+    if isinstance(value, PowerState):
+        return value.name.lower()
+    return f"{value:g}"
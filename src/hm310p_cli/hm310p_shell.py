@@ -0,0 +1,247 @@
+# src/hm310p_cli/hm310p_shell.py
+# -*- coding: utf-8 -*-
+"""Interactive shell on one open supply.
+
+:class:`HM310PShell` keeps the driver, its port and the identity read at
+start-up for the whole session, so every command costs its transactions
+only. After each command the shell prints the number of transactions and
+their summed round-trip time, taken from the driver's
+:class:`~hm310p_cli.hm310p_metrics.TransactionMonitor`.
+
+Besides the commands of :mod:`hm310p_cli.hm310p_script` (set, get,
+assert, wait, on, off), ``show`` reads whole channels of the register map
+(Info, Protection, Output, Preset, M1-M6) with one block read each, and
+``refresh`` keeps a live status line updated from single reads of the
+output block. Channels and quantities complete with tab where readline is
+available.
+
+Example::
+
+    hm310p /dev/ttyUSB0:1> set v 5
+    1 transactions, rtt 9.8 ms
+    hm310p /dev/ttyUSB0:1> show preset
+    Preset  v=5  c=1  ts=0
+    1 transactions, rtt 10.2 ms
+
+"""
+import cmd
+import time
+from typing import Any, Callable, IO, List, Optional
+
+# project imports
+from hm310p_cli.hm310p_metrics import TransactionEvent, TransactionMonitor
+from hm310p_cli.hm310p_script import (
+    ALIASES,
+    execute,
+    format_value,
+    parse_line,
+    QUANTITIES,
+)
+
+#: default time between two updates of refresh in seconds
+DEFAULT_REFRESH = 0.5
+
+#: channels written by the write command
+WRITABLE_CHANNELS = ("Preset", "Protection", "M1", "M2", "M3", "M4", "M5", "M6")
+
+
+def _format_register(key: str, value: float) -> str:
+    if isinstance(value, float):
+        return f"{key}={value:g}"
+    return f"{key}={value:#06x}" if key in ("cd", "decs") else f"{key}={value}"
+
+
+def _complete(text: str, names: List[str]) -> List[str]:
+    return [name for name in names if name.lower().startswith(text.lower())]
+
+
+class HM310PShell(cmd.Cmd):
+    """Command loop on one driver.
+
+    Args:
+        psupply (Any): HM310P driver, used by this thread only
+        stdin (IO): input, None for the terminal
+        stdout (IO): output, None for sys.stdout
+        sleep (Callable[[float], Any]): wait function of wait and refresh
+
+    """
+
+    intro = 'Type "help" for commands, tab completes channels and quantities.'
+
+    def __init__(
+        self,
+        psupply: Any,
+        stdin: Optional[IO[str]] = None,
+        stdout: Optional[IO[str]] = None,
+        sleep: Callable[[float], Any] = time.sleep,
+    ) -> None:
+        super().__init__(stdin=stdin, stdout=stdout)
+        if stdin is not None:
+            self.use_rawinput = False
+        self.psupply: Any = psupply
+        self.sleep: Callable[[float], Any] = sleep
+        self.prompt = f"hm310p {psupply.serial.port}:{psupply.address}> "
+        #: transactions of the running command
+        self.events: List[TransactionEvent] = []
+        if psupply.monitor is None:
+            psupply.monitor = TransactionMonitor()
+        psupply.monitor.subscribe(self.events.append)
+
+    def _print(self, line: str = "", end: str = "\n") -> None:
+        self.stdout.write(line + end)
+        self.stdout.flush()
+
+    def onecmd(self, line: str) -> bool:
+        """Runs one command and prints its transactions and round-trip time."""
+        self.events.clear()
+        try:
+            stop = super().onecmd(line)
+        except KeyboardInterrupt:
+            self._print()
+            stop = False
+        except Exception as exc:
+            self._print(f"error: {exc}")
+            stop = False
+        if self.events:
+            rtt = sum(event.rtt for event in self.events)
+            self._print(f"{len(self.events)} transactions, rtt {rtt * 1e3:.1f} ms")
+        return bool(stop)
+
+    def emptyline(self) -> bool:
+        """Does nothing, repeating the last command could switch the output."""
+        return False
+
+    def default(self, line: str) -> None:
+        """Reports an unknown command."""
+        self._print(f"error: unknown command {line.split()[0]!r}, try help")
+
+    def _script_command(self, line: str) -> None:
+        value = execute(self.psupply, parse_line(line), self.sleep)
+        if value is not None:
+            self._print(format_value(value))
+
+    def do_set(self, arg: str) -> None:
+        """set QUANTITY VALUE: writes vset, iset, ovp, ocp, opp or state."""
+        self._script_command("set " + arg)
+
+    def do_get(self, arg: str) -> None:
+        """get QUANTITY: reads v, i, p, vset, iset, ovp, ocp, opp or state."""
+        self._script_command("get " + arg)
+
+    def do_assert(self, arg: str) -> None:
+        """assert QUANTITY VALUE [TOLERANCE[%]]: checks a value."""
+        self._script_command("assert " + arg)
+
+    def do_wait(self, arg: str) -> None:
+        """wait SECONDS: pauses, e.g. wait 0.5 or wait 200ms."""
+        self._script_command("wait " + arg)
+
+    def do_on(self, arg: str) -> None:
+        """on: switches the output on."""
+        self._script_command("on " + arg)
+
+    def do_off(self, arg: str) -> None:
+        """off: switches the output off."""
+        self._script_command("off " + arg)
+
+    def do_show(self, arg: str) -> None:
+        """show [CHANNEL ...]: reads channels, Output by default."""
+        for name in arg.split() or ["Output"]:
+            chan = self._channel(name)
+            values = self.psupply.read_channel(chan)
+            fields = "  ".join(_format_register(k, v) for k, v in values.items())
+            self._print(f"{chan}  {fields}")
+
+    def do_write(self, arg: str) -> None:
+        """write CHANNEL VOLTAGE CURRENT: writes a preset or memory channel."""
+        args = arg.split()
+        if len(args) != 3:
+            raise ValueError("Usage: write CHANNEL VOLTAGE CURRENT")
+        chan = self._channel(args[0])
+        if chan not in WRITABLE_CHANNELS:
+            raise ValueError(f"Channel {chan} is read only")
+        self.psupply.set_voltage_and_current_of_channel_list(
+            [chan], float(args[1]), float(args[2])
+        )
+
+    def do_refresh(self, arg: str) -> None:
+        """refresh [INTERVAL [COUNT]]: live output line until Ctrl-C.
+
+        Every update is a single read of the output block.
+        """
+        args = arg.split()
+        interval = float(args[0]) if args else DEFAULT_REFRESH
+        count = int(args[1]) if len(args) > 1 else None
+        if interval <= 0:
+            raise ValueError("Interval must be positive.")
+        start = time.monotonic()
+        updates = 0
+        try:
+            while count is None or updates < count:
+                if updates:
+                    self.sleep(max(0.0, start + updates * interval - time.monotonic()))
+                begin = time.perf_counter()
+                snap = self.psupply.read_output_snapshot()
+                rtt = time.perf_counter() - begin
+                self._print(
+                    f"\r{snap.voltage:8.3f} V {snap.current:8.4f} A "
+                    f"{snap.power:8.3f} W  {rtt * 1e3:5.1f} ms",
+                    end="",
+                )
+                updates += 1
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._print()
+
+    def do_quit(self, arg: str) -> bool:
+        """quit: leaves the shell."""
+        return True
+
+    do_exit = do_quit
+
+    def do_EOF(self, arg: str) -> bool:
+        """Leaves the shell at the end of input."""
+        self._print()
+        return True
+
+    def _channel(self, name: str) -> str:
+        for chan in self.psupply.channels:
+            if chan.lower() == name.lower():
+                return chan
+        raise ValueError(f"Unknown channel {name!r}")
+
+    def complete_show(self, text: str, *args: Any) -> List[str]:
+        """Completes channel names."""
+        return _complete(text, self.psupply.channels)
+
+    def complete_write(self, text: str, line: str, *args: Any) -> List[str]:
+        """Completes the channel of write."""
+        if len(line.split()) - (1 if text else 0) != 1:
+            return []
+        return _complete(text, list(WRITABLE_CHANNELS))
+
+    def _complete_quantity(
+        self, text: str, line: str, names: List[str], states: bool = True
+    ) -> List[str]:
+        words = line.split()
+        position = len(words) - (1 if text else 0)
+        if position == 1:
+            return _complete(text, names)
+        if position == 2 and states and ALIASES.get(words[1], words[1]) == "state":
+            return _complete(text, ["on", "off"])
+        return []
+
+    def complete_set(self, text: str, line: str, *args: Any) -> List[str]:
+        """Completes writable quantities and power states."""
+        names = [name for name, (_, setter) in QUANTITIES.items() if setter]
+        return self._complete_quantity(text, line, names)
+
+    def complete_get(self, text: str, line: str, *args: Any) -> List[str]:
+        """Completes quantities."""
+        return self._complete_quantity(text, line, list(QUANTITIES), False)
+
+    def complete_assert(self, text: str, line: str, *args: Any) -> List[str]:
+        """Completes quantities and power states."""
+        return self._complete_quantity(text, line, list(QUANTITIES))
+
@@ -0,0 +1,388 @@
+# src/hm310p_cli/hm310p_simulator.py
+# -*- coding: utf-8 -*-
+"""Modbus RTU simulator of HM310P and HM305P power supplies.
+
+The simulator opens a pseudo terminal and answers on its master side, so
+drivers connect to :attr:`HM3xxPSimulator.port` exactly like to a USB
+adapter. Every register of
+:class:`~hm310p_cli.hm310p_regdefs.HM3xxpRegisters` is implemented, the
+output follows the presets through a resistive load, and exceeding the
+protection limits trips the supply and sets the protect status bits.
+
+Responses are delayed by the time the request and the response need on a
+real line at the configured baud rate, so throughput and latency measured
+against the simulator match the hardware within the turnaround time.
+Requests sent while the terminal is set to a different rate are dropped,
+like the garbage a real device receives at the wrong rate.
+
+Example:
+    Run the driver offline::
+
+        with HM3xxPSimulator("HM305P", load_resistance=10.0) as sim:
+            psupply = HM310P(sim.port, 1)
+
+"""
+import os
+import select
+import struct
+import termios
+import threading
+import time
+import tty
+from typing import Dict, List, Optional
+
+# third party imports
+import click
+
+# project imports
+from hm310p_cli import hm310p_rtu as rtu
+from hm310p_cli.hm310p_constants import ProtectionFlag
+from hm310p_cli.hm310p_regdefs import HM3xxpRegisters as Reg
+
+#: identification registers per model
+MODELS: Dict[str, Dict[str, int]] = {
+    "HM310P": {"model": 3010, "class_detail": 0x4B58, "decimals": 0x0233},
+    "HM305P": {"model": 3005, "class_detail": 0x4B58, "decimals": 0x0233},
+}
+
+_READ_ONLY = frozenset(
+    [
+        Reg.PS_ProtectStat,
+        Reg.PS_Model,
+        Reg.PS_ClassDetail,
+        Reg.PS_Decimals,
+        Reg.PS_Voltage,
+        Reg.PS_Current,
+        Reg.PS_PowerH,
+        Reg.PS_PowerL,
+        Reg.PS_PowerCal,
+        Reg.PS_UL,
+        Reg.PS_UH,
+        Reg.PS_IL,
+        Reg.PS_IH,
+    ]
+)
+
+#: kinds of faults accepted by HM3xxPSimulator.inject_faults()
+FAULTS = ("drop", "crc")
+
+_ILLEGAL_FUNCTION = 0x01
+_ILLEGAL_DATA_ADDRESS = 0x02
+_ILLEGAL_DATA_VALUE = 0x03
+
+
+class HM3xxPSimulator:
+    """Simulated power supply behind a pseudo terminal.
+
+    Args:
+        model (str): HM310P or HM305P
+        slaveaddress (int): initial content of PS_Device
+        baudrate (int): line rate used to compute the response delay
+        latency (bool): delay responses like a real line, False answers
+            immediately
+        turnaround (float): processing time of the device in seconds
+        load_resistance (float): resistive load in Ohm, None for an open
+            output
+        check_line_rate (bool): drop requests sent at another rate than
+            baudrate
+
+    """
+
+    def __init__(
+        self,
+        model: str = "HM310P",
+        slaveaddress: int = 1,
+        baudrate: int = 9600,
+        latency: bool = True,
+        turnaround: float = 0.0005,
+        load_resistance: Optional[float] = None,
+        check_line_rate: bool = True,
+    ) -> None:
+        if model not in MODELS:
+            raise ValueError(f"Unknown model {model}")
+        self.model: str = model
+        self.baudrate: int = baudrate
+        self.latency: bool = latency
+        self.turnaround: float = turnaround
+        self.load_resistance: Optional[float] = load_resistance
+        self.check_line_rate: bool = check_line_rate
+        #: number of answered requests
+        self.transactions: int = 0
+        self.registers: Dict[int, int] = self._initial_registers(slaveaddress)
+        self._faults: List[str] = []
+        self._lock = threading.RLock()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._master_fd, self._slave_fd = os.openpty()
+        tty.setraw(self._slave_fd)
+        #: device file drivers connect to
+        self.port: str = os.ttyname(self._slave_fd)
+
+    @property
+    def slaveaddress(self) -> int:
+        """Returns current slave address."""
+        return self.registers[Reg.PS_Device]
+
+    def start(self) -> "HM3xxPSimulator":
+        """Starts answering requests in a background thread."""
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._serve, name=f"hm3xxp-sim-{self.port}", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stops the background thread and closes the pseudo terminal."""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for fd in (self._master_fd, self._slave_fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def __enter__(self) -> "HM3xxPSimulator":
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+    def trip(self, flags: ProtectionFlag) -> None:
+        """Trips the protection as if the device detected flags."""
+        with self._lock:
+            self._trip(int(flags))
+
+    def set_load(self, resistance: Optional[float]) -> None:
+        """Changes the load resistance, None for an open output."""
+        with self._lock:
+            self.load_resistance = resistance
+            self._update_output()
+
+    def inject_faults(self, count: int = 1, kind: str = "drop") -> None:
+        """Spoils the responses to the next count requests.
+
+        Args:
+            count (int): number of affected responses
+            kind (str): drop to stay silent, crc to send a corrupted CRC
+
+        """
+        if kind not in FAULTS:
+            raise ValueError(f"Unknown fault {kind}")
+        with self._lock:
+            self._faults.extend([kind] * count)
+
+    def handle(self, request: bytes) -> Optional[bytes]:
+        """Returns the response frame to a request frame.
+
+        Args:
+            request (bytes): complete RTU request frame
+
+        Returns:
+            Optional[bytes]: response frame, None if the request is ignored
+
+        """
+        try:
+            address, pdu = rtu.split_frame(request)
+        except IOError:
+            return None  # corrupted frames are dropped silently
+        with self._lock:
+            if address not in (0, self.slaveaddress):
+                return None
+            response = self._execute(pdu)
+            self.transactions += 1
+        if address == 0:
+            return None  # broadcast
+        return rtu.build_frame(address, response)
+
+    def _execute(self, pdu: bytes) -> bytes:
+        functioncode = pdu[0]
+        if functioncode == rtu.READ_HOLDING_REGISTERS and len(pdu) == 5:
+            first, count = struct.unpack(">HH", pdu[1:5])
+            if not 1 <= count <= rtu.MAX_READ_REGISTERS:
+                return bytes([functioncode | 0x80, _ILLEGAL_DATA_VALUE])
+            addresses = range(first, first + count)
+            if not all(a in self.registers for a in addresses):
+                return bytes([functioncode | 0x80, _ILLEGAL_DATA_ADDRESS])
+            values = [self.registers[a] for a in addresses]
+            return struct.pack(f">BB{count}H", functioncode, 2 * count, *values)
+        if functioncode == rtu.WRITE_SINGLE_REGISTER and len(pdu) == 5:
+            address, value = struct.unpack(">HH", pdu[1:5])
+            if address not in self.registers:
+                return bytes([functioncode | 0x80, _ILLEGAL_DATA_ADDRESS])
+            self._write(address, [value])
+            return pdu
+        if functioncode == rtu.WRITE_MULTIPLE_REGISTERS and len(pdu) >= 6:
+            first, count, bytecount = struct.unpack(">HHB", pdu[1:6])
+            if not 1 <= count <= rtu.MAX_WRITE_REGISTERS or bytecount != 2 * count:
+                return bytes([functioncode | 0x80, _ILLEGAL_DATA_VALUE])
+            if not all(a in self.registers for a in range(first, first + count)):
+                return bytes([functioncode | 0x80, _ILLEGAL_DATA_ADDRESS])
+            values = list(struct.unpack(f">{count}H", pdu[6 : 6 + bytecount]))
+            self._write(first, values)
+            return pdu[:5]
+        return bytes([functioncode | 0x80, _ILLEGAL_FUNCTION])
+
+    def _write(self, first: int, values: list) -> None:
+        new_address = None
+        for offset, value in enumerate(values):
+            address = first + offset
+            if address in _READ_ONLY:
+                continue  # acknowledged but ignored by the firmware
+            if address == Reg.PS_Device:
+                new_address = value  # takes effect after the response
+                continue
+            if address == Reg.PS_PowerSwitch and value:
+                self.registers[Reg.PS_ProtectStat] = 0
+            self.registers[address] = value
+        self._update_output()
+        if new_address is not None:
+            self.registers[Reg.PS_Device] = new_address
+
+    def _trip(self, flags: int) -> None:
+        self.registers[Reg.PS_ProtectStat] |= flags
+        self.registers[Reg.PS_PowerSwitch] = 0
+        self._update_output()
+
+    def _update_output(self) -> None:
+        regs = self.registers
+        voltage = current = 0.0
+        if regs[Reg.PS_PowerSwitch]:
+            set_voltage = regs[Reg.PS_SetVoltage] / 100
+            set_current = regs[Reg.PS_SetCurrent] / 1000
+            voltage = set_voltage
+            if self.load_resistance is not None:
+                if self.load_resistance <= 0:
+                    voltage, current = 0.0, set_current
+                elif set_voltage / self.load_resistance > set_current:
+                    voltage, current = set_current * self.load_resistance, set_current
+                else:
+                    current = set_voltage / self.load_resistance
+            power = voltage * current
+            opp = ((regs[Reg.PS_ProtectPowH] << 16) | regs[Reg.PS_ProtectPowL]) / 1000
+            flags = 0
+            if set_voltage > regs[Reg.PS_ProtectVol] / 100:
+                flags |= ProtectionFlag.OVP
+            if current > regs[Reg.PS_ProtectCur] / 1000:
+                flags |= ProtectionFlag.OCP
+            if power > opp:
+                flags |= ProtectionFlag.OPP
+            if flags:
+                self._trip(flags)
+                return
+        raw_power = int(round(voltage * current * 1000))
+        regs[Reg.PS_Voltage] = int(round(voltage * 100))
+        regs[Reg.PS_Current] = int(round(current * 1000))
+        regs[Reg.PS_PowerH] = raw_power >> 16
+        regs[Reg.PS_PowerL] = raw_power & 0xFFFF
+
+    def _initial_registers(self, slaveaddress: int) -> Dict[int, int]:
+        ident = MODELS[self.model]
+        max_current = 10100 if self.model == "HM310P" else 5100
+        registers = {int(reg): 0 for reg in Reg}
+        registers.update(
+            {
+                Reg.PS_Model: ident["model"],
+                Reg.PS_ClassDetail: ident["class_detail"],
+                Reg.PS_Decimals: ident["decimals"],
+                Reg.PS_ProtectVol: 3300,
+                Reg.PS_ProtectCur: max_current + 400,
+                Reg.PS_ProtectPowH: 320000 >> 16,
+                Reg.PS_ProtectPowL: 320000 & 0xFFFF,
+                Reg.PS_Buzzer: 1,
+                Reg.PS_Device: slaveaddress,
+                Reg.PS_UL: 11,
+                Reg.PS_UH: 3200,
+                Reg.PS_IL: 21,
+                Reg.PS_IH: max_current,
+            }
+        )
+        return registers
+
+    def _serve(self) -> None:
+        buffer = bytearray()
+        while self._running:
+            readable, _, _ = select.select([self._master_fd], [], [], 0.02)
+            if not readable:
+                if buffer:  # silence ends an incomplete or unknown frame
+                    self._respond(bytes(buffer))
+                    buffer.clear()
+                continue
+            try:
+                buffer.extend(os.read(self._master_fd, 512))
+            except OSError:
+                continue  # no driver connected to the slave side
+            while buffer:
+                length = self._request_length(buffer)
+                if length is None or len(buffer) < length:
+                    break
+                self._respond(bytes(buffer[:length]))
+                del buffer[:length]
+
+    def _line_rate_matches(self) -> bool:
+        speed = getattr(termios, f"B{self.baudrate}", None)
+        if not self.check_line_rate or speed is None:
+            return True
+        try:
+            return termios.tcgetattr(self._slave_fd)[5] == speed
+        except termios.error:
+            return True
+
+    def _respond(self, request: bytes) -> None:
+        if not self._line_rate_matches():
+            return  # garbled at the wrong rate, the device stays silent
+        response = self.handle(request)
+        if response is not None:
+            with self._lock:
+                fault = self._faults.pop(0) if self._faults else None
+            if fault == "drop":
+                response = None
+            elif fault == "crc":
+                response = response[:-1] + bytes([response[-1] ^ 0xFF])
+        if self.latency:
+            delay = rtu.frame_time(len(request), self.baudrate) + self.turnaround
+            if response is not None:
+                delay += rtu.frame_time(len(response), self.baudrate)
+            time.sleep(delay)
+        if response is not None:
+            os.write(self._master_fd, response)
+
+    @staticmethod
+    def _request_length(buffer: bytearray) -> Optional[int]:
+        if len(buffer) < 2:
+            return None
+        if buffer[1] in (rtu.READ_HOLDING_REGISTERS, rtu.WRITE_SINGLE_REGISTER):
+            return 8
+        if buffer[1] == rtu.WRITE_MULTIPLE_REGISTERS:
+            return 9 + buffer[6] if len(buffer) >= 7 else None
+        return None
+
+
+@click.command()
+@click.option(
+    "-m",
+    "--model",
+    type=click.Choice(sorted(MODELS)),
+    default="HM310P",
+    help="Simulated model",
+)
+@click.option(
+    "-a", "--address", type=click.IntRange(1, 247), default=1, help="Slave address"
+)
+@click.option("-b", "--baudrate", type=int, default=9600, help="Simulated line rate")
+@click.option("--load", type=click.FloatRange(0.0), help="Load resistance in Ohm")
+def main(model: str, address: int, baudrate: int, load: float) -> None:
+    """Runs a simulated power supply until interrupted."""
+    with HM3xxPSimulator(model, address, baudrate, load_resistance=load) as sim:
+        click.echo(f"{model} simulator listening on {sim.port}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()  # pragma: no cover
@@ -0,0 +1,234 @@
+# src/hm310p_cli/hm310p_telemetry.py
+# -*- coding: utf-8 -*-
+"""Fixed size telemetry history with windowed statistics.
+
+:class:`TelemetryBuffer` keeps the latest samples of voltage, current,
+power and protect state in one preallocated structured NumPy array. An
+append overwrites the oldest slot, so a run of any length uses the memory
+allocated at construction. Windowed minimum, maximum, mean and RMS are
+computed on the array without a Python loop per sample.
+
+Energy and charge are integrated with the trapezoidal rule on every
+append. They cover the whole run, not only the samples still held by the
+buffer.
+
+Requires the optional NumPy dependency::
+
+    $ pip install hm310p-cli[analysis]
+
+Example:
+    Watch the last minute of a day long run::
+
+        telemetry = TelemetryBuffer(capacity=86400)
+        while True:
+            telemetry.record(psupply)
+            print(telemetry.statistics(seconds=60.0)["current"].mean)
+
+"""
+from typing import Any, Dict, Optional, Tuple
+
+# third party imports
+import numpy as np
+
+# project imports
+from hm310p_cli.hm310p import OutputSnapshot
+
+#: record layout of a telemetry sample
+TELEMETRY_DTYPE = np.dtype(
+    [
+        ("timestamp", "<f8"),
+        ("voltage", "<f4"),
+        ("current", "<f4"),
+        ("power", "<f4"),
+        ("protect", "<u2"),
+    ]
+)
+
+#: fields summarized by TelemetryBuffer.statistics()
+QUANTITIES = ("voltage", "current", "power")
+
+
+class WindowStatistics:
+    """Summary of one quantity over a window of samples.
+
+    Attributes:
+        count (int): number of samples in the window
+        minimum (float): smallest value
+        maximum (float): largest value
+        mean (float): arithmetic mean
+        rms (float): root mean square
+
+    """
+
+    __slots__ = ("count", "minimum", "maximum", "mean", "rms")
+
+    def __init__(
+        self, count: int, minimum: float, maximum: float, mean: float, rms: float
+    ) -> None:
+        self.count = count
+        self.minimum = minimum
+        self.maximum = maximum
+        self.mean = mean
+        self.rms = rms
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{s}={getattr(self, s)}" for s in self.__slots__)
+        return f"WindowStatistics({fields})"
+
+
+class TelemetryBuffer:
+    """Ring buffer of the latest capacity samples.
+
+    Args:
+        capacity (int): number of samples kept, one day at 1 Hz by default
+
+    Attributes:
+        appended (int): samples appended since construction
+        energy (float): integrated energy in Wh
+        charge (float): integrated charge in Ah
+
+    """
+
+    def __init__(self, capacity: int = 86400) -> None:
+        if capacity < 1:
+            raise ValueError("Capacity must be positive.")
+        self.capacity: int = capacity
+        self.appended: int = 0
+        self.energy: float = 0.0
+        self.charge: float = 0.0
+        self._data = np.zeros(capacity, dtype=TELEMETRY_DTYPE)
+        self._next = 0
+        self._last: Optional[Tuple[float, float, float]] = None
+
+    def __len__(self) -> int:
+        return min(self.appended, self.capacity)
+
+    @property
+    def nbytes(self) -> int:
+        """Returns the size of the sample storage in bytes."""
+        return self._data.nbytes
+
+    def append(
+        self,
+        voltage: float,
+        current: float,
+        power: float,
+        timestamp: float,
+        protect: int = 0,
+    ) -> None:
+        """Stores one sample, overwriting the oldest one when full.
+
+        Samples must arrive in order of their timestamps. A sample not
+        newer than its predecessor is stored but adds no energy or charge.
+
+        """
+        last = self._last
+        if last is not None:
+            elapsed = timestamp - last[0]
+            if elapsed > 0:
+                self.energy += (power + last[1]) * elapsed / 7200.0
+                self.charge += (current + last[2]) * elapsed / 7200.0
+        self._last = (timestamp, power, current)
+        self._data[self._next] = (timestamp, voltage, current, power, protect)
+        self._next = (self._next + 1) % self.capacity
+        self.appended += 1
+
+    def append_snapshot(self, snapshot: OutputSnapshot, protect: int = 0) -> None:
+        """Stores a snapshot read by the driver."""
+        self.append(
+            snapshot.voltage,
+            snapshot.current,
+            snapshot.power,
+            snapshot.timestamp,
+            protect,
+        )
+
+    def record(self, psupply: Any, protect: bool = True) -> OutputSnapshot:
+        """Reads and stores one sample.
+
+        Args:
+            psupply (Any): HM310P driver
+            protect (bool): also read the protect state, which costs a
+                second transaction
+
+        Returns:
+            OutputSnapshot: the stored snapshot
+
+        """
+        snapshot = psupply.read_output_snapshot()
+        state = psupply.get_protectstate() if protect else 0
+        self.append_snapshot(snapshot, state)
+        return snapshot
+
+    def samples(self, last: Optional[int] = None) -> np.ndarray:
+        """Returns a copy of the latest samples, oldest first.
+
+        Args:
+            last (int): number of samples, None for all held samples
+
+        Returns:
+            np.ndarray: structured array of TELEMETRY_DTYPE
+
+        """
+        size = len(self)
+        count = size if last is None else max(0, min(last, size))
+        start = (self._next - count) % self.capacity
+        if start + count <= self.capacity:
+            return self._data[start : start + count].copy()
+        return np.concatenate((self._data[start:], self._data[: self._next]))
+
+    def window(self, seconds: float) -> np.ndarray:
+        """Returns samples of the last seconds before the newest sample."""
+        data = self.samples()
+        if not len(data):
+            return data
+        newest = data["timestamp"][-1]
+        first = np.searchsorted(data["timestamp"], newest - seconds, side="left")
+        return data[first:]
+
+    def statistics(
+        self, seconds: Optional[float] = None, last: Optional[int] = None
+    ) -> Dict[str, WindowStatistics]:
+        """Returns minimum, maximum, mean and RMS of each quantity.
+
+        Args:
+            seconds (float): window length in seconds, takes precedence
+            last (int): window length in samples, None for all samples
+
+        Returns:
+            Dict[str, WindowStatistics]: statistics keyed by quantity, empty
+            if the window holds no sample
+
+        """
+        data = self.window(seconds) if seconds is not None else self.samples(last)
+        if not len(data):
+            return {}
+        values = np.stack([data[name] for name in QUANTITIES]).astype(np.float64)
+        minimum = values.min(axis=1)
+        maximum = values.max(axis=1)
+        mean = values.mean(axis=1)
+        rms = np.sqrt(np.mean(values * values, axis=1))
+        return {
+            name: WindowStatistics(
+                len(data),
+                float(minimum[i]),
+                float(maximum[i]),
+                float(mean[i]),
+                float(rms[i]),
+            )
+            for i, name in enumerate(QUANTITIES)
+        }
+
+    def protect_events(self, seconds: Optional[float] = None) -> np.ndarray:
+        """Returns samples whose protect state differs from its predecessor."""
+        data = self.window(seconds) if seconds is not None else self.samples()
+        if len(data) < 2:
+            return data[:0]
+        changed = np.flatnonzero(np.diff(data["protect"].astype(np.int32)))
+        return data[changed + 1]
+
+    def reset_integrals(self) -> None:
+        """Restarts energy and charge at zero from the next sample on."""
+        self.energy = 0.0
+        self.charge = 0.0
+        self._last = None
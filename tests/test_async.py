@@ -0,0 +1,137 @@
+# tests/test_async.py
+import asyncio
+import contextlib
+import threading
+
+import minimalmodbus
+import pytest
+
+from hm310p_cli.hm310p import HM310P
+from hm310p_cli.hm310p_async import AsyncHM310P
+from hm310p_cli.hm310p_cache import IdentityCache
+from hm310p_cli.hm310p_constants import PowerState
+from hm310p_cli.hm310p_regdefs import HM3xxpRegisters as Reg
+from hm310p_cli.hm310p_simulator import HM3xxPSimulator
+
+
+@pytest.fixture
+def simulator():
+    with HM3xxPSimulator(latency=False, load_resistance=10.0) as sim:
+        yield sim
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_open_and_switch_output(simulator):
+    async def session():
+        async with await AsyncHM310P.open(simulator.port, 1) as psupply:
+            assert psupply.model == 3010 and psupply.max_current == 10.0
+            await psupply.set_voltage(12.0)
+            await psupply.set_current(2.0)
+            await psupply.set_powerstate(PowerState.On)
+            assert await psupply.get_voltage() == 12.0
+            assert await psupply.get_powerstate() == PowerState.On
+            return await psupply.read_output_snapshot()
+
+    snapshot = run(session())
+    assert snapshot.voltage == pytest.approx(12.0)
+    assert snapshot.current == pytest.approx(1.2)
+    assert simulator.registers[Reg.PS_PowerSwitch] == 1
+
+
+def test_protection_and_memory(simulator):
+    async def session():
+        async with await AsyncHM310P.open(simulator.port, 1) as psupply:
+            assert await psupply.get_ovp() == 33.0
+            await psupply.set_ocp(1.5)
+            await psupply.set_opp(50.0)
+            await psupply.set_memory("M2", 5.0, 0.5)
+            return (
+                await psupply.get_ocp(),
+                await psupply.get_opp(),
+                await psupply.get_memory("M2"),
+            )
+
+    ocp, opp, memory = run(session())
+    assert ocp == 1.5 and opp == pytest.approx(50.0)
+    assert memory == pytest.approx([5.0, 0.5])
+
+
+def test_channel_list_is_checked_like_the_sync_driver(simulator):
+    async def session():
+        async with await AsyncHM310P.open(simulator.port, 1) as psupply:
+            before = simulator.transactions
+            with pytest.raises(ValueError) as excinfo:
+                await psupply.set_voltage_and_current_of_channel_list(
+                    ["M1", "M9"], 5.0, 1.0
+                )
+            assert simulator.transactions == before
+            await psupply.set_voltage_and_current_of_channel_list(
+                ["M1", "Preset"], 5.0, 1.0
+            )
+            return str(excinfo.value)
+
+    psupply = HM310P(simulator.port, 1)
+    try:
+        with pytest.raises(ValueError) as excinfo:
+            psupply.set_voltage_and_current_of_channel_list(["M9"], 5.0, 1.0)
+    finally:
+        psupply.serial.close()
+    assert run(session()) == str(excinfo.value)
+    assert simulator.registers[Reg.PS_SetVoltage] == 500
+
+
+def test_supplies_are_read_concurrently():
+    async def session(ports):
+        supplies = [await AsyncHM310P.open(port, 1) for port in ports]
+        try:
+            await asyncio.gather(*(psu.set_voltage(3.3) for psu in supplies))
+            return await asyncio.gather(*(psu.get_voltage() for psu in supplies))
+        finally:
+            for psu in supplies:
+                await psu.close()
+
+    with contextlib.ExitStack() as stack:
+        sims = [stack.enter_context(HM3xxPSimulator(latency=False)) for _ in range(3)]
+        assert run(session([sim.port for sim in sims])) == [3.3] * 3
+        assert all(sim.registers[Reg.PS_SetVoltage] == 330 for sim in sims)
+
+
+def test_identity_cache_and_missing_slave(simulator, tmp_path):
+    cache = IdentityCache(str(tmp_path / "identity.json"))
+
+    async def session():
+        await (await AsyncHM310P.open(simulator.port, 1, cache)).close()
+        before = simulator.transactions
+        await (await AsyncHM310P.open(simulator.port, 1, cache)).close()
+        assert simulator.transactions == before
+        with pytest.raises(minimalmodbus.NoResponseError):
+            await AsyncHM310P.open(simulator.port, 2, timeout=0.05)
+
+    run(session())
+    assert cache.load(simulator.port, 1).model == 3010
+
+
+def test_identity_cache_is_used_off_the_event_loop(simulator, tmp_path):
+    calls = []
+
+    class RecordingCache(IdentityCache):
+        def load(self, *args, **kwargs):
+            calls.append(("load", threading.get_ident()))
+            return super().load(*args, **kwargs)
+
+        def store(self, *args, **kwargs):
+            calls.append(("store", threading.get_ident()))
+            return super().store(*args, **kwargs)
+
+    cache = RecordingCache(str(tmp_path / "identity.json"))
+
+    async def session():
+        await (await AsyncHM310P.open(simulator.port, 1, cache)).close()
+        return threading.get_ident()
+
+    loop_thread = run(session())
+    assert [name for name, _ in calls] == ["load", "store"]
+    assert all(thread != loop_thread for _, thread in calls)
@@ -0,0 +1,55 @@
+# tests/test_baudrate.py
+import click.testing
+import minimalmodbus
+import pytest
+
+from hm310p_cli import console
+from hm310p_cli.hm310p import HM310P
+from hm310p_cli.hm310p_baudrate import detect_baudrate, probe_baudrates
+from hm310p_cli.hm310p_cache import DeviceIdentity, IdentityCache
+from hm310p_cli.hm310p_simulator import HM3xxPSimulator
+
+
+def test_probe_reports_only_configured_rate():
+    with HM3xxPSimulator(baudrate=38400, latency=False) as sim:
+        results = probe_baudrates(sim.port, 1, (9600, 38400), attempts=2)
+    assert [(r.baudrate, r.reliable) for r in results] == [
+        (9600, False),
+        (38400, True),
+    ]
+    assert results[1].tps > 0
+    assert results[0].tps == 0
+
+
+def test_detect_caches_rate(tmp_path):
+    cache = IdentityCache(str(tmp_path / "identity.json"))
+    with HM3xxPSimulator(baudrate=115200, latency=False) as sim:
+        assert detect_baudrate(sim.port, 1, attempts=2, identity_cache=cache) == 115200
+        assert cache.load_baudrate(sim.port, 1) == 115200
+        cache.store(sim.port, 1, DeviceIdentity(3010, 0x4B58, 0x0233))
+        assert cache.load_baudrate(sim.port, 1) == 115200
+        before = sim.transactions
+        assert detect_baudrate(sim.port, 1, identity_cache=cache) == 115200
+        assert sim.transactions - before == 1
+
+
+def test_detect_without_response_raises():
+    with HM3xxPSimulator(slaveaddress=5, latency=False) as sim:
+        with pytest.raises(minimalmodbus.NoResponseError):
+            detect_baudrate(sim.port, 1, (9600,), attempts=1)
+
+
+def test_driver_at_fast_rate():
+    with HM3xxPSimulator(baudrate=57600, latency=False) as sim:
+        psupply = HM310P(sim.port, 1, baudrate=57600)
+        assert psupply.get_model() == 3010
+        psupply.serial.close()
+
+
+def test_console_set_with_auto_baudrate():
+    with HM3xxPSimulator(baudrate=19200, latency=False) as sim:
+        args = ["-p", sim.port, "-b", "auto", "--no-cache"]
+        args += ["-s", "on", "-V", "5", "-I", "1"]
+        result = click.testing.CliRunner().invoke(console.main, args)
+        assert result.exit_code == 0, result.output
+        assert sim.registers[0x0001] == 1
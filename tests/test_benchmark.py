@@ -0,0 +1,19 @@
+# tests/test_benchmark.py
+from hm310p_cli.hm310p_benchmark import find_regressions, run_benchmark, summarize
+
+
+def test_summarize_percentiles():
+    stats = summarize([0.004, 0.001, 0.002, 0.003])
+    assert stats["iterations"] == 4
+    assert stats["p50"] == 0.003
+    assert stats["p99"] == 0.004
+    assert stats["tps"] == 400
+
+
+def test_run_benchmark_covers_methods_cold_start_and_console():
+    results = run_benchmark(iterations=1, latency=False)
+    assert "read_output_snapshot" in results["methods"]
+    assert "set_voltage_and_current_of_channel_list" in results["methods"]
+    assert results["cold_start"]["iterations"] == 1
+    assert results["console_on"]["iterations"] == 1
+    assert find_regressions(results, results, 0.0) == []
@@ -0,0 +1,117 @@
+# tests/test_bus.py
+import contextlib
+import threading
+import time
+from typing import List
+
+import minimalmodbus
+import pytest
+
+from hm310p_cli.hm310p_bus import FairScheduler, HM310PBus
+from hm310p_cli.hm310p_cache import DeviceIdentity, IdentityCache
+from hm310p_cli.hm310p_constants import BusPriority
+from hm310p_cli.hm310p_retry import RetryPolicy
+from hm310p_cli.hm310p_simulator import HM3xxPSimulator
+
+
+def _enqueue(scheduler: FairScheduler, slave: int, priority: BusPriority, log: List):
+    def run():
+        scheduler.acquire(slave, priority)
+        log.append((slave, priority))
+        scheduler.release()
+
+    thread = threading.Thread(target=run)
+    expected = scheduler.pending() + 1
+    thread.start()
+    while scheduler.pending() < expected:
+        time.sleep(0.001)
+    return thread
+
+
+def test_scheduler_serves_priorities_then_round_robin():
+    scheduler = FairScheduler()
+    log: List = []
+    scheduler.acquire(0, BusPriority.Control)
+    threads = [
+        _enqueue(scheduler, 1, BusPriority.Bulk, log),
+        _enqueue(scheduler, 1, BusPriority.Control, log),
+        _enqueue(scheduler, 1, BusPriority.Control, log),
+        _enqueue(scheduler, 2, BusPriority.Control, log),
+        _enqueue(scheduler, 3, BusPriority.Protection, log),
+    ]
+    assert scheduler.pending(1) == 3
+    scheduler.release()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert log == [
+        (3, BusPriority.Protection),
+        (1, BusPriority.Control),
+        (2, BusPriority.Control),
+        (1, BusPriority.Control),
+        (1, BusPriority.Bulk),
+    ]
+    assert scheduler.pending() == 0
+
+
+def test_retry_does_not_flush_another_slaves_response(tmp_path):
+    cache = IdentityCache(str(tmp_path / "identity.json"))
+    with HM3xxPSimulator() as sim, HM310PBus(sim.port) as bus:
+        cache.store(sim.port, 2, DeviceIdentity(3010, 0x4B58, 0x0233))
+        polled = bus.device(1)
+        missing = bus.device(2, identity_cache=cache)  # never answers
+        missing.retry_policy = RetryPolicy(3, backoff=0.005)
+        holding = threading.local()
+        flushes: List[bool] = []
+        transaction = bus.transaction
+        reset_input_buffer = bus.serial.reset_input_buffer
+
+        @contextlib.contextmanager
+        def tracked(*args):
+            with transaction(*args):
+                holding.bus = True
+                try:
+                    yield
+                finally:
+                    holding.bus = False
+
+        def tracked_reset():
+            flushes.append(getattr(holding, "bus", False))
+            reset_input_buffer()
+
+        bus.transaction = tracked
+        bus.serial.reset_input_buffer = tracked_reset
+        stop = threading.Event()
+        errors: List[BaseException] = []
+
+        def poll():
+            while not stop.is_set():
+                try:
+                    polled.read_output_snapshot()
+                except Exception as exc:
+                    errors.append(exc)
+
+        thread = threading.Thread(target=poll)
+        thread.start()
+        try:
+            for _ in range(2):
+                with pytest.raises(minimalmodbus.NoResponseError):
+                    missing.get_voltage()
+        finally:
+            stop.set()
+            thread.join()
+        assert missing.retry_statistics.retries == 6
+        assert errors == []
+        assert flushes and all(flushes)  # only with the bus held
+
+
+def test_devices_use_the_line_rate_of_the_bus(tmp_path):
+    cache = IdentityCache(str(tmp_path / "identity.json"))
+    with HM3xxPSimulator(baudrate=19200, latency=False) as sim:
+        cache.store(sim.port, 2, DeviceIdentity(3010, 0x4B58, 0x0233))
+        with HM310PBus(sim.port, baudrate=19200) as bus:
+            polled = bus.device(1)
+            other = bus.device(2, identity_cache=cache)
+            assert polled.baudrate == other.baudrate == 19200
+            assert bus.serial.baudrate == 19200
+            polled.set_voltage(5.0)
+            assert polled.get_voltage() == 5.0
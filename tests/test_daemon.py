@@ -0,0 +1,103 @@
+# tests/test_daemon.py
+import os
+import stat
+import threading
+
+import click.testing
+import pytest
+
+from hm310p_cli import console
+from hm310p_cli.hm310p_client import DaemonClient, DaemonError, METHOD_NOT_FOUND
+from hm310p_cli.hm310p_daemon import DeviceRegistry, HM310PDaemon
+from hm310p_cli.hm310p_regdefs import HM3xxpRegisters as Reg
+from hm310p_cli.hm310p_simulator import HM3xxPSimulator
+
+
+@pytest.fixture
+def simulator():
+    with HM3xxPSimulator(latency=False, load_resistance=100.0) as sim:
+        yield sim
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    server = HM310PDaemon(str(tmp_path / "hm310p.sock"), DeviceRegistry())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    thread.join()
+    server.server_close()
+
+
+def test_device_is_opened_once(simulator, daemon):
+    with DaemonClient(daemon.path) as client:
+        assert client.call("ping") == "pong"
+        assert client.device_call(simulator.port, 1, "get_model") == 3010
+        before = simulator.transactions
+        client.device_call(simulator.port, 1, "set_voltage", 5.0)
+        assert client.device_call(simulator.port, 1, "get_voltage") == 5.0
+        assert simulator.transactions - before == 2
+        snapshot = client.device_call(simulator.port, 1, "read_output_snapshot")
+        assert snapshot["voltage"] == 0.0
+        assert client.call("devices") == [
+            {"port": simulator.port, "address": 1, "model": 3010}
+        ]
+
+
+def test_errors_are_reported(simulator, daemon):
+    with DaemonClient(daemon.path) as client:
+        with pytest.raises(DaemonError) as excinfo:
+            client.device_call(simulator.port, 1, "write_register", 0x9999, 2)
+        assert excinfo.value.code == METHOD_NOT_FOUND
+        with pytest.raises(DaemonError):
+            client.device_call(simulator.port, 1, "set_voltage", 99.0)
+        assert client.call("ping") == "pong"
+
+
+def test_socket_is_owner_only(daemon):
+    assert stat.S_IMODE(os.stat(daemon.path).st_mode) & 0o077 == 0
+
+
+def test_close_waits_for_running_transaction(simulator):
+    registry = DeviceRegistry()
+    registry.call(simulator.port, 1, lambda psupply: None)
+    started, release = threading.Event(), threading.Event()
+
+    def slow(psupply):
+        started.set()
+        release.wait(5)
+        return psupply.serial.is_open
+
+    results = []
+    worker = threading.Thread(
+        target=lambda: results.append(registry.call(simulator.port, 1, slow))
+    )
+    worker.start()
+    started.wait(5)
+    closer = threading.Thread(target=registry.close)
+    closer.start()
+    closer.join(0.1)
+    assert closer.is_alive()  # blocked on the port lock
+    release.set()
+    worker.join()
+    closer.join()
+    assert results == [True] and registry.devices() == []
+
+
+def test_second_daemon_on_same_socket_fails(daemon):
+    with pytest.raises(OSError):
+        HM310PDaemon(daemon.path, DeviceRegistry())
+
+
+def test_console_forwards_to_daemon(simulator, daemon):
+    runner = click.testing.CliRunner()
+    args = ["-p", simulator.port, "-S", daemon.path, "-s", "on", "-V", "12"]
+    result = runner.invoke(console.main, args + ["-I", "1"])
+    assert result.exit_code == 0, result.output
+    assert simulator.registers[Reg.PS_PowerSwitch] == 1
+    assert simulator.registers[Reg.PS_SetVoltage] == 1200
+    args = ["call", "-S", daemon.path, "-p", simulator.port, "get_voltage", "Output"]
+    result = runner.invoke(console.cli, args)
+    assert result.exit_code == 0, result.output
+    assert float(result.output) == 12.0
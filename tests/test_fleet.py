@@ -0,0 +1,82 @@
+# tests/test_fleet.py
+import contextlib
+
+import click.testing
+import minimalmodbus
+import pytest
+
+from hm310p_cli import console
+from hm310p_cli.hm310p_constants import PowerState
+from hm310p_cli.hm310p_fleet import run_on_devices
+from hm310p_cli.hm310p_inventory import DeviceSpec, load_inventory, write_inventory
+from hm310p_cli.hm310p_plan import set_output_state
+from hm310p_cli.hm310p_regdefs import HM3xxpRegisters as Reg
+from hm310p_cli.hm310p_simulator import HM3xxPSimulator
+
+
+@pytest.fixture
+def simulators():
+    with contextlib.ExitStack() as stack:
+        yield [stack.enter_context(HM3xxPSimulator()) for _ in range(3)]
+
+
+def test_parse_and_inventory_round_trip(tmp_path):
+    assert DeviceSpec.parse("/dev/ttyUSB0:2") == DeviceSpec("/dev/ttyUSB0", 2)
+    assert DeviceSpec.parse("COM3") == DeviceSpec("COM3")
+    specs = [DeviceSpec("/dev/ttyUSB0", 1, 19200, "slot1"), DeviceSpec("COM3")]
+    path = str(tmp_path / "rack.json")
+    write_inventory(path, specs)
+    assert load_inventory(path) == specs
+    (tmp_path / "bad.json").write_text('{"devices": [{"address": 1}]}')
+    with pytest.raises(ValueError):
+        load_inventory(str(tmp_path / "bad.json"))
+
+
+def test_parallel_configuration_isolates_failures(simulators, tmp_path):
+    specs = [DeviceSpec(sim.port) for sim in simulators]
+    specs.insert(1, DeviceSpec(str(tmp_path / "missing")))
+    report = run_on_devices(
+        specs, lambda dev: set_output_state(dev, PowerState.On, 5.0, 1.0), retries=0
+    )
+    assert [result.spec for result in report.results] == specs
+    assert [result.ok for result in report.results] == [True, False, True, True]
+    assert report.results[0].result == 2
+    for sim in simulators:
+        assert sim.registers[Reg.PS_SetVoltage] == 500
+        assert sim.registers[Reg.PS_PowerSwitch] == 1
+    # the devices were configured side by side, not one after the other
+    assert report.elapsed < 0.8 * sum(result.elapsed for result in report.results)
+
+
+def test_console_set_inventory(simulators, tmp_path):
+    path = str(tmp_path / "rack.json")
+    write_inventory(path, [DeviceSpec(sim.port) for sim in simulators[1:]])
+    args = ["set", "-p", simulators[0].port, "-i", path, "--no-cache"]
+    args += ["-s", "on", "-V", "12", "-I", "2"]
+    result = click.testing.CliRunner().invoke(console.cli, args)
+    assert result.exit_code == 0, result.output
+    assert result.output.count("writes") == 3
+    for sim in simulators:
+        assert sim.registers[Reg.PS_SetVoltage] == 1200
+        assert sim.registers[Reg.PS_ProtectVol] == 1260
+
+
+def test_console_set_uses_baudrate_of_inventory(tmp_path):
+    path = str(tmp_path / "rack.json")
+    with HM3xxPSimulator(baudrate=19200, latency=False) as sim:
+        write_inventory(path, [DeviceSpec(sim.port, 1, 19200)])
+        args = ["set", "-i", path, "--no-cache", "-s", "on", "-V", "5", "-I", "1"]
+        runner = click.testing.CliRunner()
+        result = runner.invoke(console.cli, args + ["--dry-run"])
+        assert result.exit_code == 0, result.output
+        assert "at 19200 Bd" in result.output
+        result = runner.invoke(console.cli, args)
+        assert result.exit_code == 0, result.output
+        assert sim.registers[Reg.PS_SetVoltage] == 500
+
+
+def test_failed_open_releases_the_port(tmp_path):
+    with HM3xxPSimulator(latency=False) as sim:
+        report = run_on_devices([DeviceSpec(sim.port, 2)], lambda dev: None, retries=0)
+        assert [result.ok for result in report.results] == [False]
+        assert sim.port not in minimalmodbus._serialports
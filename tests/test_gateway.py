@@ -0,0 +1,116 @@
+# tests/test_gateway.py
+import asyncio
+import gc
+import struct
+
+import serial
+
+from hm310p_cli import hm310p_rtu as rtu
+from hm310p_cli.hm310p_async import AsyncSerialTransport
+from hm310p_cli.hm310p_gateway import (
+    GATEWAY_TARGET_FAILED,
+    ILLEGAL_DATA_ADDRESS,
+    ILLEGAL_FUNCTION,
+    ModbusTcpGateway,
+)
+from hm310p_cli.hm310p_regdefs import HM3xxpRegisters as Reg
+from hm310p_cli.hm310p_simulator import HM3xxPSimulator
+
+
+async def request(host, port, unit, pdu):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(struct.pack(">HHHB", 7, 0, len(pdu) + 1, unit) + pdu)
+    header = await reader.readexactly(7)
+    transaction, protocol, length, reply_unit = struct.unpack(">HHHB", header)
+    response = await reader.readexactly(length - 1)
+    writer.close()
+    assert (transaction, protocol, reply_unit) == (7, 0, unit)
+    return response
+
+
+async def scenario(sim):
+    transport = await AsyncSerialTransport.open(sim.port)
+    gateway = ModbusTcpGateway(transport, freshness=0.5)
+    await gateway.start("127.0.0.1", 0)
+    host, port = gateway.sockets[0]
+    try:
+        before = sim.transactions
+        write = struct.pack(">BHH", 0x06, Reg.PS_SetVoltage, 1200)
+        assert await request(host, port, 1, write) == write
+        await request(host, port, 1, rtu.write_register_pdu(Reg.PS_SetCurrent, 2000))
+        await request(host, port, 1, rtu.write_register_pdu(Reg.PS_PowerSwitch, 1))
+        reads = [
+            rtu.read_registers_pdu(Reg.PS_Voltage, 1),
+            rtu.read_registers_pdu(Reg.PS_Current, 1),
+            rtu.read_registers_pdu(Reg.PS_Voltage, 5),
+            rtu.read_registers_pdu(Reg.PS_PowerH, 2),
+        ]
+        responses = await asyncio.gather(
+            *(request(host, port, 255, pdu) for pdu in reads)
+        )
+        assert responses[0] == bytes([3, 2]) + struct.pack(">H", 1200)
+        assert responses[1] == bytes([3, 2]) + struct.pack(">H", 1200)
+        assert responses[2][:6] == bytes([3, 10]) + struct.pack(">HH", 1200, 1200)
+        assert responses[3] == bytes([3, 4]) + struct.pack(">HH", 0, 14400)
+        assert sim.transactions - before == 4
+        stats = gateway.statistics
+        assert stats.coalesced + stats.cached == 3
+
+        bad = rtu.read_registers_pdu(0x0050, 1)
+        assert await request(host, port, 1, bad) == bytes([0x83, ILLEGAL_DATA_ADDRESS])
+        assert await request(host, port, 1, b"\x01\x00\x00\x00\x01") == bytes(
+            [0x81, ILLEGAL_FUNCTION]
+        )
+        assert sim.transactions - before == 4
+        model = rtu.read_registers_pdu(Reg.PS_Model, 1)
+        assert await request(host, port, 9, model) == bytes(
+            [0x83, GATEWAY_TARGET_FAILED]
+        )
+    finally:
+        await gateway.close()
+        transport.close()
+
+
+def test_gateway_coalesces_and_validates():
+    with HM3xxPSimulator(load_resistance=10.0) as sim:
+        asyncio.run(scenario(sim))
+
+
+class FailingTransport:
+    def __init__(self, error):
+        self.error = error
+
+    async def transact_frame(self, slave, request_pdu):
+        raise self.error
+
+
+def test_serial_failure_is_answered_as_gateway_target_failed():
+    gateway = ModbusTcpGateway(FailingTransport(serial.SerialException("gone")))
+    write = rtu.write_register_pdu(Reg.PS_SetVoltage, 500)
+    read = rtu.read_registers_pdu(Reg.PS_Voltage, 1)
+    assert asyncio.run(gateway.handle(1, write)) == bytes(
+        [0x86, GATEWAY_TARGET_FAILED]
+    )
+    assert asyncio.run(gateway.handle(1, read)) == bytes(
+        [0x83, GATEWAY_TARGET_FAILED]
+    )
+
+
+def test_failed_block_read_leaves_no_unretrieved_exception():
+    contexts = []
+
+    async def session():
+        asyncio.get_running_loop().set_exception_handler(
+            lambda loop, context: contexts.append(context)
+        )
+        gateway = ModbusTcpGateway(FailingTransport(OSError("gone")))
+        try:
+            await gateway.handle(1, rtu.read_registers_pdu(Reg.PS_Voltage, 1))
+        except OSError:
+            failed = True
+        del gateway
+        gc.collect()  # the future is logged when it is collected
+        return failed
+
+    assert asyncio.run(session())
+    assert contexts == []
@@ -0,0 +1,109 @@
+# tests/test_group.py
+import contextlib
+import json
+
+import click.testing
+import pytest
+
+from hm310p_cli import console
+from hm310p_cli.hm310p import HM310P
+from hm310p_cli.hm310p_constants import PowerState
+from hm310p_cli.hm310p_group import (
+    GroupAbortedError,
+    run_sequence,
+    stage_output_state,
+    switch_group,
+)
+from hm310p_cli.hm310p_regdefs import HM3xxpRegisters as Reg
+from hm310p_cli.hm310p_simulator import HM3xxPSimulator
+
+
+@pytest.fixture
+def simulators():
+    with contextlib.ExitStack() as stack:
+        yield [stack.enter_context(HM3xxPSimulator()) for _ in range(3)]
+
+
+@pytest.fixture
+def devices(simulators):
+    devices = [HM310P(sim.port, 1) for sim in simulators]
+    yield devices
+    for device in devices:
+        device.serial.close()
+
+
+def test_switch_group_stages_and_releases_together(devices, simulators):
+    report = switch_group(
+        devices, PowerState.On, lambda dev: stage_output_state(dev, 5.0, 1.0)
+    )
+    assert report.ok
+    for sim in simulators:
+        assert sim.registers[Reg.PS_SetVoltage] == 500
+        assert sim.registers[Reg.PS_PowerSwitch] == 1
+    # the writes start together although each one takes a transaction time
+    assert report.skew < report.max_duration
+
+
+def test_failed_staging_switches_nothing(devices, simulators):
+    def stage(dev):
+        if dev is devices[1]:
+            raise ValueError("bad setpoint")
+        stage_output_state(dev, 5.0, 1.0)
+
+    report = switch_group(devices, PowerState.On, stage)
+    assert not report.ok
+    assert isinstance(report.timings[1].error, ValueError)
+    assert isinstance(report.timings[0].error, GroupAbortedError)
+    assert all(sim.registers[Reg.PS_PowerSwitch] == 0 for sim in simulators)
+
+
+def test_sequence_delays_groups(devices, simulators):
+    reports = run_sequence([devices[:1], devices[1:]], PowerState.On, delays=0.1)
+    assert [report.ok for report in reports] == [True, True]
+    gap = reports[1].released - reports[0].released
+    assert 0.1 <= gap < 0.15
+    with pytest.raises(ValueError):
+        run_sequence([devices[:1], devices[1:]], PowerState.On, delays=[0.1, 0.2])
+
+
+def test_failed_staging_reports_each_group(devices, simulators):
+    def stage(dev):
+        if dev is devices[2]:
+            raise ValueError("bad setpoint")
+
+    reports = run_sequence([devices[:1], devices[1:]], PowerState.On, stage=stage)
+    assert [len(report.timings) for report in reports] == [1, 2]
+    assert isinstance(reports[0].timings[0].error, GroupAbortedError)
+    assert isinstance(reports[1].timings[1].error, ValueError)
+    assert all(sim.registers[Reg.PS_PowerSwitch] == 0 for sim in simulators)
+
+
+def test_console_power(simulators):
+    args = ["power", "on", "-p", simulators[0].port, "--no-cache", "-V", "3.3"]
+    args += ["-g", ",".join(sim.port for sim in simulators[1:]), "--delay", "0.05"]
+    result = click.testing.CliRunner().invoke(console.cli, args)
+    assert result.exit_code == 0, result.output
+    lines = [
+        json.loads(line)
+        for line in result.output.splitlines()
+        if line.startswith('{"group"')
+    ]
+    assert [line["devices"] for line in lines] == [1, 2]
+    assert lines[1]["released_ms"] >= 50.0
+    for sim in simulators:
+        assert sim.registers[Reg.PS_SetVoltage] == 330
+        assert sim.registers[Reg.PS_PowerSwitch] == 1
+
+
+def test_console_power_staging_failure(simulators):
+    args = ["power", "on", "-p", simulators[0].port, "--no-cache", "-V", "99"]
+    args += ["-g", ",".join(sim.port for sim in simulators[1:])]
+    result = click.testing.CliRunner().invoke(console.cli, args)
+    assert result.exit_code == 1
+    lines = [
+        json.loads(line)
+        for line in result.output.splitlines()
+        if line.startswith('{"group"')
+    ]
+    assert [(line["group"], line["devices"]) for line in lines] == [(0, 1), (1, 2)]
+    assert not any(line["ok"] for line in lines)
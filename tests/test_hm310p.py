@@ -0,0 +1,152 @@
+# tests/test_hm310p.py
+from typing import Dict, List
+
+import click.testing
+import minimalmodbus
+import pytest
+import serial
+
+from hm310p_cli import console
+from hm310p_cli.hm310p import HM310P, OutputSnapshot
+from hm310p_cli.hm310p_cache import DeviceIdentity, IdentityCache
+from hm310p_cli.hm310p_regdefs import HM3xxpRegisters as Reg
+from hm310p_cli.hm310p_simulator import HM3xxPSimulator
+
+
+fake_port = "/dev/ttyFAKE"
+
+
+class FakeHM310P(HM310P):
+    """HM310P backed by a register dictionary instead of a serial link."""
+
+    def __init__(self, registers: Dict[int, int], **kwargs) -> None:
+        self.registers = dict(registers)
+        self.transactions = 0
+        minimalmodbus._serialports[fake_port] = serial.serial_for_url("loop://")
+        super().__init__(fake_port, 1, **kwargs)
+
+    def read_register(self, registeraddress, number_of_decimals=0, *args, **kwargs):
+        self.transactions += 1
+        if number_of_decimals == 0:
+            return self.registers[registeraddress]
+        return self.registers[registeraddress] / 10 ** number_of_decimals
+
+    def read_registers(self, registeraddress, number_of_registers, *args, **kwargs):
+        self.transactions += 1
+        return [
+            self.registers[registeraddress + i] for i in range(number_of_registers)
+        ]
+
+    def read_long(self, registeraddress, *args, **kwargs):
+        self.transactions += 1
+        return (self.registers[registeraddress] << 16) | self.registers[
+            registeraddress + 1
+        ]
+
+    def write_register(self, registeraddress, value, number_of_decimals=0, *args):
+        self.transactions += 1
+        self.registers[registeraddress] = int(round(value * 10 ** number_of_decimals))
+
+    def write_registers(self, registeraddress, values: List[int]) -> None:
+        self.transactions += 1
+        for offset, value in enumerate(values):
+            self.registers[registeraddress + offset] = value
+
+    def write_long(self, registeraddress, value, *args, **kwargs):
+        self.transactions += 1
+        self.registers[registeraddress] = (value >> 16) & 0xFFFF
+        self.registers[registeraddress + 1] = value & 0xFFFF
+
+
+default_registers = {
+    Reg.PS_PowerSwitch: 0,
+    Reg.PS_ProtectStat: 0,
+    Reg.PS_Model: 3010,
+    Reg.PS_ClassDetail: 0x4B58,
+    Reg.PS_Decimals: 0x0233,
+    Reg.PS_Voltage: 1205,
+    Reg.PS_Current: 1500,
+    Reg.PS_PowerH: 0x0001,
+    Reg.PS_PowerL: 0x1A94,
+    Reg.PS_PowerCal: 0,
+}
+
+
+@pytest.fixture
+def psupply():
+    return FakeHM310P(default_registers)
+
+
+def test_read_output_snapshot_decodes_output_block(psupply):
+    snapshot = psupply.read_output_snapshot()
+    assert isinstance(snapshot, OutputSnapshot)
+    assert snapshot.voltage == pytest.approx(12.05)
+    assert snapshot.current == pytest.approx(1.5)
+    assert snapshot.power == pytest.approx(0x11A94 / 1000)
+    assert snapshot.timestamp > 0
+
+
+def test_read_output_snapshot_uses_a_single_transaction(psupply):
+    psupply.transactions = 0
+    psupply.read_output_snapshot()
+    assert psupply.transactions == 1
+
+
+def test_output_snapshot_is_slotted(psupply):
+    snapshot = psupply.read_output_snapshot()
+    with pytest.raises(AttributeError):
+        snapshot.extra = 1
+
+
+def test_identity_cache_skips_probe_on_warm_start(tmp_path):
+    cache = IdentityCache(str(tmp_path / "identity.json"))
+    cold = FakeHM310P(default_registers, identity_cache=cache)
+    assert cold.transactions == 1
+    warm = FakeHM310P(default_registers, identity_cache=cache)
+    assert warm.transactions == 0
+    assert warm.number_of_decimals_voltage == 2
+    assert warm.number_of_decimals_current == 3
+    assert warm.max_current == 10.0
+
+
+def test_identity_cache_invalidate(tmp_path):
+    cache = IdentityCache(str(tmp_path / "identity.json"))
+    identity = DeviceIdentity(3005, 0x4B58, 0x0233)
+    cache.store(fake_port, 1, identity)
+    assert cache.load(fake_port, 1) == identity
+    assert cache.load(fake_port, 2) is None
+    cache.invalidate(fake_port, 1)
+    assert cache.load(fake_port, 1) is None
+
+
+def test_identity_cache_invalidate_keeps_baudrate(tmp_path):
+    cache = IdentityCache(str(tmp_path / "identity.json"))
+    cache.store(fake_port, 1, DeviceIdentity(3005, 0x4B58, 0x0233))
+    cache.store_baudrate(fake_port, 1, 19200)
+    cache.invalidate(fake_port, 1, keep_baudrate=True)
+    assert cache.load(fake_port, 1) is None
+    assert cache.load_baudrate(fake_port, 1) == 19200
+
+
+def test_refresh_identity_replaces_stale_entry(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    runner = click.testing.CliRunner()
+    with HM3xxPSimulator(latency=False) as sim:
+        cache = IdentityCache()
+        cache.store(sim.port, 1, DeviceIdentity(3005, 0x4B58, 0x0233))  # stale
+        cache.store_baudrate(sim.port, 1, 9600)
+        args = ["script", "-p", sim.port]
+        result = runner.invoke(console.cli, args, input="set i 8\n")
+        assert result.exit_code == 1  # limited to the 5 A of the cached model
+        args.append("--refresh-identity")
+        result = runner.invoke(console.cli, args, input="set i 8\n")
+        assert result.exit_code == 0, result.output
+        assert sim.registers[Reg.PS_SetCurrent] == 8000
+        assert cache.load(sim.port, 1).model == 3010
+        assert cache.load_baudrate(sim.port, 1) == 9600
+
+
+def test_identity_cache_ignores_expired_entries(tmp_path):
+    cache = IdentityCache(str(tmp_path / "identity.json"), max_age=-1)
+    cache.store(fake_port, 1, DeviceIdentity(3010, 0x4B58, 0x0233))
+    assert cache.load(fake_port, 1) is None
@@ -0,0 +1,70 @@
+# tests/test_ivcurve.py
+import json
+
+import click.testing
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from hm310p_cli import console  # noqa: E402
+from hm310p_cli.hm310p import HM310P  # noqa: E402
+from hm310p_cli.hm310p_constants import PowerState  # noqa: E402
+from hm310p_cli.hm310p_ivcurve import IVCurve, sweep_iv  # noqa: E402
+from hm310p_cli.hm310p_ramp import linear_profile  # noqa: E402
+from hm310p_cli.hm310p_regdefs import HM3xxpRegisters as Reg  # noqa: E402
+from hm310p_cli.hm310p_simulator import HM3xxPSimulator  # noqa: E402
+
+
+@pytest.fixture
+def simulator():
+    with HM3xxPSimulator(latency=False, load_resistance=10.0) as sim:
+        yield sim
+
+
+def diode_curve():
+    voltage = np.linspace(0.0, 1.0, 101)
+    current = 1e-9 * np.expm1(voltage / 0.05)
+    current /= current[-1]
+    return IVCurve(voltage, voltage, current, voltage * current, np.arange(101.0))
+
+
+def test_knee_of_diode():
+    curve = diode_curve()
+    assert 0.8 < curve.voltage[curve.knee()] < 0.95
+    flat = IVCurve(*np.zeros((5, 4)))
+    assert flat.knee() is None
+    assert np.isnan(flat.dynamic_resistance()).all()
+
+
+def test_save_and_load(tmp_path):
+    curve = diode_curve()
+    curve.save(str(tmp_path / "diode.npz"))
+    loaded = IVCurve.load(str(tmp_path / "diode.npz"))
+    np.testing.assert_array_equal(loaded.current, curve.current)
+    assert loaded.summary() == curve.summary()
+
+
+def test_sweep_resistor(simulator):
+    psupply = HM310P(simulator.port, 1)
+    psupply.set_current(1.0)
+    psupply.set_powerstate(PowerState.On)
+    curve = sweep_iv(psupply, linear_profile(1.0, 8.0, 8))
+    psupply.serial.close()
+    assert len(curve) == 8 and curve.time[0] == 0.0
+    assert np.all(np.diff(curve.time) > 0)  # write starts, not deadlines
+    np.testing.assert_allclose(curve.current, curve.setpoint / 10.0)
+    np.testing.assert_allclose(curve.dynamic_resistance(), 10.0)
+    np.testing.assert_allclose(curve.computed_power(), curve.power, atol=1e-3)
+
+
+def test_console_ivcurve(simulator, tmp_path):
+    path = tmp_path / "curve.csv"
+    args = ["ivcurve", "-p", simulator.port, "--no-cache", "--stop", "15"]
+    args += ["-n", "16", "-c", "1", "-T", "0", "-o", str(path)]
+    result = click.testing.CliRunner().invoke(console.cli, args)
+    assert result.exit_code == 0, result.output
+    summary = json.loads(result.output.splitlines()[-1])
+    assert summary["points"] == 16
+    assert summary["max_power"] == pytest.approx(10.0)
+    assert simulator.registers[Reg.PS_PowerSwitch] == 0
+    assert path.read_text().startswith("setpoint,voltage,current,power,time")
@@ -0,0 +1,104 @@
+# tests/test_logger.py
+import io
+import time
+
+import pytest
+
+from hm310p_cli.hm310p import OutputSnapshot
+from hm310p_cli.hm310p_logger import (
+    BinarySampleWriter,
+    CsvSampleWriter,
+    read_binary_samples,
+    SampleRingBuffer,
+    StreamingLogger,
+)
+
+
+class CountingSupply:
+    def __init__(self):
+        self.count = 0
+
+    def read_output_snapshot(self):
+        self.count += 1
+        return OutputSnapshot(12.0, 0.5, 6.0, float(self.count))
+
+
+class SlowWriter:
+    def __init__(self):
+        self.samples = []
+
+    def write(self, samples):
+        time.sleep(0.05)
+        self.samples.extend(samples)
+
+    def flush(self):
+        pass
+
+
+def test_ring_buffer_drops_when_full():
+    buffer = SampleRingBuffer(2)
+    assert buffer.put(1)
+    assert buffer.put(2)
+    assert not buffer.put(3)
+    assert buffer.dropped == 1
+    assert buffer.drain(0) == [1, 2]
+    assert buffer.put(4)
+    assert buffer.drain(0) == [4]
+
+
+def test_logger_writes_csv():
+    stream = io.StringIO()
+    report = StreamingLogger(CountingSupply(), CsvSampleWriter(stream)).run(samples=5)
+    lines = stream.getvalue().splitlines()
+    assert report.samples == 5
+    assert report.dropped == 0
+    assert lines[0] == "timestamp,voltage,current,power"
+    assert lines[1] == "1.000000,12.0,0.5,6.0"
+    assert len(lines) == 6
+
+
+def test_logger_binary_roundtrip():
+    stream = io.BytesIO()
+    StreamingLogger(CountingSupply(), BinarySampleWriter(stream)).run(samples=3)
+    stream.seek(0)
+    samples = list(read_binary_samples(stream))
+    assert [s.timestamp for s in samples] == [1.0, 2.0, 3.0]
+    assert samples[0].voltage == 12.0
+
+
+def test_slow_writer_does_not_stall_poll_loop():
+    writer = SlowWriter()
+    report = StreamingLogger(CountingSupply(), writer, capacity=8).run(samples=1000)
+    assert report.samples == 1000
+    assert report.dropped > 0
+    assert len(writer.samples) == report.samples - report.dropped
+
+
+class FailingWriter:
+    def write(self, samples):
+        raise OSError(28, "No space left on device")
+
+    def flush(self):
+        pass
+
+
+class StallingSupply(CountingSupply):
+    def read_output_snapshot(self):
+        if self.count == 1:
+            time.sleep(0.1)
+        return super().read_output_snapshot()
+
+
+def test_writer_error_ends_run_and_is_raised():
+    start = time.perf_counter()
+    with pytest.raises(OSError):
+        StreamingLogger(CountingSupply(), FailingWriter()).run(duration=5.0)
+    assert time.perf_counter() - start < 1.0
+
+
+def test_slow_read_skips_missed_ticks():
+    supply = StallingSupply()
+    logger = StreamingLogger(supply, SlowWriter(), interval=0.01)
+    report = logger.run(duration=0.2)
+    # the 0.1 s stall skips about ten ticks instead of catching up on them
+    assert report.samples <= 13
@@ -0,0 +1,63 @@
+# tests/test_memory.py
+import pytest
+
+from hm310p_cli import hm310p_rtu as rtu
+from hm310p_cli.hm310p import HM310P
+from hm310p_cli.hm310p_memory import (
+    MemorySlot,
+    read_memory_program,
+    upload_memory_program,
+)
+from hm310p_cli.hm310p_simulator import HM3xxPSimulator
+
+
+@pytest.fixture
+def simulated():
+    with HM3xxPSimulator(latency=False) as sim:
+        psupply = HM310P(sim.port, 1)
+        yield sim, psupply
+        psupply.serial.close()
+
+
+def test_coalesce_ranges():
+    assert rtu.coalesce_ranges([5, 1, 2, 3, 9]) == [(1, 3), (5, 1), (9, 1)]
+    assert rtu.coalesce_ranges([1, 2, 5], max_gap=2) == [(1, 5)]
+    assert rtu.coalesce_ranges(range(10), max_length=4) == [(0, 4), (4, 4), (8, 2)]
+
+
+def test_contiguous_runs():
+    words = {0x1001: 2, 0x1000: 1, 0x1003: 4, 0x1011: 5}
+    assert rtu.contiguous_runs(words) == [
+        (0x1000, [1, 2]),
+        (0x1003, [4]),
+        (0x1011, [5]),
+    ]
+
+
+def test_upload_writes_only_changed_runs(simulated):
+    sim, psupply = simulated
+    program = {
+        "M1": MemorySlot(3.3, 0.5, 10, 1, 0),
+        "M4": MemorySlot(voltage=12.0, enable=1),
+    }
+    writes = upload_memory_program(psupply, program)
+    assert writes == [
+        (0x1000, [330, 500, 10, 1]),
+        (0x1030, [1200]),
+        (0x1033, [1]),
+    ]
+    assert read_memory_program(psupply, ["M1"])["M1"] == MemorySlot(
+        3.3, 0.5, 10, 1, 0
+    )
+
+    before = sim.transactions
+    assert upload_memory_program(psupply, program) == []
+    assert sim.transactions - before == 2  # one block read per memory
+
+
+def test_read_full_program_uses_one_read_per_memory(simulated):
+    sim, psupply = simulated
+    before = sim.transactions
+    program = read_memory_program(psupply)
+    assert sim.transactions - before == 6
+    assert list(program) == ["M1", "M2", "M3", "M4", "M5", "M6"]
@@ -0,0 +1,77 @@
+# tests/test_metrics.py
+import minimalmodbus
+import pytest
+
+from hm310p_cli import hm310p_rtu as rtu
+from hm310p_cli.hm310p import HM310P
+from hm310p_cli.hm310p_metrics import (
+    HistogramCollector,
+    PrometheusTextfileExporter,
+    TransactionMonitor,
+)
+from hm310p_cli.hm310p_simulator import HM3xxPSimulator
+
+
+@pytest.fixture
+def instrumented():
+    monitor = TransactionMonitor()
+    events = []
+    monitor.subscribe(events.append)
+    collector = monitor.subscribe(HistogramCollector())
+    with HM3xxPSimulator(latency=False) as sim:
+        psupply = HM310P(sim.port, 1, monitor=monitor)
+        yield psupply, events, collector
+        psupply.serial.close()
+
+
+def test_events_resolve_registers_and_bytes(instrumented):
+    psupply, events, _ = instrumented
+    probe = events[0]
+    assert probe.register == "PS_Model"
+    assert probe.functioncode == 3
+    events.clear()
+    psupply.read_output_snapshot()
+    (event,) = events
+    assert event.register == "PS_Voltage"
+    assert event.request_bytes == 8
+    assert event.response_bytes == 5 + 2 * 5
+    assert event.outcome == "ok"
+    assert event.rtt > 0
+
+
+def test_slave_exception_is_classified(instrumented):
+    psupply, events, _ = instrumented
+    with pytest.raises(minimalmodbus.IllegalRequestError):
+        psupply.read_register(0x0100)
+    assert events[-1].outcome == "slave_exception"
+    assert events[-1].register == "0x0100"
+
+
+@pytest.mark.parametrize("text", [False, True])  # minimalmodbus 2.x and 1.x
+def test_crc_error_is_classified_by_type(instrumented, monkeypatch, text):
+    psupply, events, _ = instrumented
+    frame = bytearray(rtu.build_frame(1, bytes([0x03, 0x02, 0x04, 0xB0])))
+    frame[-1] ^= 0xFF
+    answer = bytes(frame).decode("latin-1") if text else bytes(frame)
+    monkeypatch.setattr(
+        minimalmodbus.Instrument, "_communicate", lambda self, request, n: answer
+    )
+    with pytest.raises(rtu.ChecksumError):
+        psupply.read_register(0x0010)
+    assert events[-1].outcome == "crc"
+    assert psupply.retry_statistics.failures == {"crc": 1}
+
+
+def test_prometheus_export(instrumented, tmp_path):
+    psupply, _, collector = instrumented
+    psupply.set_voltage(5.0)
+    psupply.get_voltage()
+    path = tmp_path / "hm310p.prom"
+    PrometheusTextfileExporter(collector, str(path)).write()
+    text = path.read_text()
+    assert (
+        'hm310p_transaction_seconds_count{function="3",register="PS_SetVoltage"} 1'
+        in text
+    )
+    assert 'register="PS_SetVoltage",outcome="ok"} 1' in text
+    assert collector.top(1)[0][1].count >= 1
@@ -0,0 +1,52 @@
+# tests/test_plan.py
+import click.testing
+import pytest
+
+from hm310p_cli import console
+from hm310p_cli.hm310p_constants import PowerState
+from hm310p_cli.hm310p_plan import offline_layout, plan_output_state
+from hm310p_cli.hm310p_regdefs import HM3xxpRegisters as Reg
+from hm310p_cli.hm310p_simulator import HM3xxPSimulator
+
+
+def test_on_sequence_merges_adjacent_writes():
+    plan = plan_output_state(offline_layout(), PowerState.On, 12.0, 1.0, 12.6, 1.05, 12)
+    writes = plan.writes()
+    assert [(w.stage, w.address, w.values) for w in writes] == [
+        ("protection", Reg.PS_ProtectVol, [1260, 1050, 0, 12000]),
+        ("setpoints", Reg.PS_SetVoltage, [1200, 1000]),
+        ("power", Reg.PS_PowerSwitch, [1]),
+    ]
+    assert plan.estimate_bus_time(9600) > plan.estimate_bus_time(115200)
+
+
+def test_repeated_register_keeps_last_value():
+    plan = plan_output_state(offline_layout(), PowerState.Off, 5.0, 1.0)
+    plan.set_register("setpoints", Reg.PS_SetVoltage, 0)
+    assert [w.values for w in plan.writes()] == [[0, 1000], [0]]
+
+
+def test_plan_validates_limits():
+    with pytest.raises(ValueError):
+        plan_output_state(offline_layout(), PowerState.On, 40.0, 1.0)
+
+
+def test_console_on_uses_three_transactions():
+    with HM3xxPSimulator(latency=False, load_resistance=100.0) as sim:
+        args = ["-p", sim.port, "-s", "on", "-V", "12", "-I", "1", "--no-cache"]
+        before = sim.transactions + 1  # constructor probe
+        result = click.testing.CliRunner().invoke(console.main, args)
+        assert result.exit_code == 0, result.output
+        assert sim.transactions - before == 3
+        assert sim.registers[Reg.PS_PowerSwitch] == 1
+        assert sim.registers[Reg.PS_SetVoltage] == 1200
+        assert sim.registers[Reg.PS_ProtectVol] == 1260
+
+
+def test_console_dry_run_prints_frames():
+    args = ["-p", "/dev/null", "-s", "on", "-V", "12", "-I", "1"]
+    args += ["--dry-run", "--no-cache"]
+    result = click.testing.CliRunner().invoke(console.main, args)
+    assert result.exit_code == 0
+    assert "PS_ProtectVol..PS_ProtectPowL" in result.output
+    assert "3 transactions, estimated bus time" in result.output
@@ -0,0 +1,85 @@
+# tests/test_protection.py
+import threading
+import time
+
+import pytest
+
+from hm310p_cli.hm310p import HM310P
+from hm310p_cli.hm310p_constants import PowerState, ProtectionFlag
+from hm310p_cli.hm310p_protection import ProtectionWatcher
+from hm310p_cli.hm310p_simulator import HM3xxPSimulator
+
+
+@pytest.fixture
+def simulator():
+    with HM3xxPSimulator(latency=False, load_resistance=10.0) as sim:
+        yield sim
+
+
+@pytest.fixture
+def psupply(simulator):
+    psupply = HM310P(simulator.port, 1)
+    yield psupply
+    psupply.serial.close()
+
+
+def test_protection_flags_decoded(psupply, simulator):
+    assert psupply.get_protection_flags() == ProtectionFlag(0)
+    simulator.trip(ProtectionFlag.OCP | ProtectionFlag.OTP)
+    flags = psupply.get_protection_flags()
+    assert isinstance(flags, ProtectionFlag)
+    assert flags == ProtectionFlag.OCP | ProtectionFlag.OTP
+
+
+def test_poll_detects_edges(psupply, simulator):
+    watcher = ProtectionWatcher(psupply)
+    events = []
+    watcher.subscribe(events.append)
+    assert watcher.poll() is None
+    assert watcher.poll() is None
+    simulator.trip(ProtectionFlag.OVP)
+    event = watcher.poll()
+    assert event.raised == ProtectionFlag.OVP and not event.cleared
+    assert event.since < event.detected and event.latency > 0
+    assert watcher.poll() is None
+    psupply.set_powerstate(PowerState.On)  # resets the protect state
+    event = watcher.poll()
+    assert event.cleared == ProtectionFlag.OVP and not event.raised
+    assert events == [events[0], event]
+    assert watcher.statistics.events == 2 and watcher.statistics.polls == 5
+
+
+def test_initial_trip_is_published(psupply, simulator):
+    simulator.trip(ProtectionFlag.SCP)
+    event = ProtectionWatcher(psupply).poll()
+    assert event.raised == ProtectionFlag.SCP
+
+
+def test_watcher_thread_reports_trip_within_bound(psupply, simulator):
+    tripped = threading.Event()
+    watcher = ProtectionWatcher(psupply, interval=0.01)
+    watcher.subscribe(lambda event: tripped.set())
+    with watcher:
+        time.sleep(0.05)
+        trip_time = time.monotonic()
+        simulator.trip(ProtectionFlag.OCP)
+        assert tripped.wait(1.0)
+        notified = time.monotonic()
+    stats = watcher.statistics
+    assert stats.events == 1 and stats.errors == 0
+    assert notified - trip_time <= stats.max_latency + 0.01
+    assert stats.max_gap < 0.1
+
+
+def test_failing_subscriber_does_not_lose_the_event(psupply, simulator):
+    watcher = ProtectionWatcher(psupply)
+    events = []
+    watcher.subscribe(lambda event: 1 / 0)
+    watcher.subscribe(events.append)
+    watcher.poll()
+    simulator.trip(ProtectionFlag.OCP)
+    event = watcher.poll()
+    assert events == [event]
+    stats = watcher.statistics
+    assert stats.events == 1 and stats.subscriber_errors == 1
+    assert isinstance(watcher.last_error, ZeroDivisionError)
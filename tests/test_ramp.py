@@ -0,0 +1,79 @@
+# tests/test_ramp.py
+import threading
+
+import click.testing
+import pytest
+
+from hm310p_cli import console
+from hm310p_cli.hm310p import HM310P
+from hm310p_cli.hm310p_constants import PowerState
+from hm310p_cli.hm310p_ramp import (
+    linear_profile,
+    log_profile,
+    run_profile,
+    table_profile,
+)
+from hm310p_cli.hm310p_regdefs import HM3xxpRegisters as Reg
+from hm310p_cli.hm310p_simulator import HM3xxPSimulator
+
+
+@pytest.fixture
+def simulator():
+    with HM3xxPSimulator(latency=False, load_resistance=10.0) as sim:
+        yield sim
+
+
+@pytest.fixture
+def psupply(simulator):
+    psupply = HM310P(simulator.port, 1)
+    yield psupply
+    psupply.serial.close()
+
+
+def test_profiles():
+    assert linear_profile(0.0, 12.0, 4) == [0.0, 4.0, 8.0, 12.0]
+    assert log_profile(0.1, 10.0, 3) == pytest.approx([0.1, 1.0, 10.0])
+    assert table_profile(["1", 2.5]) == [1.0, 2.5]
+    with pytest.raises(ValueError):
+        log_profile(0.0, 1.0, 3)
+    with pytest.raises(ValueError):
+        table_profile([])
+
+
+def test_deadlines_do_not_drift(psupply, simulator):
+    psupply.set_current(2.0)
+    psupply.set_powerstate(PowerState.On)
+    report = run_profile(psupply, linear_profile(1.0, 5.0, 5), 0.02)
+    assert report.completed
+    first = report.steps[0]
+    starts = [s.deadline + s.error - first.deadline for s in report.steps]
+    assert starts == pytest.approx([0.0, 0.02, 0.04, 0.06, 0.08], abs=0.01)
+    assert all(0 <= step.error < 0.01 for step in report.steps)
+    assert report.max_error < 0.01
+    assert report.steps[-1].snapshot.voltage == pytest.approx(5.0)
+    assert simulator.registers[Reg.PS_SetVoltage] == 500
+
+
+def test_invalid_setpoint_rejected_before_first_write(psupply, simulator):
+    with pytest.raises(ValueError):
+        run_profile(psupply, [1.0, 2.0, 99.0], 0.0)
+    assert simulator.registers[Reg.PS_SetVoltage] == 0
+
+
+def test_stop_event_ends_run(psupply):
+    stop = threading.Event()
+    report = run_profile(
+        psupply, [1.0, 2.0, 3.0], 0.01, callback=lambda step: stop.set()
+    )
+    assert report.completed
+    report = run_profile(psupply, [1.0, 2.0, 3.0], 0.01, stop=stop, readback=False)
+    assert not report.completed and report.steps == []
+
+
+def test_console_ramp(simulator):
+    args = ["ramp", "-p", simulator.port, "--no-cache", "-q", "current"]
+    args += ["--profile", "table", "--table", "0.5,1,1.5", "-T", "0"]
+    result = click.testing.CliRunner().invoke(console.cli, args)
+    assert result.exit_code == 0, result.output
+    assert simulator.registers[Reg.PS_SetCurrent] == 1500
+    assert "2,1.5000," in result.output
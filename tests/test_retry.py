@@ -0,0 +1,71 @@
+# tests/test_retry.py
+import minimalmodbus
+import pytest
+
+from hm310p_cli.hm310p import HM310P
+from hm310p_cli.hm310p_regdefs import HM3xxpRegisters as Reg
+from hm310p_cli.hm310p_retry import (
+    classify_request,
+    IDEMPOTENT,
+    NON_IDEMPOTENT,
+    RetryPolicy,
+)
+from hm310p_cli.hm310p_simulator import HM3xxPSimulator
+
+
+@pytest.fixture
+def simulator():
+    with HM3xxPSimulator(latency=False) as sim:
+        yield sim
+
+
+@pytest.fixture
+def psupply(simulator):
+    psupply = HM310P(simulator.port, 1, retry_policy=RetryPolicy(2, seed=1))
+    yield psupply
+    psupply.serial.close()
+
+
+def test_classify_request():
+    assert classify_request(0x03, b"\x00\x10\x00\x05") == IDEMPOTENT
+    assert classify_request(0x06, b"\x00\x30\x04\xb0") == IDEMPOTENT
+    assert classify_request(0x06, b"\x99\x99\x00\x02") == NON_IDEMPOTENT
+    assert classify_request(0x10, b"\x99\x98\x00\x02\x04\x00\x00\x00\x02") == (
+        NON_IDEMPOTENT
+    )
+    assert classify_request(0x01, b"\x00\x00\x00\x01") == NON_IDEMPOTENT
+
+
+def test_delay_is_jittered_and_bounded():
+    policy = RetryPolicy(backoff=0.01, max_backoff=0.03, jitter=0.5, seed=3)
+    delays = [policy.delay(0) for _ in range(20)]
+    assert all(0.005 <= d <= 0.015 for d in delays)
+    assert len(set(delays)) > 1
+    assert policy.delay(5) <= 0.03
+
+
+def test_recovers_from_lost_and_corrupted_responses(simulator, psupply):
+    simulator.inject_faults(1, "drop")
+    simulator.inject_faults(1, "crc")
+    psupply.set_voltage(5.0)
+    assert psupply.get_voltage() == 5.0
+    stats = psupply.retry_statistics
+    assert stats.retries == 2
+    assert stats.recovered == 1
+    assert stats.failures == {"timeout": 1, "crc": 1}
+
+
+def test_gives_up_after_retries(simulator, psupply):
+    simulator.inject_faults(3, "drop")
+    with pytest.raises(minimalmodbus.NoResponseError):
+        psupply.get_voltage()
+    assert psupply.retry_statistics.exhausted == 1
+    assert psupply.get_voltage() == 0.0
+
+
+def test_slave_address_write_is_not_repeated(simulator, psupply):
+    simulator.inject_faults(1, "drop")
+    with pytest.raises(minimalmodbus.NoResponseError):
+        psupply.write_register(Reg.PS_Device, 2)
+    assert psupply.retry_statistics.retries == 0
+    assert simulator.slaveaddress == 2
@@ -0,0 +1,76 @@
+# tests/test_rto.py
+import time
+
+import minimalmodbus
+import pytest
+
+from hm310p_cli.hm310p import HM310P
+from hm310p_cli.hm310p_regdefs import HM3xxpRegisters as Reg
+from hm310p_cli.hm310p_rto import RtoEstimator
+from hm310p_cli.hm310p_simulator import HM3xxPSimulator
+
+
+def test_first_sample_and_convergence():
+    rto = RtoEstimator(floor=0.01, ceiling=0.25)
+    assert rto.rto == 0.25
+    rto.observe(0.004)
+    assert rto.srtt == 0.004
+    assert rto.rttvar == 0.002
+    assert rto.rto == pytest.approx(0.012)
+    for _ in range(50):
+        rto.observe(0.002)
+    assert rto.rto == 0.01
+    assert rto.timeout(0.0155) == pytest.approx(0.026)
+
+
+def test_backoff_is_capped():
+    rto = RtoEstimator(floor=0.02, ceiling=0.1)
+    rto.observe(0.0)
+    for expected in (0.04, 0.08, 0.1, 0.1):
+        rto.backoff()
+        assert rto.rto == pytest.approx(expected)
+    assert rto.timeouts == 4
+    rto.reset()
+    assert rto.srtt is None and rto.rto == 0.1
+
+
+def test_fixed_timeout_and_invalid_bounds():
+    rto = RtoEstimator(0.25, 0.25)
+    rto.observe(0.001)
+    assert rto.rto == 0.25
+    with pytest.raises(ValueError):
+        RtoEstimator(0.3, 0.2)
+
+
+def test_lost_response_is_detected_quickly():
+    with HM3xxPSimulator() as sim:
+        psupply = HM310P(sim.port, 1)
+        for _ in range(10):
+            psupply.get_voltage()
+        assert psupply.rto.samples == 11
+        assert psupply.rto.rto < 0.05
+        sim.registers[Reg.PS_Device] = 2
+        start = time.perf_counter()
+        with pytest.raises(minimalmodbus.NoResponseError):
+            psupply.get_voltage()
+        assert time.perf_counter() - start < 0.15
+        assert psupply.rto.timeouts == 1
+        psupply.serial.close()
+
+
+def test_port_is_not_reconfigured_per_transaction():
+    with HM3xxPSimulator() as sim:
+        psupply = HM310P(sim.port, 1)
+        for _ in range(10):
+            psupply.get_voltage()  # settle the estimate
+        calls = []
+        reconfigure = psupply.serial._reconfigure_port
+        psupply.serial._reconfigure_port = lambda *a, **k: calls.append(
+            reconfigure(*a, **k)
+        )
+        for _ in range(20):
+            psupply.get_voltage()
+            psupply.read_output_snapshot()
+        assert len(calls) <= 2
+        assert psupply.timeout == psupply.serial.timeout
+        psupply.serial.close()
@@ -0,0 +1,34 @@
+# tests/test_rtu.py
+import minimalmodbus
+import pytest
+
+from hm310p_cli import hm310p_rtu as rtu
+
+
+def test_build_frame_appends_crc():
+    frame = rtu.build_frame(1, rtu.read_registers_pdu(0x0003, 1))
+    assert frame == bytes.fromhex("010300030001740a")
+
+
+def test_split_frame_rejects_crc_mismatch():
+    frame = bytearray(rtu.build_frame(1, rtu.read_registers_pdu(0x0003, 1)))
+    frame[-1] ^= 0xFF
+    with pytest.raises(rtu.ChecksumError):
+        rtu.split_frame(bytes(frame))
+    assert issubclass(rtu.ChecksumError, minimalmodbus.InvalidResponseError)
+
+
+def test_parse_read_response():
+    request = rtu.read_registers_pdu(0x0010, 2)
+    response = rtu.build_frame(1, bytes([0x03, 4, 0x04, 0xB5, 0x05, 0xDC]))
+    assert len(response) == rtu.response_length(request)
+    payload = rtu.parse_response(response, 1, request)
+    assert rtu.decode_registers(payload) == [1205, 1500]
+
+
+def test_parse_exception_response():
+    request = rtu.read_registers_pdu(0x0100, 1)
+    response = rtu.build_frame(1, bytes([0x83, 0x02]))
+    assert rtu.is_exception_frame(response)
+    with pytest.raises(minimalmodbus.IllegalRequestError):
+        rtu.parse_response(response, 1, request)
@@ -0,0 +1,51 @@
+# tests/test_scan.py
+import click.testing
+import pytest
+
+from hm310p_cli import console
+from hm310p_cli.hm310p_cache import IdentityCache
+from hm310p_cli.hm310p_inventory import DeviceSpec, load_inventory
+from hm310p_cli.hm310p_regdefs import HM3xxpRegisters as Reg
+from hm310p_cli.hm310p_scan import scan, scan_port
+from hm310p_cli.hm310p_simulator import HM3xxPSimulator
+
+
+@pytest.fixture
+def simulator():
+    with HM3xxPSimulator("HM305P", baudrate=19200, slaveaddress=3) as sim:
+        yield sim
+
+
+def test_scan_port_identifies_model_and_rate(simulator):
+    results = scan_port(simulator.port, range(1, 6), (9600, 19200))
+    assert [(r.address, r.baudrate) for r in results] == [(3, 19200)]
+    assert results[0].model_name == "HM305P"
+    assert results[0].identity.decimals == 0x0233
+
+
+def test_scan_caches_identities_and_reports_bad_ports(simulator, tmp_path):
+    cache = IdentityCache(str(tmp_path / "cache.json"))
+    missing = str(tmp_path / "missing")
+    report = scan([simulator.port, missing], [2, 3], [19200], identity_cache=cache)
+    assert [r.address for r in report.results] == [3]
+    assert list(report.errors) == [missing]
+    assert cache.load(simulator.port, 3).model == 3005
+    assert cache.load_baudrate(simulator.port, 3) == 19200
+
+
+def test_scan_does_not_cache_unknown_devices(simulator, tmp_path):
+    simulator.registers[Reg.PS_Model] = 1234
+    cache = IdentityCache(str(tmp_path / "cache.json"))
+    report = scan([simulator.port], [3], [19200], identity_cache=cache)
+    assert [r.model_name for r in report.results] == [None]
+    assert cache.load(simulator.port, 3) is None
+    assert cache.load_baudrate(simulator.port, 3) is None
+
+
+def test_console_scan_writes_inventory(simulator, tmp_path):
+    path = str(tmp_path / "rack.json")
+    args = ["scan", "-p", simulator.port, "-a", "1-4", "-b", "all", "--no-cache"]
+    result = click.testing.CliRunner().invoke(console.cli, args + ["-o", path])
+    assert result.exit_code == 0, result.output
+    assert "HM305P" in result.output
+    assert load_inventory(path) == [DeviceSpec(simulator.port, 3, 19200)]
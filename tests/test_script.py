@@ -0,0 +1,94 @@
+# tests/test_script.py
+import click.testing
+import pytest
+
+from hm310p_cli import console
+from hm310p_cli.hm310p import HM310P
+from hm310p_cli.hm310p_constants import PowerState
+from hm310p_cli.hm310p_script import (
+    parse_line,
+    parse_script,
+    run_script,
+    ScriptAssertionError,
+    ScriptError,
+)
+from hm310p_cli.hm310p_simulator import HM3xxPSimulator
+
+SCRIPT = """\
+# 12 V into 10 Ohm
+set ovp 13
+set v 12
+set i 2
+on
+wait 1ms
+assert state on
+assert v 12 0.01
+assert current 1.2 1%
+get p
+off
+"""
+
+
+@pytest.fixture
+def simulator():
+    with HM3xxPSimulator(latency=False, load_resistance=10.0) as sim:
+        yield sim
+
+
+def test_parse_line():
+    assert parse_line("  # comment") is None
+    step = parse_line("Assert I 0.5 2%  # tolerance", 7)
+    assert (step.command, step.quantity, step.value) == ("assert", "i", 0.5)
+    assert step.relative and step.tolerance == pytest.approx(0.02)
+    assert parse_line("set voltage 5").quantity == "vset"
+    assert parse_line("wait 250ms").value == pytest.approx(0.25)
+    assert parse_line("off").value == PowerState.Off
+    for line in ("set p 3", "get x", "wait", "assert state on 1", "set state 1"):
+        with pytest.raises(ScriptError):
+            parse_line(line)
+
+
+def test_parse_script_reports_line_number():
+    with pytest.raises(ScriptError) as excinfo:
+        parse_script(["set v 1", "", "sett v 2"])
+    assert excinfo.value.lineno == 3
+
+
+def test_run_script_on_one_driver(simulator):
+    psupply = HM310P(simulator.port, 1)
+    try:
+        report = run_script(psupply, parse_script(SCRIPT.splitlines()))
+    finally:
+        psupply.serial.close()
+    assert report.ok, report.failed
+    assert len(report.results) == 10
+    assert report.results[-2].value == pytest.approx(14.4, abs=0.1)
+    assert report.bus_time < report.elapsed
+
+
+def test_run_script_stops_at_failed_assert(simulator):
+    psupply = HM310P(simulator.port, 1)
+    steps = parse_script(["assert state on", "set v 1"])
+    try:
+        report = run_script(psupply, steps)
+        assert [r.ok for r in report.results] == [False]
+        assert isinstance(report.results[0].error, ScriptAssertionError)
+        report = run_script(psupply, steps, keep_going=True)
+        assert [r.ok for r in report.results] == [False, True]
+    finally:
+        psupply.serial.close()
+
+
+def test_console_script(simulator, tmp_path):
+    path = tmp_path / "seq.txt"
+    path.write_text(SCRIPT)
+    args = ["script", str(path), "-p", simulator.port, "--no-cache"]
+    runner = click.testing.CliRunner()
+    result = runner.invoke(console.cli, args)
+    assert result.exit_code == 0, result.output
+    assert "\tassert v 12 0.01\t12\t" in result.output
+    result = runner.invoke(console.cli, args[:1] + args[2:], input="assert v 5\n")
+    assert result.exit_code == 1
+    assert "FAILED" in result.output
+    result = runner.invoke(console.cli, args[:1] + args[2:], input="frob\n")
+    assert "line 1: Unknown command 'frob'" in result.output
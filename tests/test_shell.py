@@ -0,0 +1,93 @@
+# tests/test_shell.py
+import io
+
+import click.testing
+import pytest
+
+from hm310p_cli import console
+from hm310p_cli.hm310p import HM310P
+from hm310p_cli.hm310p_regdefs import HM3xxpRegisters as Reg
+from hm310p_cli.hm310p_shell import HM310PShell
+from hm310p_cli.hm310p_simulator import HM3xxPSimulator
+
+
+@pytest.fixture
+def simulator():
+    with HM3xxPSimulator(latency=False, load_resistance=10.0) as sim:
+        yield sim
+
+
+@pytest.fixture
+def psupply(simulator):
+    driver = HM310P(simulator.port, 1)
+    yield driver
+    driver.serial.close()
+
+
+def run_shell(psupply, commands):
+    stdout = io.StringIO()
+    shell = HM310PShell(psupply, io.StringIO(commands), stdout, lambda s: None)
+    shell.prompt = ""
+    shell.cmdloop(intro="")
+    return stdout.getvalue()
+
+
+def test_read_channel_uses_one_block_read(psupply, simulator):
+    before = simulator.transactions
+    protection = psupply.read_channel("Protection")
+    assert simulator.transactions == before + 1
+    assert protection == {"v": 33.0, "c": 10.5, "p": 320.0}
+    info = psupply.read_channel("Info")
+    assert info["model"] == 3010 and info["decs"] == 0x0233
+    psupply.set_voltage_and_current_of_channel_list(["M3"], 3.3, 0.5)
+    memory = psupply.read_channel("M3")
+    assert memory == {"v": 3.3, "c": 0.5, "ts": 0, "en": 0, "no": 0}
+    with pytest.raises(KeyError):
+        psupply.read_channel("M7")
+
+
+def test_shell_commands_print_values_and_rtt(psupply, simulator):
+    output = run_shell(
+        psupply, "set v 12\nset i 2\non\nget v\n\nshow output preset\noff\nquit\n"
+    )
+    lines = output.splitlines()
+    assert "12" in lines
+    assert any(line.startswith("Output  v=12  c=1.2  p=14.4") for line in lines)
+    assert any(line.startswith("Preset  v=12  c=2  ts=0") for line in lines)
+    assert "2 transactions, rtt" in output  # show output preset
+    assert simulator.registers[Reg.PS_PowerSwitch] == 0
+
+
+def test_shell_reports_errors_and_keeps_running(psupply):
+    output = run_shell(psupply, "frob\nset p 1\nwrite info 1 1\nshow m9\nget ovp\n")
+    assert "error: unknown command 'frob'" in output
+    assert "error: p cannot be set" in output
+    assert "error: Channel Info is read only" in output
+    assert "error: Unknown channel 'm9'" in output
+    assert "\n33\n1 transactions, rtt" in output
+
+
+def test_shell_refresh_reads_output_block(psupply, simulator):
+    before = simulator.transactions
+    output = run_shell(psupply, "refresh 0.01 3\n")
+    assert simulator.transactions == before + 3
+    assert output.count("\r") == 3
+    assert "3 transactions" in output
+
+
+def test_shell_completion(psupply):
+    shell = HM310PShell(psupply, io.StringIO(), io.StringIO())
+    assert shell.complete_show("m", "show m", 5, 6) == [f"M{n}" for n in range(1, 7)]
+    assert shell.complete_write("p", "write p", 6, 7) == ["Preset", "Protection"]
+    assert shell.complete_write("", "write Preset ", 13, 13) == []
+    assert shell.complete_set("o", "set o", 4, 5) == ["ovp", "ocp", "opp"]
+    assert shell.complete_set("o", "set state o", 10, 11) == ["on", "off"]
+    assert "v" not in shell.complete_set("", "set ", 4, 4)
+    assert "v" in shell.complete_get("", "get ", 4, 4)
+
+
+def test_console_shell(simulator):
+    args = ["shell", "-p", simulator.port, "--no-cache", "--no-history"]
+    result = click.testing.CliRunner().invoke(console.cli, args, input="get ovp\n")
+    assert result.exit_code == 0, result.output
+    assert "33\n1 transactions, rtt" in result.output
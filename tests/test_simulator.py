@@ -0,0 +1,95 @@
+# tests/test_simulator.py
+import asyncio
+
+import minimalmodbus
+import pytest
+
+from hm310p_cli.hm310p import HM310P
+from hm310p_cli.hm310p_async import AsyncHM310P
+from hm310p_cli.hm310p_constants import PowerState, ProtectionFlag
+from hm310p_cli.hm310p_simulator import HM3xxPSimulator
+
+
+@pytest.fixture
+def simulator():
+    with HM3xxPSimulator(latency=False, load_resistance=10.0) as sim:
+        yield sim
+
+
+@pytest.fixture
+def psupply(simulator):
+    psupply = HM310P(simulator.port, 1)
+    yield psupply
+    psupply.serial.close()
+
+
+def test_identity_of_models():
+    for model, number, max_current in [("HM310P", 3010, 10.0), ("HM305P", 3005, 5.0)]:
+        with HM3xxPSimulator(model, latency=False) as sim:
+            psupply = HM310P(sim.port, 1)
+            assert psupply.model == number
+            assert psupply.max_current == max_current
+            assert psupply.number_of_decimals_voltage == 2
+            assert psupply.number_of_decimals_current == 3
+            psupply.serial.close()
+
+
+def test_output_follows_presets(psupply):
+    psupply.set_voltage(12.0)
+    psupply.set_current(2.0)
+    psupply.set_powerstate(PowerState.On)
+    snapshot = psupply.read_output_snapshot()
+    assert snapshot.voltage == pytest.approx(12.0)
+    assert snapshot.current == pytest.approx(1.2)
+    assert snapshot.power == pytest.approx(14.4)
+    assert psupply.get_power("Output") == pytest.approx(14.4)
+
+
+def test_constant_current_limit(psupply):
+    psupply.set_voltage(12.0)
+    psupply.set_current(0.5)
+    psupply.set_powerstate(PowerState.On)
+    assert psupply.get_voltage("Output") == pytest.approx(5.0)
+    assert psupply.get_current("Output") == pytest.approx(0.5)
+
+
+def test_overvoltage_trips_output(psupply):
+    psupply.set_ovp(5.0)
+    psupply.set_voltage(6.0)
+    psupply.set_current(1.0)
+    psupply.set_powerstate(PowerState.On)
+    assert psupply.get_powerstate() == PowerState.Off
+    assert psupply.get_protectstate() == ProtectionFlag.OVP
+    psupply.set_voltage(4.0)
+    psupply.set_powerstate(PowerState.On)
+    assert psupply.get_protectstate() == 0
+
+
+def test_memories(psupply):
+    psupply.set_voltage_and_current_of_channel_list(["M3", "M6"], 3.3, 0.25)
+    assert psupply.get_voltage("M3") == pytest.approx(3.3)
+    assert psupply.get_current("M6") == pytest.approx(0.25)
+    assert psupply.get_voltage("M1") == 0
+
+
+def test_unmapped_register_is_illegal(psupply):
+    with pytest.raises(minimalmodbus.IllegalRequestError):
+        psupply.read_register(0x0100)
+
+
+def test_async_driver(simulator):
+    async def run():
+        async with await AsyncHM310P.open(simulator.port, 1) as psupply:
+            await psupply.set_voltage(5.0)
+            await psupply.set_current(1.0)
+            await psupply.set_ovp(6.0)
+            await psupply.set_powerstate(PowerState.On)
+            snapshot = await psupply.read_output_snapshot()
+            await psupply.set_memory("M2", 1.5, 0.1)
+            return snapshot, await psupply.get_memory("M2"), await psupply.get_ovp()
+
+    snapshot, memory, ovp = asyncio.run(run())
+    assert snapshot.voltage == pytest.approx(5.0)
+    assert snapshot.current == pytest.approx(0.5)
+    assert memory == pytest.approx([1.5, 0.1])
+    assert ovp == pytest.approx(6.0)
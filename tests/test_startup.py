@@ -0,0 +1,54 @@
+# tests/test_startup.py
+import os
+import subprocess
+import sys
+
+#: import time of the console module without click in seconds
+IMPORT_BUDGET = 0.04
+
+HEAVY_MODULES = ("minimalmodbus", "serial", "asyncio", "hm310p_cli.hm310p")
+
+CHECK_MODULES = """
+import sys
+from hm310p_cli import console
+try:
+    console.cli.main(sys.argv[1:], prog_name="hm310p")
+except SystemExit:
+    pass
+print("loaded:" + ",".join(m for m in {modules!r} if m in sys.modules))
+"""
+
+
+def run_python(*args):
+    env = dict(os.environ)
+    src = os.path.join(os.path.dirname(__file__), os.pardir, "src")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [src, env.get("PYTHONPATH")]))
+    # measure imports, not compiling a stale bytecode cache on every run
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return subprocess.run(
+        [sys.executable, *args], env=env, capture_output=True, text=True, check=True
+    )
+
+
+def test_help_version_and_usage_errors_skip_driver_imports():
+    code = CHECK_MODULES.format(modules=HEAVY_MODULES)
+    for args in (["--help"], ["--version"], ["set", "-p", "x"], ["set", "--help"]):
+        result = run_python("-c", code, *args)
+        assert result.stdout.splitlines()[-1] == "loaded:", args
+
+
+def test_import_time_budget():
+    timings = []
+    for _ in range(3):
+        result = run_python("-X", "importtime", "-c", "import hm310p_cli.console")
+        console = click = 0
+        for line in result.stderr.splitlines():
+            fields = line.split("|")
+            if len(fields) != 3 or not fields[1].strip().isdigit():
+                continue  # header or unrelated output
+            if fields[2].strip() == "hm310p_cli.console":
+                console = int(fields[1])
+            elif fields[2].strip() == "click":
+                click = int(fields[1])
+        timings.append((console - click) / 1e6)
+    assert min(timings) < IMPORT_BUDGET, timings
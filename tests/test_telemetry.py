@@ -0,0 +1,62 @@
+# tests/test_telemetry.py
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from hm310p_cli.hm310p import HM310P  # noqa: E402
+from hm310p_cli.hm310p_constants import PowerState  # noqa: E402
+from hm310p_cli.hm310p_simulator import HM3xxPSimulator  # noqa: E402
+from hm310p_cli.hm310p_telemetry import TelemetryBuffer  # noqa: E402
+
+
+def test_ring_keeps_latest_samples():
+    telemetry = TelemetryBuffer(capacity=4)
+    nbytes = telemetry.nbytes
+    for i in range(10):
+        telemetry.append(float(i), 0.5, float(i) / 2, float(i))
+    assert len(telemetry) == 4 and telemetry.appended == 10
+    assert telemetry.nbytes == nbytes
+    assert list(telemetry.samples()["voltage"]) == [6.0, 7.0, 8.0, 9.0]
+    assert list(telemetry.samples(last=2)["timestamp"]) == [8.0, 9.0]
+    assert list(telemetry.window(1.0)["timestamp"]) == [8.0, 9.0]
+
+
+def test_windowed_statistics():
+    telemetry = TelemetryBuffer(capacity=8)
+    for i, voltage in enumerate([1.0, 2.0, 3.0, -3.0, 3.0, -2.0]):
+        telemetry.append(voltage, 0.0, 0.0, float(i))
+    stats = telemetry.statistics(last=4)["voltage"]
+    assert stats.count == 4
+    assert (stats.minimum, stats.maximum) == (-3.0, 3.0)
+    assert stats.mean == pytest.approx(0.25)
+    assert stats.rms == pytest.approx((31 / 4) ** 0.5)
+    assert telemetry.statistics(seconds=1.0)["voltage"].mean == pytest.approx(0.5)
+    assert TelemetryBuffer().statistics() == {}
+
+
+def test_energy_and_charge_cover_overwritten_samples():
+    telemetry = TelemetryBuffer(capacity=2)
+    for second in range(3601):
+        telemetry.append(12.0, 2.0, 24.0, float(second))
+    assert telemetry.energy == pytest.approx(24.0)
+    assert telemetry.charge == pytest.approx(2.0)
+    telemetry.reset_integrals()
+    telemetry.append(12.0, 2.0, 24.0, 7200.0)
+    assert telemetry.energy == 0.0
+
+
+def test_record_and_protect_events():
+    telemetry = TelemetryBuffer(capacity=16)
+    with HM3xxPSimulator(latency=False, load_resistance=10.0) as sim:
+        psupply = HM310P(sim.port, 1)
+        psupply.set_current(1.0)
+        psupply.set_voltage(5.0)
+        psupply.set_powerstate(PowerState.On)
+        telemetry.record(psupply)
+        psupply.set_ovp(4.0)
+        telemetry.record(psupply)
+        psupply.serial.close()
+    data = telemetry.samples()
+    assert data["current"][0] == pytest.approx(0.5)
+    events = telemetry.protect_events()
+    assert len(events) == 1 and events["protect"][0] & 0x01